@@ -10,10 +10,10 @@ from PySide6.QtGui import QFont, QRegularExpressionValidator, QDesktopServices,
 from ape import accounts, project, networks
 from mock_blockchain import (
     MockAccount, MockLandRegistry, MockLandNFT, MockMarketplace,
-    MOCK_ADMIN_ADDRESS, MOCK_USER_A_ADDRESS, MOCK_USER_B_ADDRESS
+    MOCK_ADMIN_ADDRESS, MOCK_USER_A_ADDRESS, MOCK_USER_B_ADDRESS, MOCK_BLIND_INDEX_KEY
 )
 from ipfs_utils import upload_file_to_ipfs, upload_json_to_ipfs, FLASK_BACKEND_URL, IPFS_URL_VIEWER
-from crypto_utils import encrypt_data, decrypt_data, save_land_info, get_real_cccd
+from crypto_utils import encrypt_data, decrypt_data, cccd_blind_index, save_land_info, get_real_cccd
 from dataclasses import dataclass
 
 USE_MOCK_DATA = True
@@ -861,7 +861,7 @@ class RegisterLandTab(QWidget):
         try:
             cccd_encrypted = encrypt_data(cccd_raw)
             receipt = self.land_registry_contract.register_land(
-                land_address, area, cccd_encrypted, pdf_uri, image_uri,
+                land_address, area, cccd_encrypted, cccd_blind_index(cccd_raw, MOCK_BLIND_INDEX_KEY if USE_MOCK_DATA else None), pdf_uri, image_uri,
                 sender=self.user_account
             )
             QMessageBox.information(self, "Thành công", f"Đã gửi hồ sơ đăng ký thành công!\nTx: {getattr(receipt, 'txn_hash', 'N/A')}")
@@ -1,6 +1,19 @@
 # file: crypto_utils.py
+"""
+Mã hóa CCCD (RSA-OAEP bằng khóa Admin) và blind index CCCD (HMAC-SHA256).
+
+Khóa blind index phải được Admin tạo một lần (generate_blind_index_key) rồi phân phối
+qua file BLIND_INDEX_KEY_FILE hoặc biến môi trường CCCD_INDEX_KEY; mọi máy phải dùng
+cùng một khóa thì blind index mới khớp nhau. Module không bao giờ tự tạo khóa.
+
+CẢNH BÁO: CCCD chỉ có ~12 chữ số nên ai giữ khóa này đều dò ngược được CCCD từ blind
+index trên chuỗi (vét cạn ~10^12 HMAC). Không phát nguyên khóa cho mọi máy khách;
+chỉ các máy tin cậy (Admin / dịch vụ đăng ký) được giữ khóa.
+"""
 import os
 import base64
+import hashlib
+import hmac
 import json
 from cryptography.hazmat.primitives import serialization, hashes
 from cryptography.hazmat.primitives.asymmetric import rsa, padding
@@ -8,6 +21,8 @@ from cryptography.hazmat.primitives.asymmetric import rsa, padding
 # Tên file khóa
 PRIVATE_KEY_FILE = "admin_private_key.pem" # CHỈ CÓ TRÊN MÁY ADMIN
 PUBLIC_KEY_FILE = "admin_public_key.pem"   # CÓ TRÊN TẤT CẢ MÁY
+BLIND_INDEX_KEY_FILE = "cccd_index_key.bin" # CHỈ CÓ TRÊN MÁY TIN CẬY (Admin phân phối, xem docstring)
+BLIND_INDEX_KEY_ENV = "CCCD_INDEX_KEY"      # Hoặc đặt khóa (hex) qua biến môi trường
 DATA_FILE = "user_local_data.json"
 
 def generate_keys():
@@ -119,4 +134,42 @@ def save_land_info(land_address_str, real_cccd):
 def get_real_cccd(land_address_str):
     """Lấy CCCD thật dựa trên địa chỉ đất."""
     data = load_local_data()
-    return data.get(land_address_str.strip().lower())
\ No newline at end of file
+    return data.get(land_address_str.strip().lower())
+
+class BlindIndexKeyMissing(Exception):
+    """Chưa cấu hình khóa blind index CCCD trên máy này."""
+
+def generate_blind_index_key():
+    """Tạo khóa blind index mới (Chỉ chạy 1 lần trên máy Admin, sau đó phân phối file khóa)."""
+    if os.path.exists(BLIND_INDEX_KEY_FILE):
+        return # Đã có khóa, không tạo lại
+    with open(BLIND_INDEX_KEY_FILE, "wb") as f:
+        f.write(os.urandom(32))
+
+def _read_blind_index_key():
+    env_key = os.environ.get(BLIND_INDEX_KEY_ENV)
+    if env_key:
+        return bytes.fromhex(env_key.replace("0x", "", 1))
+    if not os.path.exists(BLIND_INDEX_KEY_FILE):
+        # Không tự tạo: khóa ngẫu nhiên riêng của từng máy cho blind index không khớp với máy khác
+        raise BlindIndexKeyMissing(
+            f"Không tìm thấy khóa blind index CCCD: đặt biến môi trường {BLIND_INDEX_KEY_ENV} "
+            f"hoặc chép file {BLIND_INDEX_KEY_FILE} do Admin phân phối."
+        )
+    with open(BLIND_INDEX_KEY_FILE, "rb") as f:
+        return f.read()
+
+def get_blind_index_key():
+    """Đọc khóa HMAC của blind index (biến môi trường trước, sau đó file). Thiếu khóa thì ném BlindIndexKeyMissing."""
+    return _read_blind_index_key()
+
+def cccd_blind_index(real_cccd, key=None):
+    """
+    Blind index của CCCD: HMAC-SHA256 dạng hex '0x...'.
+    Bản mã OAEP khác nhau mỗi lần mã hóa, còn blind index thì cố định cho mỗi CCCD
+    nên dùng được làm khóa tra cứu "mọi thửa của một công dân".
+    `key` chỉ dùng cho dữ liệu giả lập (mock); mặc định đọc khóa đã phân phối.
+    """
+    normalized = "".join(str(real_cccd).split())
+    key = key if key is not None else get_blind_index_key()
+    return "0x" + hmac.new(key, normalized.encode('utf-8'), hashlib.sha256).hexdigest()
@@ -2,6 +2,8 @@ from flask import Flask, request, jsonify, send_file
 import requests
 import json
 import io
+import os
+from crypto_utils import cccd_blind_index, BlindIndexKeyMissing
 
 app = Flask(__name__)
 
@@ -9,6 +11,7 @@ app = Flask(__name__)
 IPFS_HOST = "192.168.0.140"
 IPFS_API_PORT = "5001"
 IPFS_API_URL = f"http://{IPFS_HOST}:{IPFS_API_PORT}/api/v0"
+CCCD_INDEX_FILE = "cccd_index.json"  # blind index (commitment) -> CID của bản mã CCCD
 
 # ================= UPLOAD =================
 
@@ -57,6 +60,60 @@ def upload_json():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# ================= CCCD (bản mã theo commitment) =================
+
+def load_cccd_index():
+    if not os.path.exists(CCCD_INDEX_FILE):
+        return {}
+    with open(CCCD_INDEX_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+@app.route("/cccd", methods=["POST"])
+def upload_cccd():
+    """
+    Tính commitment (blind index, bytes32 trên contract) của CCCD, lưu bản mã lên IPFS và ghi nhớ
+    commitment -> CID. Khóa blind index chỉ nằm trên backend: máy khách gửi CCCD và nhận commitment.
+    """
+    json_data = request.get_json()
+    if not json_data or not json_data.get("cccd") or not json_data.get("ciphertext"):
+        return jsonify({"error": "cccd and ciphertext are required"}), 400
+
+    try:
+        commitment = cccd_blind_index(json_data["cccd"])
+    except BlindIndexKeyMissing as e:
+        return jsonify({"error": str(e)}), 503
+
+    try:
+        files = {"file": ("cccd.json", json.dumps({"commitment": commitment, "ciphertext": json_data["ciphertext"]}))}
+        res = requests.post(f"{IPFS_API_URL}/add", files=files)
+        cid = res.json()["Hash"]
+
+        requests.post(f"{IPFS_API_URL}/pin/add?arg={cid}")
+
+        index = load_cccd_index()
+        index[commitment] = cid
+        with open(CCCD_INDEX_FILE, "w", encoding="utf-8") as f:
+            json.dump(index, f, indent=4)
+
+        return jsonify({"cid": cid, "commitment": commitment})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/cccd/<commitment>")
+def get_cccd(commitment):
+    """Trả về bản mã CCCD của commitment (client giải mã rồi tự kiểm tra lại blind index)"""
+    cid = load_cccd_index().get(commitment.lower())
+    if cid is None:
+        return jsonify({"error": "Unknown commitment"}), 404
+
+    try:
+        res = requests.post(f"{IPFS_API_URL}/cat?arg={cid}", timeout=20)
+        res.raise_for_status()
+        blob = json.loads(res.content)
+        return jsonify({"cid": cid, "ciphertext": blob["ciphertext"]})
+    except Exception as e:
+        return jsonify({"error": "IPFS error", "details": str(e)}), 500
+
 # ================= VIEW (Hàm quan trọng đã sửa) =================
 
 def detect_mimetype(content_bytes):
@@ -0,0 +1,125 @@
+# file: batch_reader.py
+import time
+
+from ape import networks
+
+from app_modules.rpc_metrics import RPC_METRICS
+
+# Số eth_call tối đa trong một JSON-RPC batch (geth mặc định giới hạn 1000 request/batch)
+DEFAULT_BATCH_SIZE = 500
+
+
+def _unwrap_output(decoded_output):
+    """Giống ape ContractCall: một giá trị trả về thì bỏ tuple bao ngoài."""
+    if not isinstance(decoded_output, (list, tuple)):
+        return decoded_output
+    if len(decoded_output) < 2:
+        return decoded_output[0] if len(decoded_output) == 1 else None
+    return decoded_output
+
+
+class BatchReader:
+    """
+    Gom nhiều lời gọi view của contract và gửi trong một JSON-RPC batch.
+
+    Cách dùng:
+        reader = BatchReader()
+        reader.add(marketplace.listings, 1, parser=parse_listing_tuple)
+        reader.add(land_nft.ownerOf, 5)
+        listing, owner = reader.execute()
+
+    Lời gọi bị revert (ví dụ ownerOf của token không tồn tại) trả về None.
+    Với đối tượng không phải contract ape (mock) thì gọi trực tiếp từng hàm.
+    Hàm của CachedContract được tra cache trước, chỉ phần chưa có mới gửi lên node.
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self._calls = []
+
+    def add(self, contract_method, *args, parser=None):
+        """Thêm một lời gọi vào hàng đợi, trả về vị trí của kết quả trong execute()."""
+        self._calls.append((contract_method, args, parser))
+        return len(self._calls) - 1
+
+    def map(self, contract_method, args_list, parser=None):
+        """Gọi cùng một hàm view cho nhiều bộ tham số, trả về danh sách kết quả theo thứ tự."""
+        reader = BatchReader(self.batch_size)
+        for args in args_list:
+            reader.add(contract_method, *(args if isinstance(args, tuple) else (args,)), parser=parser)
+        return reader.execute()
+
+    def execute(self):
+        calls, self._calls = self._calls, []
+        results = [None] * len(calls)
+
+        # Provider không hỗ trợ batch (ví dụ mạng test trong bộ nhớ) thì gọi lần lượt như cũ
+        supports_batch = hasattr(networks.provider.web3.provider, "make_batch_request")
+
+        rpc_calls = []
+        for index, (method, args, parser) in enumerate(calls):
+            if supports_batch and hasattr(method, "encode_input"):
+                if hasattr(method, "lookup"):
+                    hit, value = method.lookup(args)
+                    if hit:
+                        results[index] = value
+                        continue
+                abi = next(abi for abi in method.abis if len(abi.inputs) == len(args))
+                call_tx = {"to": method.contract.address, "data": "0x" + bytes(method.encode_input(*args)).hex()}
+                rpc_calls.append((index, abi, call_tx))
+                continue
+            try:
+                results[index] = method(*args)
+            except Exception:
+                results[index] = None
+
+        ecosystem = networks.provider.network.ecosystem
+        for start in range(0, len(rpc_calls), self.batch_size):
+            chunk = rpc_calls[start:start + self.batch_size]
+            responses = self._send_batch([call_tx for _, _, call_tx in chunk])
+            for (index, abi, _), raw_output in zip(chunk, responses):
+                if raw_output is not None:
+                    results[index] = _unwrap_output(ecosystem.decode_returndata(abi, bytes.fromhex(raw_output[2:])))
+                    method, args, _ = calls[index]
+                    if hasattr(method, "store"):
+                        method.store(args, results[index])
+
+        for index, (_, _, parser) in enumerate(calls):
+            if parser is not None:
+                results[index] = parser(results[index])
+        return results
+
+    def _send_batch(self, call_txs):
+        """Gửi một batch eth_call, trả về danh sách returndata (hex) hoặc None nếu lỗi."""
+        requests = [("eth_call", [call_tx, "latest"]) for call_tx in call_txs]
+        started = time.perf_counter()
+        try:
+            responses = networks.provider.web3.provider.make_batch_request(requests)
+        except Exception:
+            self._record_batch(call_txs, started, [], error=True)
+            raise
+
+        if not isinstance(responses, list):
+            # Node trả về một lỗi chung cho cả batch
+            raise Exception(f"Batch RPC thất bại: {responses.get('error')}")
+
+        outputs = []
+        for response in responses:
+            result = response.get("result")
+            if response.get("error") or result in (None, "0x", b""):
+                outputs.append(None)
+            else:
+                outputs.append(result if isinstance(result, str) else "0x" + bytes(result).hex())
+        self._record_batch(call_txs, started, outputs)
+        return outputs
+
+    def _record_batch(self, call_txs, started, outputs, error=False):
+        """Một batch là một lượt round trip, ghi kèm số eth_call bên trong."""
+        RPC_METRICS.record(
+            "batch", "eth_call",
+            (time.perf_counter() - started) * 1000,
+            request_bytes=sum(len(call_tx["data"]) // 2 - 1 for call_tx in call_txs),
+            response_bytes=sum(len(output) // 2 - 1 for output in outputs if output),
+            error=error,
+            batched_calls=len(call_txs),
+        )
@@ -0,0 +1,474 @@
+# file: chain_indexer.py
+import functools
+import json
+import sqlite3
+import threading
+
+from ape import chain
+from ape.types import LogFilter
+
+INDEX_DB_FILE = "chain_index.db"
+# Tăng khi định dạng event/bảng thay đổi -> chỉ mục cũ bị xoá và đồng bộ lại từ đầu
+INDEX_FORMAT_VERSION = 3
+# geth --dev đóng block ngay khi có giao dịch nên mặc định không cần chờ xác nhận.
+# Với mạng thật nên đặt 6-12 block để tránh phải tua lại khi reorg.
+DEFAULT_CONFIRMATIONS = 0
+
+ZERO_ADDRESS = "0x" + "0" * 40
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS events (
+    block_number INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    block_hash TEXT NOT NULL,
+    event TEXT NOT NULL,
+    args TEXT NOT NULL,
+    PRIMARY KEY (block_number, log_index)
+);
+CREATE TABLE IF NOT EXISTS lands (
+    id INTEGER PRIMARY KEY,
+    land_address TEXT,
+    area INTEGER,
+    owner_cccd TEXT,
+    status INTEGER,
+    pdf_uri TEXT,
+    image_uri TEXT,
+    owner TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_lands_owner ON lands(owner);
+CREATE INDEX IF NOT EXISTS idx_lands_status ON lands(status);
+CREATE TABLE IF NOT EXISTS listings (
+    listing_id INTEGER PRIMARY KEY,
+    token_id INTEGER,
+    seller_cccd TEXT,
+    seller TEXT,
+    price TEXT,
+    status INTEGER,
+    created_at INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_listings_status ON listings(status);
+CREATE INDEX IF NOT EXISTS idx_listings_seller ON listings(seller);
+CREATE TABLE IF NOT EXISTS transactions (
+    tx_id INTEGER PRIMARY KEY,
+    listing_id INTEGER,
+    buyer_cccd TEXT,
+    buyer_address TEXT,
+    amount TEXT,
+    status INTEGER,
+    created_at INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_buyer ON transactions(buyer_address);
+CREATE INDEX IF NOT EXISTS idx_transactions_listing ON transactions(listing_id);
+CREATE INDEX IF NOT EXISTS idx_transactions_status ON transactions(status);
+"""
+
+LAND_COLUMNS = "d.id, d.land_address, d.area, d.owner_cccd, d.status, d.pdf_uri, d.image_uri"
+LISTING_COLUMNS = "l.listing_id, l.token_id, l.seller_cccd, l.seller, l.price, l.status, l.created_at"
+TX_COLUMNS = "t.tx_id, t.listing_id, t.buyer_cccd, t.buyer_address, t.amount, t.status, t.created_at"
+
+
+# Event -> các (loại bản ghi, tên tham số chứa id) mà event đó làm thay đổi
+CHANGE_KEYS = {
+    "LandRegistered": (("lands", "land_id"),),
+    "LandApproved": (("lands", "land_id"),),
+    "LandRejected": (("lands", "land_id"),),
+    "Transfer": (("lands", "_tokenId"),),
+    "CCCDUpdated": (("lands", "token_id"),),
+    "ListingCreated": (("listings", "listing_id"), ("lands", "token_id")),
+    "ListingCancelled": (("listings", "listing_id"), ("lands", "token_id")),
+    "TransactionInitiated": (("transactions", "tx_id"), ("listings", "listing_id")),
+    "TransactionApproved": (("transactions", "tx_id"), ("listings", "listing_id"), ("lands", "token_id")),
+    "TransactionRejected": (("transactions", "tx_id"), ("listings", "listing_id")),
+    "TransactionCancelled": (("transactions", "tx_id"), ("listings", "listing_id")),
+}
+
+
+def _locked(method):
+    """Các tab tải dữ liệu trên thread pool dùng chung một chỉ mục -> tuần tự hoá truy cập SQLite."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _to_json_value(value):
+    """Chuyển giá trị trả về từ ape (HexBytes, struct...) sang dạng lưu được vào JSON."""
+    if isinstance(value, bytes):
+        return "0x" + value.hex()
+    if isinstance(value, int):
+        return value
+    return str(value)
+
+
+def _listing_row(row):
+    # price lưu dạng TEXT vì wei có thể vượt quá INTEGER 64-bit của SQLite
+    return (row[0], row[1], row[2], row[3], int(row[4]), row[5], row[6])
+
+
+def _tx_row(row):
+    return (row[0], row[1], row[2], row[3], int(row[4]), row[5], row[6])
+
+
+class ChainIndexer:
+    """
+    Bộ chỉ mục cục bộ: đọc log của LandRegistry, LandNFT và Marketplace vào SQLite.
+
+    Mỗi lần sync() chỉ lấy log từ block đã đồng bộ gần nhất tới head - confirmations,
+    nên chi phí làm mới tỉ lệ với số sự kiện mới thay vì toàn bộ lịch sử. Event mang đủ
+    dữ liệu nên không cần gọi view nào; bảng `events` lưu log để có thể dựng lại trạng
+    thái khi phát hiện reorg.
+    """
+
+    EVENTS = (
+        ("land_registry", "LandRegistered"),
+        ("land_registry", "LandApproved"),
+        ("land_registry", "LandRejected"),
+        ("land_registry", "CCCDUpdated"),
+        ("land_nft", "Transfer"),
+        ("marketplace", "ListingCreated"),
+        ("marketplace", "ListingCancelled"),
+        ("marketplace", "TransactionInitiated"),
+        ("marketplace", "TransactionApproved"),
+        ("marketplace", "TransactionRejected"),
+        ("marketplace", "TransactionCancelled"),
+    )
+
+    def __init__(self, land_registry_contract, land_nft_contract, marketplace_contract,
+                 db_path=INDEX_DB_FILE, confirmations=DEFAULT_CONFIRMATIONS):
+        self.land_registry = land_registry_contract
+        self.land_nft = land_nft_contract
+        self.marketplace = marketplace_contract
+        self.confirmations = confirmations
+        # Tăng mỗi khi dữ liệu bị dựng lại (reorg, đổi contract) -> các view phải vẽ lại toàn bộ
+        self.generation = 0
+
+        self._lock = threading.RLock()
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+        self._reset_if_contracts_changed()
+
+    # -------------------------------------------------------------------------
+    # Trạng thái đồng bộ
+    # -------------------------------------------------------------------------
+
+    def _get_state(self, key, default=None):
+        row = self.db.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_state(self, key, value):
+        self.db.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def _contract_addresses(self):
+        return [self.land_registry.address, self.land_nft.address, self.marketplace.address]
+
+    def _reset_if_contracts_changed(self):
+        """Deploy lại contract (mạng dev) thì dữ liệu cũ không còn đúng -> xóa và đồng bộ lại."""
+        fingerprint = ",".join([f"v{INDEX_FORMAT_VERSION}", *self._contract_addresses()])
+        if self._get_state("contracts") != fingerprint:
+            self.generation += 1
+            with self.db:
+                self.db.execute("DELETE FROM events")
+                self._clear_projections()
+                self.db.execute("DELETE FROM sync_state")
+                self._set_state("contracts", fingerprint)
+
+    def _clear_projections(self):
+        self.db.execute("DELETE FROM lands")
+        self.db.execute("DELETE FROM listings")
+        self.db.execute("DELETE FROM transactions")
+
+    @property
+    def last_synced_block(self):
+        return int(self._get_state("last_block", -1))
+
+    # -------------------------------------------------------------------------
+    # Đồng bộ
+    # -------------------------------------------------------------------------
+
+    @_locked
+    def sync(self):
+        """Đọc log mới tới head - confirmations. Trả về block cuối cùng đã đồng bộ."""
+        last_block = self.last_synced_block
+        # Node dev khởi động lại (deploy lại đúng địa chỉ cũ) có thể thấp hơn block đã đồng bộ:
+        # coi như reorg thay vì đọc một block chưa tồn tại
+        if last_block >= 0 and (
+            last_block > chain.blocks.height or self._block_hash(last_block) != self._get_state("last_block_hash")
+        ):
+            last_block = self._rewind(last_block)
+
+        target_block = chain.blocks.height - self.confirmations
+        if target_block <= last_block:
+            return last_block
+
+        log_filter = LogFilter(
+            addresses=self._contract_addresses(),
+            events=[getattr(getattr(self, contract), event).abi for contract, event in self.EVENTS],
+            start_block=last_block + 1,
+            stop_block=target_block,
+        )
+
+        logs = list(chain.provider.get_contract_logs(log_filter))
+
+        with self.db:
+            for log in logs:
+                args = {k: _to_json_value(v) for k, v in log.event_arguments.items()}
+                self._store_and_apply(
+                    log.block_number, log.log_index, _to_json_value(log.block_hash), log.event_name, args
+                )
+
+            self._set_state("last_block", target_block)
+            self._set_state("last_block_hash", self._block_hash(target_block))
+
+        return target_block
+
+    def _block_hash(self, block_number):
+        return _to_json_value(chain.blocks[block_number].hash)
+
+    def _store_and_apply(self, block_number, log_index, block_hash, event_name, args):
+        self.db.execute(
+            "INSERT OR REPLACE INTO events (block_number, log_index, block_hash, event, args) VALUES (?, ?, ?, ?, ?)",
+            (block_number, log_index, block_hash, event_name, json.dumps(args)),
+        )
+        self._apply(event_name, args)
+
+    def _rewind(self, last_block):
+        """
+        Block đã đồng bộ không còn nằm trên chuỗi chính (reorg): tìm block chung gần nhất,
+        xóa log phía sau rồi dựng lại các bảng từ log còn lại.
+        """
+        print(f"[Indexer] Phát hiện reorg tại block {last_block}, đang tua lại...")
+        self.generation += 1
+        fork_block = -1
+        blocks = self.db.execute(
+            "SELECT DISTINCT block_number, block_hash FROM events ORDER BY block_number DESC"
+        ).fetchall()
+        for block_number, block_hash in blocks:
+            if block_number <= chain.blocks.height and self._block_hash(block_number) == block_hash:
+                fork_block = block_number
+                break
+
+        with self.db:
+            self.db.execute("DELETE FROM events WHERE block_number > ?", (fork_block,))
+            self._clear_projections()
+            for event_name, args in self.db.execute(
+                "SELECT event, args FROM events ORDER BY block_number, log_index"
+            ).fetchall():
+                self._apply(event_name, json.loads(args))
+
+            if fork_block >= 0:
+                self._set_state("last_block", fork_block)
+                self._set_state("last_block_hash", self._block_hash(fork_block))
+            else:
+                self.db.execute("DELETE FROM sync_state WHERE key IN ('last_block', 'last_block_hash')")
+
+        return fork_block
+
+    # -------------------------------------------------------------------------
+    # Áp dụng event vào các bảng
+    # -------------------------------------------------------------------------
+
+    def _apply(self, event_name, args):
+        handler = getattr(self, f"_on_{event_name}", None)
+        if handler:
+            handler(args)
+
+    def _on_LandRegistered(self, args):
+        self.db.execute(
+            "INSERT OR REPLACE INTO lands (id, land_address, area, owner_cccd, status, pdf_uri, image_uri, owner) "
+            "VALUES (?, ?, ?, ?, 0, ?, ?, ?)",
+            (args["land_id"], args["land_address"], args["area"], args["owner_cccd"],
+             args["pdf_uri"], args["image_uri"], args["owner"]),
+        )
+
+    def _on_LandApproved(self, args):
+        self.db.execute("UPDATE lands SET status = 1 WHERE id = ?", (args["land_id"],))
+
+    def _on_LandRejected(self, args):
+        self.db.execute("UPDATE lands SET status = 2 WHERE id = ?", (args["land_id"],))
+
+    def _on_Transfer(self, args):
+        # Mint và burn không làm thay đổi chủ sở hữu trong LandRegistry
+        if args["_from"] == ZERO_ADDRESS or args["_to"] == ZERO_ADDRESS:
+            return
+        self.db.execute("UPDATE lands SET owner = ? WHERE id = ?", (args["_to"], args["_tokenId"]))
+
+    def _on_CCCDUpdated(self, args):
+        self.db.execute("UPDATE lands SET owner_cccd = ? WHERE id = ?", (args["new_cccd"], args["token_id"]))
+
+    def _on_ListingCreated(self, args):
+        self.db.execute(
+            "INSERT OR REPLACE INTO listings (listing_id, token_id, seller_cccd, seller, price, status, created_at) "
+            "VALUES (?, ?, ?, ?, ?, 0, ?)",
+            (args["listing_id"], args["token_id"], args["seller_cccd"], args["seller"], str(args["price"]),
+             args["created_at"]),
+        )
+
+    def _on_ListingCancelled(self, args):
+        self.db.execute("UPDATE listings SET status = 3 WHERE listing_id = ?", (args["listing_id"],))
+
+    def _on_TransactionInitiated(self, args):
+        self.db.execute(
+            "INSERT OR REPLACE INTO transactions (tx_id, listing_id, buyer_cccd, buyer_address, amount, status, created_at) "
+            "VALUES (?, ?, ?, ?, ?, 0, ?)",
+            (args["tx_id"], args["listing_id"], args["buyer_cccd"], args["buyer"], str(args["amount"]),
+             args["created_at"]),
+        )
+        self.db.execute("UPDATE listings SET status = 1 WHERE listing_id = ?", (args["listing_id"],))
+
+    def _set_tx_status(self, args, tx_status, listing_status):
+        self.db.execute("UPDATE transactions SET status = ? WHERE tx_id = ?", (tx_status, args["tx_id"]))
+        self.db.execute("UPDATE listings SET status = ? WHERE listing_id = ?", (listing_status, args["listing_id"]))
+
+    def _on_TransactionApproved(self, args):
+        self._set_tx_status(args, 1, 2)
+
+    def _on_TransactionRejected(self, args):
+        self._set_tx_status(args, 2, 0)
+
+    def _on_TransactionCancelled(self, args):
+        self._set_tx_status(args, 3, 0)
+
+    # -------------------------------------------------------------------------
+    # Truy vấn (trả về tuple theo đúng thứ tự field của struct trong contract)
+    # -------------------------------------------------------------------------
+
+    @_locked
+    def get_land(self, land_id):
+        return self.db.execute(f"SELECT {LAND_COLUMNS} FROM lands d WHERE d.id = ?", (land_id,)).fetchone()
+
+    @_locked
+    def get_land_owner(self, land_id):
+        row = self.db.execute("SELECT owner FROM lands WHERE id = ?", (land_id,)).fetchone()
+        return row[0] if row else ZERO_ADDRESS
+
+    @_locked
+    def get_lands(self, status=None, owner=None):
+        """Danh sách (parcel, owner) mới nhất trước, lọc theo trạng thái và/hoặc chủ sở hữu."""
+        query = f"SELECT {LAND_COLUMNS}, d.owner FROM lands d WHERE 1 = 1"
+        params = []
+        if status is not None:
+            query += " AND d.status = ?"
+            params.append(status)
+        if owner is not None:
+            query += " AND d.owner = ?"
+            params.append(owner)
+        rows = self.db.execute(query + " ORDER BY d.id DESC", params).fetchall()
+        return [(row[:7], row[7]) for row in rows]
+
+    @_locked
+    def get_changes(self, since_block):
+        """
+        Id của các thửa đất, listing và giao dịch bị thay đổi bởi log sau `since_block`:
+        {"lands": {...}, "listings": {...}, "transactions": {...}}.
+        """
+        changes = {"lands": set(), "listings": set(), "transactions": set()}
+        for event_name, args in self.db.execute(
+            "SELECT event, args FROM events WHERE block_number > ?", (since_block,)
+        ).fetchall():
+            args = json.loads(args)
+            for kind, key in CHANGE_KEYS.get(event_name, ()):
+                changes[kind].add(args[key])
+
+        # Giao dịch đổi trạng thái kéo theo listing của nó, listing đổi kéo theo thửa đất (đang bán hay không)
+        changes["listings"].update(self._lookup_ids("listing_id", "transactions", "tx_id", changes["transactions"]))
+        changes["lands"].update(self._lookup_ids("token_id", "listings", "listing_id", changes["listings"]))
+        return changes
+
+    def _lookup_ids(self, column, table, key_column, keys):
+        if not keys:
+            return set()
+        placeholders = ", ".join("?" * len(keys))
+        rows = self.db.execute(
+            f"SELECT {column} FROM {table} WHERE {key_column} IN ({placeholders})", list(keys)
+        ).fetchall()
+        return {row[0] for row in rows}
+
+    @_locked
+    def get_listing(self, listing_id):
+        row = self.db.execute(f"SELECT {LISTING_COLUMNS} FROM listings l WHERE l.listing_id = ?", (listing_id,)).fetchone()
+        return _listing_row(row) if row else None
+
+    @_locked
+    def get_active_listings(self, exclude_seller=None):
+        """Các listing đang mở bán kèm thông tin thửa đất: [(listing, parcel), ...]."""
+        rows = self.db.execute(
+            f"SELECT {LISTING_COLUMNS}, {LAND_COLUMNS} "
+            "FROM listings l JOIN lands d ON d.id = l.token_id "
+            "WHERE l.status = 0 AND l.seller != ? ORDER BY l.listing_id",
+            (exclude_seller or "",),
+        ).fetchall()
+        return [(_listing_row(row[:7]), row[7:]) for row in rows]
+
+    @_locked
+    def is_token_listed(self, token_id):
+        row = self.db.execute(
+            "SELECT 1 FROM listings WHERE token_id = ? AND status IN (0, 1) LIMIT 1", (token_id,)
+        ).fetchone()
+        return row is not None
+
+    @_locked
+    def get_listed_token_ids(self):
+        """Token đang được đăng bán hoặc đang trong giao dịch."""
+        rows = self.db.execute("SELECT DISTINCT token_id FROM listings WHERE status IN (0, 1)").fetchall()
+        return {row[0] for row in rows}
+
+    @_locked
+    def get_transaction(self, tx_id):
+        """(transaction, listing) của một giao dịch, None nếu chưa có trong chỉ mục."""
+        row = self.db.execute(
+            f"SELECT {TX_COLUMNS}, {LISTING_COLUMNS} FROM transactions t JOIN listings l ON l.listing_id = t.listing_id "
+            "WHERE t.tx_id = ?",
+            (tx_id,),
+        ).fetchone()
+        return (_tx_row(row[:7]), _listing_row(row[7:])) if row else None
+
+    @_locked
+    def get_transactions(self, address=None):
+        """
+        Danh sách (transaction, listing) mới nhất trước. Nếu có `address` thì chỉ lấy
+        các giao dịch mà địa chỉ đó là người mua hoặc người bán.
+        """
+        query = f"SELECT {TX_COLUMNS}, {LISTING_COLUMNS} FROM transactions t JOIN listings l ON l.listing_id = t.listing_id"
+        params = []
+        if address is not None:
+            # UNION thay vì OR để SQLite dùng được index của cả hai cột
+            query = f"{query} WHERE t.buyer_address = ? UNION {query} WHERE l.seller = ?"
+            params = [address, address]
+        rows = self.db.execute(query + " ORDER BY 1 DESC", params).fetchall()
+        return [(_tx_row(row[:7]), _listing_row(row[7:])) for row in rows]
+
+
+class ChangeTracker:
+    """
+    Ghi nhớ block mà một view (tab) đã hiển thị để lần làm mới sau chỉ lấy phần thay đổi.
+
+    poll() đồng bộ chỉ mục rồi trả về (các id thay đổi kể từ block đã hiển thị, mốc mới),
+    với thay đổi là None nếu view phải vẽ lại toàn bộ (lần đầu, sau reorg hoặc khi contract
+    được deploy lại). View gọi commit(mốc) sau khi đã áp dụng xong, nên một lần tải bị huỷ
+    giữa chừng không làm mất thay đổi.
+    """
+
+    def __init__(self, indexer):
+        self.indexer = indexer
+        self.block = None
+        self.generation = None
+
+    def poll(self):
+        block = self.indexer.sync()
+        generation = self.indexer.generation
+        changes = None
+        if self.block is not None and self.generation == generation:
+            changes = self.indexer.get_changes(self.block)
+        return changes, (block, generation)
+
+    def commit(self, mark):
+        self.block, self.generation = mark
+
+    def reset(self):
+        """Buộc lần poll() kế tiếp vẽ lại toàn bộ."""
+        self.block = None
@@ -0,0 +1,170 @@
+# file: contract_cache.py
+import threading
+import time
+from collections import OrderedDict
+
+from ape import chain
+
+# Số kết quả view tối đa giữ trong bộ nhớ
+DEFAULT_MAX_ENTRIES = 4096
+# Khoảng thời gian (giây) giữa hai lần hỏi số block mới nhất từ node
+DEFAULT_BLOCK_POLL_INTERVAL = 1.0
+
+
+class ContractCache:
+    """
+    Bộ nhớ đệm LRU dùng chung cho kết quả các hàm view.
+
+    Khoá gồm (địa chỉ contract, tên hàm, tham số, số block). Khi phát hiện block mới
+    hoặc GUI vừa gửi giao dịch thì xoá toàn bộ cache. An toàn khi gọi từ nhiều thread.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, block_poll_interval=DEFAULT_BLOCK_POLL_INTERVAL):
+        self.max_entries = max_entries
+        self.block_poll_interval = block_poll_interval
+        self._entries = OrderedDict()
+        self._block_number = None
+        self._block_checked_at = 0.0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def current_block(self):
+        """Số block hiện tại; chỉ hỏi node tối đa một lần mỗi block_poll_interval giây."""
+        with self._lock:
+            now = time.monotonic()
+            if self._block_number is None or now - self._block_checked_at >= self.block_poll_interval:
+                block_number = chain.blocks.height
+                self._block_checked_at = now
+                if block_number != self._block_number:
+                    self._entries.clear()
+                    self._block_number = block_number
+            return self._block_number
+
+    def invalidate(self):
+        """Xoá toàn bộ cache và buộc đọc lại số block ở lần truy cập kế tiếp."""
+        with self._lock:
+            self._entries.clear()
+            self._block_number = None
+
+    def make_key(self, address, method_name, args, kwargs):
+        key = (address, method_name, tuple(args), tuple(sorted(kwargs.items())), self.current_block())
+        hash(key)  # Tham số không hash được (list, dict...) thì không cache
+        return key
+
+    def lookup(self, key):
+        """Trả về (có trong cache hay không, giá trị)."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def store(self, key, value):
+        with self._lock:
+            # Khoá tính theo block cũ (cache vừa bị xoá giữa chừng) thì bỏ qua
+            if key[-1] != self._block_number:
+                return
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class CachedCall:
+    """Bọc một hàm view của contract ape; BatchReader cũng dùng lookup/store để tận dụng cache."""
+
+    def __init__(self, handler, cache):
+        self._handler = handler
+        self._method_name = handler.abis[0].name
+        self.cache = cache
+
+    def __getattr__(self, name):
+        # encode_input, abis, contract... chuyển thẳng cho handler gốc
+        return getattr(self._handler, name)
+
+    def cache_key(self, args, kwargs=None):
+        try:
+            return self.cache.make_key(self._handler.contract.address, self._method_name, args, kwargs or {})
+        except TypeError:
+            return None
+
+    def lookup(self, args):
+        key = self.cache_key(args)
+        if key is None:
+            return False, None
+        return self.cache.lookup(key)
+
+    def store(self, args, value):
+        key = self.cache_key(args)
+        if key is not None:
+            self.cache.store(key, value)
+
+    def __call__(self, *args, **kwargs):
+        key = self.cache_key(args, kwargs)
+        if key is None:
+            return self._handler(*args, **kwargs)
+
+        hit, value = self.cache.lookup(key)
+        if hit:
+            return value
+        value = self._handler(*args, **kwargs)
+        self.cache.store(key, value)
+        return value
+
+
+class CachedTransaction:
+    """Bọc một hàm giao dịch: sau khi gửi (kể cả khi lỗi) thì xoá cache vì state đã/có thể đã đổi."""
+
+    def __init__(self, handler, cache):
+        self._handler = handler
+        self.cache = cache
+
+    def __getattr__(self, name):
+        return getattr(self._handler, name)
+
+    def __call__(self, *args, **kwargs):
+        try:
+            return self._handler(*args, **kwargs)
+        finally:
+            self.cache.invalidate()
+
+
+class CachedContract:
+    """
+    Proxy quanh contract ape: hàm view được ghi nhớ theo block, hàm giao dịch xoá cache.
+
+    Cách dùng:
+        cache = ContractCache()
+        marketplace = CachedContract(project.Marketplace.at(address), cache)
+        marketplace.listing_fee()   # gọi RPC
+        marketplace.listing_fee()   # lấy từ cache nếu chưa có block mới
+    """
+
+    def __init__(self, contract, cache):
+        self._contract = contract
+        self.cache = cache
+        self._wrapped = {}
+
+    @property
+    def address(self):
+        return self._contract.address
+
+    def __getattr__(self, name):
+        if name in self._wrapped:
+            return self._wrapped[name]
+
+        attr = getattr(self._contract, name)
+        # Nhận diện theo ABI thay vì kiểu lớp để bọc được cả proxy khác (InstrumentedContract)
+        abis = getattr(attr, "abis", None)
+        if not abis:
+            return attr
+        if all(abi.stateMutability in ("view", "pure") for abi in abis):
+            attr = CachedCall(attr, self.cache)
+        else:
+            attr = CachedTransaction(attr, self.cache)
+
+        self._wrapped[name] = attr
+        return attr
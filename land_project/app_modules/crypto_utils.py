@@ -1,14 +1,33 @@
 # file: crypto_utils.py
+"""
+Mã hóa CCCD (RSA-OAEP bằng khóa Admin) và blind index CCCD (HMAC-SHA256).
+
+Khóa blind index phải được Admin tạo một lần (generate_blind_index_key) rồi phân phối
+qua file BLIND_INDEX_KEY_FILE hoặc biến môi trường CCCD_INDEX_KEY; mọi máy phải dùng
+cùng một khóa thì blind index mới khớp nhau. Module không bao giờ tự tạo khóa.
+
+CẢNH BÁO: CCCD chỉ có ~12 chữ số nên ai giữ khóa này đều dò ngược được CCCD từ blind
+index trên chuỗi (vét cạn ~10^12 HMAC). Không phát nguyên khóa cho mọi máy khách;
+chỉ các máy tin cậy (Admin / backend CCCD) được giữ khóa. Máy khách (đăng ký, mua) gửi
+CCCD cho endpoint /cccd của backend và nhận lại blind index (commit_cccd), không cần khóa.
+"""
 import os
 import base64
+import hashlib
+import hmac
 import json
+import threading
 from cryptography.hazmat.primitives import serialization, hashes
 from cryptography.hazmat.primitives.asymmetric import rsa, padding
+from app_modules.ipfs_utils import upload_cccd_blob, fetch_cccd_blob
 
 # Tên file khóa
 PRIVATE_KEY_FILE = "admin_private_key.pem" # CHỈ CÓ TRÊN MÁY ADMIN
 PUBLIC_KEY_FILE = "admin_public_key.pem"   # CÓ TRÊN TẤT CẢ MÁY
+BLIND_INDEX_KEY_FILE = "cccd_index_key.bin" # CHỈ CÓ TRÊN MÁY TIN CẬY (Admin phân phối, xem docstring)
+BLIND_INDEX_KEY_ENV = "CCCD_INDEX_KEY"      # Hoặc đặt khóa (hex) qua biến môi trường
 DATA_FILE = "user_local_data.json"
+CCCD_STORE_FILE = "cccd_store.json"  # Kho cục bộ: blind index -> bản mã CCCD
 
 def generate_keys():
     """Tạo cặp khóa mới (Chỉ chạy 1 lần trên máy Admin)."""
@@ -119,4 +138,152 @@ def save_land_info(land_address_str, real_cccd):
 def get_real_cccd(land_address_str):
     """Lấy CCCD thật dựa trên địa chỉ đất."""
     data = load_local_data()
-    return data.get(land_address_str.strip().lower())
\ No newline at end of file
+    return data.get(land_address_str.strip().lower())
+
+# =============================================================================
+# CCCD BLIND INDEX
+# Contract chỉ lưu bytes32 = HMAC-SHA256(khóa chung, CCCD): cùng một CCCD luôn cho cùng
+# một khóa tra cứu (bản mã OAEP thì ngẫu nhiên mỗi lần). Bản mã nằm ở kho cục bộ và IPFS.
+# =============================================================================
+
+_cccd_store = None
+_cccd_store_lock = threading.Lock()  # Các tab giải mã trên thread pool
+_blind_index_key = None
+
+class BlindIndexKeyMissing(Exception):
+    """Chưa cấu hình khóa blind index CCCD trên máy này."""
+
+def generate_blind_index_key():
+    """Tạo khóa blind index mới (Chỉ chạy 1 lần trên máy Admin, sau đó phân phối file khóa)."""
+    if os.path.exists(BLIND_INDEX_KEY_FILE):
+        return # Đã có khóa, không tạo lại
+    with open(BLIND_INDEX_KEY_FILE, "wb") as f:
+        f.write(os.urandom(32))
+
+def _read_blind_index_key():
+    env_key = os.environ.get(BLIND_INDEX_KEY_ENV)
+    if env_key:
+        return bytes.fromhex(env_key.replace("0x", "", 1))
+    if not os.path.exists(BLIND_INDEX_KEY_FILE):
+        # Không tự tạo: khóa ngẫu nhiên riêng của từng máy cho blind index không khớp với máy khác
+        raise BlindIndexKeyMissing(
+            f"Không tìm thấy khóa blind index CCCD: đặt biến môi trường {BLIND_INDEX_KEY_ENV} "
+            f"hoặc chép file {BLIND_INDEX_KEY_FILE} do Admin phân phối."
+        )
+    with open(BLIND_INDEX_KEY_FILE, "rb") as f:
+        return f.read()
+
+def get_blind_index_key() -> bytes:
+    """Đọc khóa HMAC của blind index (biến môi trường trước, sau đó file). Thiếu khóa thì ném BlindIndexKeyMissing."""
+    global _blind_index_key
+    if _blind_index_key is None:
+        _blind_index_key = _read_blind_index_key()
+    return _blind_index_key
+
+def normalize_cccd(real_cccd) -> str:
+    """Bỏ mọi khoảng trắng để '079 0111 11111' và '079011111111' cho cùng blind index."""
+    return "".join(str(real_cccd).split())
+
+def cccd_blind_index(real_cccd) -> str:
+    """Blind index của CCCD: HMAC-SHA256, dạng hex '0x...' (truyền thẳng cho tham số bytes32)."""
+    digest = hmac.new(get_blind_index_key(), normalize_cccd(real_cccd).encode("utf-8"), hashlib.sha256)
+    return "0x" + digest.hexdigest()
+
+def normalize_commitment(value) -> str:
+    """Chuẩn hoá bytes32 đọc từ contract / chỉ mục về hex '0x...'; giá trị rỗng trả về ''."""
+    if isinstance(value, (bytes, bytearray)):
+        value = "0x" + bytes(value).hex()
+    value = (value or "").lower()
+    if not value.replace("0x", "", 1).strip("0"):
+        return ""
+    return value
+
+def _load_cccd_store():
+    global _cccd_store
+    if _cccd_store is None:
+        _cccd_store = {}
+        if os.path.exists(CCCD_STORE_FILE):
+            try:
+                with open(CCCD_STORE_FILE, 'r', encoding='utf-8') as f:
+                    _cccd_store = json.load(f)
+            except:
+                _cccd_store = {}
+    return _cccd_store
+
+def remember_ciphertexts(entries):
+    """
+    Lưu các cặp (blind index, bản mã) vào kho cục bộ bằng một lần ghi file.
+    Kho được ghi lại toàn bộ mỗi lần nên nơi tạo nhiều CCCD (bulk_register) phải gom theo lô.
+    """
+    with _cccd_store_lock:
+        store = _load_cccd_store()
+        new_entries = {blind_index: ciphertext for blind_index, ciphertext in entries if store.get(blind_index) != ciphertext}
+        if not new_entries:
+            return
+        store.update(new_entries)
+        # Ghi ra file tạm rồi đổi tên để không bao giờ để lại kho hỏng
+        tmp_path = CCCD_STORE_FILE + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(store, f, indent=4)
+        os.replace(tmp_path, CCCD_STORE_FILE)
+
+def encrypt_cccd(real_cccd: str):
+    """
+    Mã hóa CCCD và gửi cho backend (tính blind index, tải bản mã lên IPFS), KHÔNG ghi kho cục bộ.
+    Trả về (blind index, bản mã); người gọi tự lưu bằng remember_ciphertexts.
+    """
+    real_cccd = normalize_cccd(real_cccd)
+    ciphertext = encrypt_data(real_cccd)
+    blind_index = normalize_commitment(upload_cccd_blob(real_cccd, ciphertext))
+    return blind_index, ciphertext
+
+def commit_cccd(real_cccd: str) -> str:
+    """
+    Mã hóa CCCD, lưu bản mã vào IPFS và kho cục bộ (theo blind index do backend tính).
+    Trả về blind index để gửi lên contract. Lỗi tải lên IPFS sẽ được ném ra
+    để không ghi lên chuỗi một blind index mà máy Admin không tra được.
+    """
+    blind_index, ciphertext = encrypt_cccd(real_cccd)
+    remember_ciphertexts([(blind_index, ciphertext)])
+    return blind_index
+
+def resolve_cccd(blind_index):
+    """
+    Tìm bản mã của blind index: kho cục bộ trước, sau đó IPFS. None nếu không có.
+    Bản mã lấy từ IPFS chưa được kiểm tra - decrypt_cccd kiểm tra lại sau khi giải mã.
+    """
+    blind_index = normalize_commitment(blind_index)
+    if not blind_index:
+        return None
+
+    with _cccd_store_lock:
+        ciphertext = _load_cccd_store().get(blind_index)
+    if ciphertext is not None:
+        return ciphertext
+
+    try:
+        return fetch_cccd_blob(blind_index)
+    except Exception:
+        return None
+
+def decrypt_cccd(blind_index) -> str:
+    """Giải mã CCCD từ blind index lưu trên contract."""
+    if get_private_key() is None:
+        return "[Dữ liệu được bảo mật]" # Máy User không giải mã được, khỏi tải bản mã
+
+    blind_index = normalize_commitment(blind_index)
+    ciphertext = resolve_cccd(blind_index)
+    if ciphertext is None:
+        return "[Không tìm thấy bản mã CCCD]"
+
+    real_cccd = decrypt_data(ciphertext)
+    try:
+        expected_index = cccd_blind_index(real_cccd)
+    except BlindIndexKeyMissing:
+        return "[Thiếu khóa blind index CCCD]"
+    if expected_index != blind_index:
+        # Bản mã từ IPFS không phải của CCCD này (hoặc giải mã thất bại)
+        return "[Bản mã CCCD không khớp]"
+
+    remember_ciphertexts([(blind_index, ciphertext)])
+    return real_cccd
@@ -40,4 +40,36 @@ def upload_file_to_ipfs(file_path):
         
     except requests.exceptions.RequestException as e:
         print(f"Lỗi khi gọi backend Flask: {e}")
-        raise Exception(f"Không thể tải file lên IPFS qua backend: {e}")
\ No newline at end of file
+        raise Exception(f"Không thể tải file lên IPFS qua backend: {e}")
+
+def upload_cccd_blob(real_cccd, ciphertext):
+    """
+    Gửi CCCD và bản mã của nó cho backend Flask. Backend (máy tin cậy, giữ khóa blind index)
+    tính commitment = blind index, tải bản mã lên IPFS và ghi nhớ commitment -> CID
+    để máy khác (Admin) tra lại được bản mã từ commitment lưu trên contract.
+    Trả về commitment để gửi lên contract; máy khách không cần giữ khóa blind index.
+    """
+    try:
+        response = requests.post(
+            f"{FLASK_BACKEND_URL}/cccd",
+            json={"cccd": real_cccd, "ciphertext": ciphertext}
+        )
+        response.raise_for_status()
+        return response.json()["commitment"]
+
+    except requests.exceptions.RequestException as e:
+        print(f"Lỗi khi gọi backend Flask: {e}")
+        raise Exception(f"Không thể tải bản mã CCCD lên IPFS qua backend: {e}")
+
+def fetch_cccd_blob(commitment):
+    """Lấy bản mã CCCD theo commitment. Trả về None nếu backend không biết commitment này."""
+    try:
+        response = requests.get(f"{FLASK_BACKEND_URL}/cccd/{commitment}", timeout=20)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json()["ciphertext"]
+
+    except requests.exceptions.RequestException as e:
+        print(f"Lỗi khi gọi backend Flask: {e}")
+        raise Exception(f"Không thể tải bản mã CCCD từ backend: {e}")
@@ -0,0 +1,60 @@
+# file: permit_utils.py
+from ape import networks
+from eth_account.messages import encode_typed_data
+
+# Thời hạn của chữ ký permit, tính từ timestamp của block mới nhất
+PERMIT_VALIDITY_SECONDS = 20 * 60
+PERMIT_VERSION = "1"  # Khớp PERMIT_VERSION trong LandNFT.vy
+
+
+def build_permit_message(nft_name, chain_id, nft_address, spender, token_id, nonce, deadline):
+    """Thông điệp EIP-712 Permit(spender, tokenId, nonce, deadline) của LandNFT (EIP-4494)."""
+    return encode_typed_data(full_message={
+        "types": {
+            "EIP712Domain": [
+                {"name": "name", "type": "string"},
+                {"name": "version", "type": "string"},
+                {"name": "chainId", "type": "uint256"},
+                {"name": "verifyingContract", "type": "address"},
+            ],
+            "Permit": [
+                {"name": "spender", "type": "address"},
+                {"name": "tokenId", "type": "uint256"},
+                {"name": "nonce", "type": "uint256"},
+                {"name": "deadline", "type": "uint256"},
+            ],
+        },
+        "primaryType": "Permit",
+        "domain": {
+            "name": nft_name,
+            "version": PERMIT_VERSION,
+            "chainId": chain_id,
+            "verifyingContract": str(nft_address),
+        },
+        "message": {
+            "spender": str(spender),
+            "tokenId": int(token_id),
+            "nonce": int(nonce),
+            "deadline": int(deadline),
+        },
+    })
+
+
+def permit_deadline(validity_seconds=PERMIT_VALIDITY_SECONDS):
+    """Hạn chữ ký theo giờ của chuỗi (mạng local có thể lệch giờ máy)."""
+    return networks.provider.get_block("latest").timestamp + validity_seconds
+
+
+def sign_nft_permit(account, land_nft_contract, spender, token_id, deadline):
+    """
+    Ký permit cho `spender` (thường là Marketplace) được chuyển token_id, không gửi giao dịch.
+    Trả về chữ ký 65 byte r||s||v để truyền cho create_listing_with_permit / LandNFT.permit.
+    """
+    message = build_permit_message(
+        land_nft_contract.name(), networks.provider.chain_id, land_nft_contract.address,
+        spender, token_id, land_nft_contract.nonces(token_id), deadline
+    )
+    signature = account.sign_message(message)
+    if signature is None:
+        raise Exception("Ví từ chối ký permit")
+    return signature.encode_rsv()
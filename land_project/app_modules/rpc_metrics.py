@@ -0,0 +1,240 @@
+# file: rpc_metrics.py
+import datetime
+import json
+import sys
+import threading
+import time
+
+# Mốc (ms) của histogram độ trễ; phần tử cuối là số lời gọi vượt mốc lớn nhất
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+# Lớp giao diện dùng làm nhãn "tab" khi tự dò người gọi trên stack
+CALLER_SUFFIXES = ("Tab", "Dialog", "Window")
+METRICS_FILE = "rpc_metrics.json"
+
+
+def estimate_size(value):
+    """Ước lượng số byte ABI của tham số / kết quả (dùng được cho cả contract thật và mock)."""
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, (bool, int, float)):
+        return 32
+    if isinstance(value, dict):
+        return sum(estimate_size(v) for v in value.values())
+    if isinstance(value, (list, tuple, set)):
+        return sum(estimate_size(v) for v in value)
+    try:
+        return sum(estimate_size(v) for v in tuple(value))
+    except TypeError:
+        return len(str(value))
+
+
+def _caller_tag():
+    """Tìm tab/dialog gần nhất trên stack: (tên lớp, tên hàm đang gọi)."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        owner = frame.f_locals.get("self")
+        if owner is not None and type(owner).__name__.endswith(CALLER_SUFFIXES):
+            return type(owner).__name__, frame.f_code.co_name
+        frame = frame.f_back
+    return "-", "-"
+
+
+class RpcMetrics:
+    """
+    Thống kê lời gọi contract: số lần gọi, lỗi, histogram độ trễ, kích thước dữ liệu
+    gửi/nhận; gom theo (contract, hàm, tab, hành động). An toàn khi gọi từ nhiều thread.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats = {}
+        self.started_at = time.time()
+
+    def current_tag(self):
+        """Nhãn đặt tay bằng tag() nếu có, nếu không thì dò người gọi trên stack."""
+        tag = getattr(self._local, "tag", None)
+        return tag if tag is not None else _caller_tag()
+
+    def tag(self, tab, action):
+        """Context manager gán nhãn cho mọi lời gọi trong khối (trên thread hiện tại)."""
+        return _TagContext(self._local, (tab, action))
+
+    def record(self, contract_name, method_name, elapsed_ms, request_bytes=0, response_bytes=0,
+               error=False, tag=None, batched_calls=0):
+        if not self.enabled:
+            return
+        tab, action = tag or self.current_tag()
+        key = (contract_name, method_name, tab, action)
+
+        bucket = len(LATENCY_BUCKETS_MS)
+        for index, upper in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= upper:
+                bucket = index
+                break
+
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = {
+                    "calls": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0,
+                    "request_bytes": 0, "response_bytes": 0, "batched_calls": 0,
+                    "histogram": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+                }
+            stats["calls"] += 1
+            stats["errors"] += int(error)
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            stats["request_bytes"] += request_bytes
+            stats["response_bytes"] += response_bytes
+            stats["batched_calls"] += batched_calls
+            stats["histogram"][bucket] += 1
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+            self.started_at = time.time()
+
+    def snapshot(self):
+        """Danh sách thống kê (dict) sắp theo tổng thời gian giảm dần."""
+        with self._lock:
+            items = [(key, dict(stats, histogram=list(stats["histogram"]))) for key, stats in self._stats.items()]
+
+        entries = []
+        for (contract_name, method_name, tab, action), stats in items:
+            entries.append({
+                "contract": contract_name,
+                "method": method_name,
+                "tab": tab,
+                "action": action,
+                "avg_ms": stats["total_ms"] / stats["calls"],
+                "p95_ms": self._percentile(stats["histogram"], stats["calls"], 0.95, stats["max_ms"]),
+                **stats,
+            })
+        entries.sort(key=lambda entry: entry["total_ms"], reverse=True)
+        return entries
+
+    @staticmethod
+    def _percentile(histogram, total, fraction, max_ms):
+        """Cận trên của bucket chứa phân vị `fraction` (ước lượng từ histogram)."""
+        threshold = total * fraction
+        seen = 0
+        for index, count in enumerate(histogram):
+            seen += count
+            if seen >= threshold:
+                return LATENCY_BUCKETS_MS[index] if index < len(LATENCY_BUCKETS_MS) else max_ms
+        return max_ms
+
+    def dump_json(self, path=METRICS_FILE):
+        data = {
+            "started_at": datetime.datetime.fromtimestamp(self.started_at).isoformat(),
+            "dumped_at": datetime.datetime.now().isoformat(),
+            "latency_buckets_ms": list(LATENCY_BUCKETS_MS),
+            "entries": self.snapshot(),
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        return path
+
+
+class _TagContext:
+    def __init__(self, local, tag):
+        self._local = local
+        self._tag = tag
+        self._previous = None
+
+    def __enter__(self):
+        self._previous = getattr(self._local, "tag", None)
+        self._local.tag = self._tag
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._local.tag = self._previous
+        return False
+
+
+# Bộ thống kê dùng chung của ứng dụng (BatchReader cũng ghi vào đây)
+RPC_METRICS = RpcMetrics()
+
+
+class InstrumentedCall:
+    """Bọc một hàm của contract (ape hoặc mock), đo thời gian và kích thước mỗi lần gọi."""
+
+    def __init__(self, contract_name, method_name, method, metrics):
+        self._method = method
+        self._contract_name = contract_name
+        self._method_name = method_name
+        self._metrics = metrics
+
+    def __getattr__(self, name):
+        # encode_input, abis, contract... chuyển thẳng cho hàm gốc (BatchReader, CachedContract cần)
+        return getattr(self._method, name)
+
+    def __call__(self, *args, **kwargs):
+        if not self._metrics.enabled:
+            return self._method(*args, **kwargs)
+
+        tag = self._metrics.current_tag()
+        started = time.perf_counter()
+        result = None
+        error = False
+        try:
+            result = self._method(*args, **kwargs)
+            return result
+        except Exception:
+            error = True
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self._metrics.record(
+                self._contract_name, self._method_name, elapsed_ms,
+                request_bytes=self._request_size(args), response_bytes=estimate_size(result),
+                error=error, tag=tag,
+            )
+
+    def _request_size(self, args):
+        encode_input = getattr(self._method, "encode_input", None)
+        if encode_input is not None:
+            try:
+                return len(encode_input(*args))
+            except Exception:
+                pass
+        return estimate_size(args)
+
+
+class InstrumentedContract:
+    """
+    Proxy quanh contract (ape thật hoặc Mock*): mọi hàm gọi qua proxy được ghi vào RpcMetrics.
+
+    Cách dùng:
+        marketplace = InstrumentedContract(project.Marketplace.at(address), "Marketplace")
+        RPC_METRICS.dump_json()
+    """
+
+    def __init__(self, contract, contract_name, metrics=RPC_METRICS):
+        self._contract = contract
+        self._contract_name = contract_name
+        self._metrics = metrics
+        self._wrapped = {}
+
+    @property
+    def address(self):
+        return self._contract.address
+
+    def __getattr__(self, name):
+        if name in self._wrapped:
+            return self._wrapped[name]
+
+        attr = getattr(self._contract, name)
+        # Event của ape (có .abi) và thuộc tính thường không phải lời gọi
+        if not callable(attr) or (hasattr(attr, "abi") and not hasattr(attr, "abis")):
+            return attr
+
+        wrapped = InstrumentedCall(self._contract_name, name, attr, self._metrics)
+        self._wrapped[name] = wrapped
+        return wrapped
@@ -3,7 +3,8 @@
 
 # ===================== INTERFACE AND EVENTS =====================
 interface ILandRegistry:
-    def update_ownership(token_id: uint256, new_owner: address, new_cccd: String[512]): nonpayable
+    def update_ownership(token_id: uint256, new_owner: address, new_cccd: bytes32): nonpayable
+    def get_land_owner_cccd(_land_id: uint256) -> bytes32: view
     
 event Transfer:
     _from: indexed(address)
@@ -20,33 +21,57 @@ event ApprovalForAll:
     _operator: indexed(address)
     _approved: bool
 
-event CCCDUpdated:
-    token_id: indexed(uint256)
-    old_cccd: String[512]
-    new_cccd: String[512]
-
 # ===================== DATA STRUCTURES =====================
 
+# Chỉ dùng làm kiểu trả về của get_land_data; CCCD chỉ lưu ở LandRegistry
 struct LandData:
     token_id: uint256
-    owner_cccd: String[512]
+    owner_cccd: bytes32  # blind index HMAC-SHA256 của CCCD (bản mã lưu ngoài chuỗi)
 
 # ===================== STATE VARIABLES =====================
 
+MAX_PAGE_SIZE: constant(uint256) = 100
+
+# Bố cục slot token_info: [0..159] chủ sở hữu, [160..207] chỉ số trong owned_tokens của chủ,
+# [208..255] chỉ số trong all_tokens
+OWNER_INDEX_SHIFT: constant(uint256) = 160
+GLOBAL_INDEX_SHIFT: constant(uint256) = 208
+ADDRESS_MASK: constant(uint256) = 2**160 - 1
+INDEX_MASK: constant(uint256) = 2**48 - 1
+
+# Bố cục slot approval_info: [0..159] địa chỉ được approve, [160..255] nonce permit
+NONCE_SHIFT: constant(uint256) = 160
+
+# EIP-4494: permit (ủy quyền token bằng chữ ký EIP-712) để đăng bán chỉ cần một giao dịch
+EIP712_DOMAIN_TYPEHASH: constant(bytes32) = keccak256("EIP712Domain(string name,string version,uint256 chainId,address verifyingContract)")
+PERMIT_TYPEHASH: constant(bytes32) = keccak256("Permit(address spender,uint256 tokenId,uint256 nonce,uint256 deadline)")
+PERMIT_VERSION: constant(String[1]) = "1"
+# Chỉ nhận s ở nửa dưới của bậc đường cong để một chữ ký không có hai dạng hợp lệ
+SECP256K1_HALF_N: constant(uint256) = 57896044618658097711785492504343953926418782139537452191302581570759080747168
+
 name: public(String[50])
 symbol: public(String[10])
 
-owner_of: public(HashMap[uint256, address])
 balance_of: public(HashMap[address, uint256])
 token_uri: public(HashMap[uint256, String[128]])
 
-land_data: public(HashMap[uint256, LandData])
-
-token_approvals: HashMap[uint256, address]
+# Approve và nonce permit của token nén chung một slot. Nonce tăng mỗi lần một chữ ký được dùng
+# và mỗi lần token được chuyển (EIP-4494); _transfer vốn phải ghi slot này để xoá approve
+# nên tăng nonce không tốn thêm SSTORE (nonces() đọc phần nonce)
+approval_info: HashMap[uint256, uint256]
 operator_approvals: HashMap[address, HashMap[address, bool]]
 
 minter: public(address)
 
+# Chủ sở hữu và hai chỉ số enumerable của token nén chung một slot: mint/chuyển chỉ ghi lại
+# slot này thay vì thêm hai slot chỉ số riêng (owner_of() đọc phần địa chỉ)
+token_info: HashMap[uint256, uint256]
+
+# ERC-721 Enumerable: chỉ số đánh số từ 0 theo chuẩn, cập nhật kiểu swap-and-pop (O(1))
+all_tokens: HashMap[uint256, uint256]                       # chỉ số -> token_id
+total_supply: uint256
+owned_tokens: HashMap[address, HashMap[uint256, uint256]]   # chủ -> chỉ số -> token_id (số lượng = balance_of)
+
 # ===================== CONSTRUCTOR =====================
 
 @deploy
@@ -57,42 +82,100 @@ def __init__(_name: String[50], _symbol: String[10], _minter_address: address):
 
 # ===================== INTERNAL =====================
 
+@pure
+@internal
+def _pack_info(_owner: address, _owner_index: uint256, _global_index: uint256) -> uint256:
+    return convert(_owner, uint256) | (_owner_index << OWNER_INDEX_SHIFT) | (_global_index << GLOBAL_INDEX_SHIFT)
+
+@pure
+@internal
+def _info_owner(_info: uint256) -> address:
+    return convert(convert(_info & ADDRESS_MASK, uint160), address)
+
+@view
+@internal
+def _owner_of(_token_id: uint256) -> address:
+    return self._info_owner(self.token_info[_token_id])
+
+@view
+@internal
+def _get_approved(_token_id: uint256) -> address:
+    return convert(convert(self.approval_info[_token_id] & ADDRESS_MASK, uint160), address)
+
+@internal
+def _set_approved(_token_id: uint256, _approved: address):
+    # Giữ nguyên phần nonce
+    self.approval_info[_token_id] = (self.approval_info[_token_id] & ~ADDRESS_MASK) | convert(_approved, uint256)
+
+@internal
+def _add_token_to_owner(_owner: address, _token_id: uint256, _global_index: uint256):
+    # balance_of đồng thời là số phần tử trong owned_tokens[_owner]
+    index: uint256 = self.balance_of[_owner]
+    self.owned_tokens[_owner][index] = _token_id
+    self.balance_of[_owner] = index + 1
+    self.token_info[_token_id] = self._pack_info(_owner, index, _global_index)
+
+@internal
+def _remove_token_from_owner(_owner: address, _info: uint256):
+    # Swap-and-pop: token cuối của chủ được dời vào chỗ trống, sửa chỉ số trong slot của nó
+    index: uint256 = (_info >> OWNER_INDEX_SHIFT) & INDEX_MASK
+    last_index: uint256 = self.balance_of[_owner] - 1
+    if index != last_index:
+        last_token_id: uint256 = self.owned_tokens[_owner][last_index]
+        self.owned_tokens[_owner][index] = last_token_id
+        last_info: uint256 = self.token_info[last_token_id]
+        self.token_info[last_token_id] = (last_info & ~(INDEX_MASK << OWNER_INDEX_SHIFT)) | (index << OWNER_INDEX_SHIFT)
+
+    self.owned_tokens[_owner][last_index] = 0
+    self.balance_of[_owner] = last_index
+
 @internal
 def _burn(token_id: uint256):
-    owner: address = self.owner_of[token_id]
+    info: uint256 = self.token_info[token_id]
+    owner: address = self._info_owner(info)
     assert owner != empty(address), "Token does not exist"
     
     # Xóa hết dữ liệu liên quan
-    self.owner_of[token_id] = empty(address)
-    self.balance_of[owner] -= 1
+    self._remove_token_from_owner(owner, info)
+
+    index: uint256 = info >> GLOBAL_INDEX_SHIFT
+    last_index: uint256 = self.total_supply - 1
+    if index != last_index:
+        last_token_id: uint256 = self.all_tokens[last_index]
+        self.all_tokens[index] = last_token_id
+        last_info: uint256 = self.token_info[last_token_id]
+        self.token_info[last_token_id] = (last_info & ~(INDEX_MASK << GLOBAL_INDEX_SHIFT)) | (index << GLOBAL_INDEX_SHIFT)
+    self.all_tokens[last_index] = 0
+    self.total_supply = last_index
+
+    self.token_info[token_id] = 0
     self.token_uri[token_id] = ""
-    self.land_data[token_id] = empty(LandData)
-    self.token_approvals[token_id] = empty(address)
+    # Xoá approve, giữ nonce để permit cũ không dùng được nếu token_id được mint lại
+    self._set_approved(token_id, empty(address))
     
     log Transfer(_from=owner, _to=empty(address), _tokenId=token_id)
 
 
 @internal
 def _is_approved_or_owner(spender: address, token_id: uint256) -> bool:
-    owner: address = self.owner_of[token_id]
+    owner: address = self._owner_of(token_id)
     assert owner != empty(address), "Token does not exist"
     return (
         spender == owner or
-        self.token_approvals[token_id] == spender or
+        self._get_approved(token_id) == spender or
         self.operator_approvals[owner][spender]
     )
 
 @internal
 def _transfer(from_: address, to: address, token_id: uint256):
-    # Clear approvals
-    self.token_approvals[token_id] = empty(address)
-    
-    # Update balances
-    self.balance_of[from_] -= 1
-    self.balance_of[to] += 1
+    # Xoá approve và tăng nonce (một SSTORE): permit ký trước khi chuyển không dùng được nữa,
+    # kể cả khi token quay lại đúng người ký
+    self.approval_info[token_id] = ((self.approval_info[token_id] >> NONCE_SHIFT) + 1) << NONCE_SHIFT
     
-    # Update owner
-    self.owner_of[token_id] = to
+    # Cập nhật số dư, danh sách token của hai bên và chủ sở hữu (giữ chỉ số trong all_tokens)
+    info: uint256 = self.token_info[token_id]
+    self._remove_token_from_owner(from_, info)
+    self._add_token_to_owner(to, token_id, info >> GLOBAL_INDEX_SHIFT)
     
     log Transfer(_from=from_, _to=to, _tokenId=token_id)
 
@@ -105,19 +188,17 @@ def set_minter(_minter: address):
     self.minter = _minter
 
 @external
-def mint(to: address, token_id: uint256, owner_cccd: String[512], metadata_uri: String[128]) -> bool:
+def mint(to: address, token_id: uint256, metadata_uri: String[128]) -> bool:
     assert msg.sender == self.minter, "Only minter can mint"
-    assert self.owner_of[token_id] == empty(address), "Token ID exists"
+    assert self.token_info[token_id] == 0, "Token ID exists"
     assert to != empty(address), "Invalid recipient"
 
-    self.owner_of[token_id] = to
-    self.balance_of[to] += 1
+    index: uint256 = self.total_supply
+    self.all_tokens[index] = token_id
+    self.total_supply = index + 1
+    self._add_token_to_owner(to, token_id, index)
     self.token_uri[token_id] = metadata_uri
 
-    self.land_data[token_id] = LandData(
-        token_id=token_id,
-        owner_cccd=owner_cccd,
-    )
     log Transfer(_from=empty(address), _to=to, _tokenId=token_id)
 
     return True
@@ -129,35 +210,23 @@ def burn(token_id: uint256):
     self._burn(token_id)
 
 @external
-def transferWithCCCD(from_: address, to: address, token_id: uint256, new_cccd: String[512]):
+def transferWithCCCD(from_: address, to: address, token_id: uint256, new_cccd: bytes32):
     assert self._is_approved_or_owner(msg.sender, token_id), "Not owner or approved"
-    assert self.owner_of[token_id] == from_, "Invalid owner"
+    assert self._owner_of(token_id) == from_, "Invalid owner"
     assert to != empty(address), "Invalid recipient"
 
-    # Clear approval
-    self.token_approvals[token_id] = empty(address)
-
-    # Update balances and owner
+    # Xoá approval, cập nhật số dư / chủ sở hữu và phát Transfer (một lần)
     self._transfer(from_, to, token_id)
 
-    # Update CCCD
-    old_data: LandData = self.land_data[token_id]
-    old_cccd: String[512] = old_data.owner_cccd
-    self.land_data[token_id] = LandData(
-        token_id=token_id,
-        owner_cccd=new_cccd,
-    )
+    # CCCD chỉ lưu ở LandRegistry, registry phát CCCDUpdated
     extcall ILandRegistry(self.minter).update_ownership(token_id, to, new_cccd)
 
-    log Transfer(_from=from_, _to=to, _tokenId=token_id)
-    log CCCDUpdated(token_id=token_id, old_cccd=old_cccd, new_cccd=new_cccd)
-
 # ===================== ERC-721 STANDARD =====================
 
 @external
 def transferFrom(_from: address, _to: address, _tokenId: uint256):
     assert self._is_approved_or_owner(msg.sender, _tokenId), "Not owner or approved"
-    assert self.owner_of[_tokenId] == _from, "Invalid owner"
+    assert self._owner_of(_tokenId) == _from, "Invalid owner"
     assert _to != empty(address), "Invalid recipient"
     
     self._transfer(_from, _to, _tokenId)
@@ -165,7 +234,7 @@ def transferFrom(_from: address, _to: address, _tokenId: uint256):
 @external
 def safeTransferFrom(_from: address, _to: address, _tokenId: uint256, _data: Bytes[1024]=b""):
     assert self._is_approved_or_owner(msg.sender, _tokenId), "Not owner or approved"
-    assert self.owner_of[_tokenId] == _from, "Invalid owner"
+    assert self._owner_of(_tokenId) == _from, "Invalid owner"
     assert _to != empty(address), "Invalid recipient"
     
     self._transfer(_from, _to, _tokenId)
@@ -175,9 +244,9 @@ def safeTransferFrom(_from: address, _to: address, _tokenId: uint256, _data: Byt
 
 @external
 def approve(_to: address, _tokenId: uint256):
-    owner: address = self.owner_of[_tokenId]
+    owner: address = self._owner_of(_tokenId)
     assert msg.sender == owner or self.operator_approvals[owner][msg.sender], "Not authorized"
-    self.token_approvals[_tokenId] = _to
+    self._set_approved(_tokenId, _to)
     log Approval(_owner=owner, _approved=_to, _tokenId=_tokenId)
 
 @external
@@ -188,22 +257,126 @@ def setApprovalForAll(_operator: address, _approved: bool):
 @view
 @external
 def getApproved(_tokenId: uint256) -> address:
-    assert self.owner_of[_tokenId] != empty(address), "Token does not exist"
-    return self.token_approvals[_tokenId]
+    assert self._owner_of(_tokenId) != empty(address), "Token does not exist"
+    return self._get_approved(_tokenId)
+
+@view
+@external
+def nonces(_tokenId: uint256) -> uint256:
+    return self.approval_info[_tokenId] >> NONCE_SHIFT
 
 @view
 @external
 def isApprovedForAll(_owner: address, _operator: address) -> bool:
     return self.operator_approvals[_owner][_operator]
 
+@view
+@external
+def owner_of(_tokenId: uint256) -> address:
+    return self._owner_of(_tokenId)
+
 @view
 @external
 def ownerOf(_tokenId: uint256) -> address:
-    owner: address = self.owner_of[_tokenId]
+    owner: address = self._owner_of(_tokenId)
     assert owner != empty(address), "Token does not exist"
     return owner
 
+@view
+@external
+def get_transfer_eligibility(_tokenId: uint256, _operator: address) -> (address, bool, address):
+    # Chủ sở hữu, _operator có setApprovalForAll của chủ không, và địa chỉ được approve cho token:
+    # Marketplace kiểm tra quyền chuyển bằng một staticcall thay vì ownerOf + isApprovedForAll + getApproved.
+    # Token chưa tồn tại trả về chủ sở hữu rỗng (không revert) để bên gọi tự báo lỗi
+    owner: address = self._owner_of(_tokenId)
+    return owner, self.operator_approvals[owner][_operator], self._get_approved(_tokenId)
+
 @view
 @external
 def get_land_data(_tokenId: uint256) -> LandData:
-    return self.land_data[_tokenId]
\ No newline at end of file
+    if self._owner_of(_tokenId) == empty(address):
+        return empty(LandData)
+    # Đọc CCCD từ LandRegistry (minter) - nguồn dữ liệu duy nhất
+    return LandData(
+        token_id=_tokenId,
+        owner_cccd=staticcall ILandRegistry(self.minter).get_land_owner_cccd(_tokenId),
+    )
+
+# ===================== EIP-4494 PERMIT =====================
+
+@view
+@internal
+def _domain_separator() -> bytes32:
+    return keccak256(abi_encode(
+        EIP712_DOMAIN_TYPEHASH, keccak256(self.name), keccak256(PERMIT_VERSION), chain.id, self
+    ))
+
+@view
+@external
+def DOMAIN_SEPARATOR() -> bytes32:
+    return self._domain_separator()
+
+@external
+def permit(_spender: address, _tokenId: uint256, _deadline: uint256, _sig: Bytes[65]):
+    # Ai cũng gửi được (người bán, Marketplace hay relayer); quyền nằm ở chữ ký của chủ sở hữu / operator.
+    # Nonce tăng khi chữ ký được dùng và khi token được chuyển (_transfer)
+    assert block.timestamp <= _deadline, "Permit expired"
+    owner: address = self._owner_of(_tokenId)
+    assert owner != empty(address), "Token does not exist"
+    assert len(_sig) == 65, "Invalid permit signature"
+
+    nonce: uint256 = self.approval_info[_tokenId] >> NONCE_SHIFT
+    digest: bytes32 = keccak256(concat(
+        b"\x19\x01",
+        self._domain_separator(),
+        keccak256(abi_encode(PERMIT_TYPEHASH, _spender, _tokenId, nonce, _deadline))
+    ))
+
+    r: bytes32 = extract32(_sig, 0)
+    s: bytes32 = extract32(_sig, 32)
+    v: uint8 = convert(slice(_sig, 64, 1), uint8)
+    assert convert(s, uint256) <= SECP256K1_HALF_N, "Invalid permit signature"
+    signer: address = ecrecover(digest, v, r, s)
+    assert signer != empty(address) and (signer == owner or self.operator_approvals[owner][signer]), "Invalid permit signature"
+
+    self.approval_info[_tokenId] = ((nonce + 1) << NONCE_SHIFT) | convert(_spender, uint256)
+    log Approval(_owner=owner, _approved=_spender, _tokenId=_tokenId)
+
+# ===================== ERC-721 ENUMERABLE =====================
+
+@view
+@external
+def totalSupply() -> uint256:
+    return self.total_supply
+
+@view
+@external
+def tokenByIndex(_index: uint256) -> uint256:
+    assert _index < self.total_supply, "Index out of bounds"
+    return self.all_tokens[_index]
+
+@view
+@external
+def tokenOfOwnerByIndex(_owner: address, _index: uint256) -> uint256:
+    assert _index < self.balance_of[_owner], "Index out of bounds"
+    return self.owned_tokens[_owner][_index]
+
+@view
+@external
+def tokens_of_owner(_owner: address, _start: uint256, _count: uint256) -> (DynArray[uint256, MAX_PAGE_SIZE], uint256):
+    # Trang token của _owner bắt đầu từ chỉ số _start (đánh số từ 0)
+    # cùng với chỉ số bắt đầu của trang tiếp theo (0 nếu đã hết)
+    page: DynArray[uint256, MAX_PAGE_SIZE] = []
+    count: uint256 = min(_count, MAX_PAGE_SIZE)
+    index: uint256 = _start
+    balance: uint256 = self.balance_of[_owner]
+
+    for i: uint256 in range(MAX_PAGE_SIZE):
+        if index >= balance or i >= count:
+            break
+        page.append(self.owned_tokens[_owner][index])
+        index += 1
+
+    if index >= balance:
+        return page, 0
+    return page, index
@@ -7,12 +7,23 @@
 # =====================================================
 
 interface ILandNFT:
-    def mint(_to: address, _token_id: uint256, _owner_cccd: String[512], _metadata_uri: String[100]) -> bool: nonpayable
+    def mint(_to: address, _token_id: uint256, _metadata_uri: String[100]) -> bool: nonpayable
 
+# Event mang đủ dữ liệu để chỉ mục ngoài chuỗi dựng lại trạng thái chỉ từ log (không cần gọi view)
 event LandRegistered:
     land_id: indexed(uint256)
     owner: indexed(address)
-    owner_cccd: String[512]
+    owner_cccd: bytes32
+    land_address: String[100]
+    area: uint256
+    pdf_uri: String[100]
+    image_uri: String[100]
+
+# Bản tóm tắt cho danh sách của GUI: không trả về địa chỉ đất, CCCD và các URI
+struct LandSummary:
+    area: uint256
+    status: uint8
+    owner: address  # Địa chỉ ví đã đăng ký / chủ hiện tại
 
 event LandApproved:
     land_id: indexed(uint256)
@@ -22,6 +33,11 @@ event LandRejected:
     land_id: indexed(uint256)
     admin: indexed(address)
 
+event CCCDUpdated:
+    token_id: indexed(uint256)
+    old_cccd: bytes32
+    new_cccd: bytes32
+
 # =====================================================
 # ================== DATA STRUCTURES ==================
 # =====================================================
@@ -30,7 +46,7 @@ struct LandParcel:
     id: uint256
     land_address: String[100]
     area: uint256
-    owner_cccd: String[512]
+    owner_cccd: bytes32  # blind index HMAC-SHA256 của CCCD; bản mã lưu ở kho cục bộ / IPFS
     status: uint8  # 0: Pending, 1: Approved, 2: Rejected
     pdf_uri: String[100]
     image_uri: String[100]
@@ -39,11 +55,29 @@ struct LandParcel:
 # ================= STATE VARIABLES ===================
 # =====================================================
 
+MAX_PAGE_SIZE: constant(uint256) = 50
+MAX_PAGE_SCAN: constant(uint256) = 1000  # Số id tối đa duyệt trong một lần gọi view
+MAX_BATCH_SIZE: constant(uint256) = 100  # Số hồ sơ tối đa duyệt/từ chối trong một giao dịch
+MAX_REGISTER_BATCH: constant(uint256) = 50  # Số hồ sơ tối đa đăng ký trong một giao dịch (~22M gas)
+STATUS_ANY: constant(uint8) = 255
+
 land_parcels: public(HashMap[uint256, LandParcel])
 land_to_owner: public(HashMap[uint256, address])
-owner_to_lands: public(HashMap[address, DynArray[uint256, 1000]])  
-lands_count: public(HashMap[address, uint256]) 
-land_ids: public(HashMap[String[512], DynArray[uint256, 100]])  # ADD THIS LINE - maps CCCD to land_id 
+
+# Thửa đất theo chủ sở hữu hiện tại, vị trí đánh số từ 1 (không giới hạn số thửa mỗi chủ)
+owner_land_ids: public(HashMap[address, HashMap[uint256, uint256]])  # chủ -> vị trí -> land_id
+owner_land_position: HashMap[uint256, uint256]                        # land_id -> vị trí trong danh sách của chủ hiện tại
+lands_count: public(HashMap[address, uint256])
+
+# Thửa đất theo blind index CCCD lúc đăng ký (chỉ thêm, không xoá), vị trí đánh số từ 1
+# Blind index cố định cho mỗi CCCD nên "mọi thửa của một công dân" là một lần tra HashMap
+cccd_land_ids: public(HashMap[bytes32, HashMap[uint256, uint256]])   # CCCD -> vị trí -> land_id
+cccd_lands_count: public(HashMap[bytes32, uint256])
+
+# Hàng đợi hồ sơ chờ duyệt, vị trí đánh số từ 1
+pending_land_ids: public(HashMap[uint256, uint256])     # vị trí -> land_id
+pending_position: HashMap[uint256, uint256]             # land_id -> vị trí (0 = không chờ duyệt)
+pending_count: public(uint256)
 
 next_land_id: public(uint256)
 admin: public(address)
@@ -79,15 +113,67 @@ def set_land_nft(_land_nft_address: address):
     self.land_nft = _land_nft_address
 
 
+# =====================================================
+# =================== PENDING QUEUE ===================
+# =====================================================
+
+@internal
+def _enqueue_pending(_land_id: uint256):
+    position: uint256 = self.pending_count + 1
+    self.pending_land_ids[position] = _land_id
+    self.pending_position[_land_id] = position
+    self.pending_count = position
+
+@internal
+def _dequeue_pending(_land_id: uint256):
+    # Swap-and-pop: đưa phần tử cuối vào vị trí bị xoá
+    position: uint256 = self.pending_position[_land_id]
+    last_position: uint256 = self.pending_count
+    if position != last_position:
+        last_land_id: uint256 = self.pending_land_ids[last_position]
+        self.pending_land_ids[position] = last_land_id
+        self.pending_position[last_land_id] = position
+
+    self.pending_land_ids[last_position] = 0
+    self.pending_position[_land_id] = 0
+    self.pending_count = last_position - 1
+
+
+# =====================================================
+# ================== OWNER LAND LIST ==================
+# =====================================================
+
+@internal
+def _add_land_to_owner(_owner: address, _land_id: uint256):
+    position: uint256 = self.lands_count[_owner] + 1
+    self.owner_land_ids[_owner][position] = _land_id
+    self.owner_land_position[_land_id] = position
+    self.lands_count[_owner] = position
+
+@internal
+def _remove_land_from_owner(_owner: address, _land_id: uint256):
+    # Swap-and-pop theo vị trí đã lưu, không phải duyệt cả danh sách
+    position: uint256 = self.owner_land_position[_land_id]
+    last_position: uint256 = self.lands_count[_owner]
+    if position != last_position:
+        last_land_id: uint256 = self.owner_land_ids[_owner][last_position]
+        self.owner_land_ids[_owner][position] = last_land_id
+        self.owner_land_position[last_land_id] = position
+
+    self.owner_land_ids[_owner][last_position] = 0
+    self.owner_land_position[_land_id] = 0
+    self.lands_count[_owner] = last_position - 1
+
+
 # =====================================================
 # ====================== CORE LOGIC ===================
 # =====================================================
 
-@external
-def register_land(
+@internal
+def _register_land(
     _land_address: String[100],
     _area: uint256,
-    _owner_cccd: String[512],
+    _owner_cccd: bytes32,
     _pdf_uri: String[100],
     _image_uri: String[100]
 ):
@@ -97,7 +183,7 @@ def register_land(
     # Fix string length checks
     assert len(_land_address) > 0, "Land address cannot be empty"
     assert _area > 0, "Area must be greater than 0"
-    assert len(_owner_cccd) > 0, "Owner CCCD cannot be empty"
+    assert _owner_cccd != empty(bytes32), "Owner CCCD cannot be empty"
     assert len(_pdf_uri) > 0, "PDF URI cannot be empty"
     assert len(_image_uri) > 0, "Image URI cannot be empty"
     
@@ -112,114 +198,123 @@ def register_land(
     )
 
     self.land_to_owner[land_id] = msg.sender
-    self.land_ids[_owner_cccd].append(land_id)  # Store the mapping
-
-    # Fix array handling - initialize if needed
-    if self.lands_count[msg.sender] == 0:
-        self.owner_to_lands[msg.sender] = [land_id]
-    else:
-        self.owner_to_lands[msg.sender].append(land_id)
-    self.lands_count[msg.sender] += 1
+    cccd_position: uint256 = self.cccd_lands_count[_owner_cccd] + 1
+    self.cccd_land_ids[_owner_cccd][cccd_position] = land_id
+    self.cccd_lands_count[_owner_cccd] = cccd_position
+
+    self._add_land_to_owner(msg.sender, land_id)
     
     # owner_lands_count: uint256 = self.lands_count[msg.sender]
     # assert owner_lands_count < 100, "Maximum land parcels per owner reached"
     # self.owner_to_lands[msg.sender][owner_lands_count] = land_id
     # self.lands_count[msg.sender] += 1
     
+    self._enqueue_pending(land_id)
     self.next_land_id += 1
     
-    log LandRegistered(land_id=land_id, owner=msg.sender, owner_cccd=_owner_cccd)
+    log LandRegistered(
+        land_id=land_id,
+        owner=msg.sender,
+        owner_cccd=_owner_cccd,
+        land_address=_land_address,
+        area=_area,
+        pdf_uri=_pdf_uri,
+        image_uri=_image_uri
+    )
 
 @external
-def approve_land(_land_id: uint256, _metadata_uri: String[100]):
-    self._only_admin()
-    
-    parcel: LandParcel = self.land_parcels[_land_id]
-    assert parcel.id != 0, "Land parcel does not exist"
-    assert parcel.status == 0, "Land is not in pending state"
-
-    # Update status to Approved
-    updated_parcel: LandParcel = LandParcel(
-        id=parcel.id,
-        land_address=parcel.land_address,
-        area=parcel.area,
-        owner_cccd=parcel.owner_cccd,
-        status=1,  # 1 = Approved
-        pdf_uri=parcel.pdf_uri,
-        image_uri=parcel.image_uri
-    )
-    self.land_parcels[_land_id] = updated_parcel
+def register_land(
+    _land_address: String[100],
+    _area: uint256,
+    _owner_cccd: bytes32,
+    _pdf_uri: String[100],
+    _image_uri: String[100]
+):
+    self._register_land(_land_address, _area, _owner_cccd, _pdf_uri, _image_uri)
+
+@external
+def register_lands(
+    _land_addresses: DynArray[String[100], MAX_REGISTER_BATCH],
+    _areas: DynArray[uint256, MAX_REGISTER_BATCH],
+    _owner_cccds: DynArray[bytes32, MAX_REGISTER_BATCH],
+    _pdf_uris: DynArray[String[100], MAX_REGISTER_BATCH],
+    _image_uris: DynArray[String[100], MAX_REGISTER_BATCH]
+):
+    # Đăng ký hàng loạt (chuyển hồ sơ địa chính cũ); id được cấp liên tiếp theo thứ tự mảng
+    count: uint256 = len(_land_addresses)
+    assert len(_areas) == count and len(_owner_cccds) == count, "Length mismatch"
+    assert len(_pdf_uris) == count and len(_image_uris) == count, "Length mismatch"
+
+    for i: uint256 in range(count, bound=MAX_REGISTER_BATCH):
+        self._register_land(_land_addresses[i], _areas[i], _owner_cccds[i], _pdf_uris[i], _image_uris[i])
+
+@internal
+def _approve_land(_land_id: uint256, _metadata_uri: String[100]):
+    # Chỉ đọc/ghi đúng trường cần thiết, không sao chép cả struct (chuỗi dài chiếm nhiều slot)
+    assert self.land_parcels[_land_id].id != 0, "Land parcel does not exist"
+    assert self.land_parcels[_land_id].status == 0, "Land is not in pending state"
+
+    self.land_parcels[_land_id].status = 1  # 1 = Approved
+    self._dequeue_pending(_land_id)
     
     owner_address: address = self.land_to_owner[_land_id]
-    owner_cccd: String[512] = parcel.owner_cccd  
     
-    mint_success: bool = extcall ILandNFT(self.land_nft).mint(owner_address, _land_id, owner_cccd, _metadata_uri)
+    mint_success: bool = extcall ILandNFT(self.land_nft).mint(owner_address, _land_id, _metadata_uri)
     assert mint_success, "NFT minting failed"
     
     log LandApproved(land_id=_land_id, admin=msg.sender)
 
+@internal
+def _reject_land(_land_id: uint256):
+    assert self.land_parcels[_land_id].id != 0, "Land parcel does not exist"
+    assert self.land_parcels[_land_id].status == 0, "Land is not in pending state"
+    
+    self.land_parcels[_land_id].status = 2  # 2 = Rejected
+    self._dequeue_pending(_land_id)
+    
+    log LandRejected(land_id=_land_id, admin=msg.sender)
+
+@external
+def approve_land(_land_id: uint256, _metadata_uri: String[100]):
+    self._only_admin()
+    self._approve_land(_land_id, _metadata_uri)
 
 @external
 def reject_land(_land_id: uint256):
     self._only_admin()
-    
-    parcel: LandParcel = self.land_parcels[_land_id]
-    assert parcel.id != 0, "Land parcel does not exist"
-    assert parcel.status == 0, "Land is not in pending state"
-    
-    updated_parcel: LandParcel = LandParcel(
-        id=parcel.id,
-        land_address=parcel.land_address,
-        area=parcel.area,
-        owner_cccd=parcel.owner_cccd,
-        status=2,  # 2 = Rejected
-        pdf_uri=parcel.pdf_uri,
-        image_uri=parcel.image_uri
-    )
-    self.land_parcels[_land_id] = updated_parcel
-    
-    log LandRejected(land_id=_land_id, admin=msg.sender)
+    self._reject_land(_land_id)
 
 @external
-def update_ownership(token_id: uint256, new_owner: address, new_cccd: String[512]):
+def approve_lands(_land_ids: DynArray[uint256, MAX_BATCH_SIZE], _metadata_uris: DynArray[String[100], MAX_BATCH_SIZE]):
+    # Duyệt cả lô; một hồ sơ không hợp lệ thì cả lô bị revert
+    self._only_admin()
+    assert len(_land_ids) == len(_metadata_uris), "Length mismatch"
+
+    for i: uint256 in range(len(_land_ids), bound=MAX_BATCH_SIZE):
+        self._approve_land(_land_ids[i], _metadata_uris[i])
+
+@external
+def reject_lands(_land_ids: DynArray[uint256, MAX_BATCH_SIZE]):
+    self._only_admin()
+
+    for land_id: uint256 in _land_ids:
+        self._reject_land(land_id)
+
+@external
+def update_ownership(token_id: uint256, new_owner: address, new_cccd: bytes32):
     assert msg.sender == self.land_nft, "Only LandNFT can call this"
     
     old_owner: address = self.land_to_owner[token_id]
     
-    old_list_len: uint256 = len(self.owner_to_lands[old_owner])
-    for i: uint256 in range(1000): 
-        if i >= old_list_len:
-            break
-            
-        if self.owner_to_lands[old_owner][i] == token_id:
-            last_index: uint256 = old_list_len - 1
-            if i != last_index:
-                self.owner_to_lands[old_owner][i] = self.owner_to_lands[old_owner][last_index]
-            
-            self.owner_to_lands[old_owner].pop()
-            
-            self.lands_count[old_owner] -= 1
-            break 
-
-    if self.lands_count[new_owner] == 0:
-        self.owner_to_lands[new_owner] = [token_id]
-    else:
-        self.owner_to_lands[new_owner].append(token_id)
-    self.lands_count[new_owner] += 1
+    self._remove_land_from_owner(old_owner, token_id)
+    self._add_land_to_owner(new_owner, token_id)
     
     self.land_to_owner[token_id] = new_owner
     
-    parcel: LandParcel = self.land_parcels[token_id]
-    updated_parcel: LandParcel = LandParcel(
-        id=parcel.id,
-        land_address=parcel.land_address,
-        area=parcel.area,
-        owner_cccd=new_cccd, # Cập nhật CCCD mới
-        status=parcel.status,
-        pdf_uri=parcel.pdf_uri,
-        image_uri=parcel.image_uri
-    )
-    self.land_parcels[token_id] = updated_parcel
+    # Registry là nơi duy nhất lưu CCCD của chủ sở hữu (LandNFT đọc qua get_land_owner_cccd)
+    old_cccd: bytes32 = self.land_parcels[token_id].owner_cccd
+    self.land_parcels[token_id].owner_cccd = new_cccd # Cập nhật CCCD mới
+    log CCCDUpdated(token_id=token_id, old_cccd=old_cccd, new_cccd=new_cccd)
 # =====================================================
 # ===================== VIEWERS =======================
 # =====================================================
@@ -229,10 +324,67 @@ def update_ownership(token_id: uint256, new_owner: address, new_cccd: String[512
 def get_land(_land_id: uint256) -> LandParcel:
     return self.land_parcels[_land_id]
 
+@view
+@internal
+def _get_land_summary(_land_id: uint256) -> LandSummary:
+    return LandSummary(
+        area=self.land_parcels[_land_id].area,
+        status=self.land_parcels[_land_id].status,
+        owner=self.land_to_owner[_land_id],
+    )
+
+@view
+@external
+def get_land_summary(_land_id: uint256) -> LandSummary:
+    return self._get_land_summary(_land_id)
+
+@view
+@external
+def get_land_summaries(_land_ids: DynArray[uint256, MAX_BATCH_SIZE]) -> DynArray[LandSummary, MAX_BATCH_SIZE]:
+    # Tóm tắt của nhiều thửa đất trong một lần gọi, cùng thứ tự với _land_ids
+    summaries: DynArray[LandSummary, MAX_BATCH_SIZE] = []
+    for land_id: uint256 in _land_ids:
+        summaries.append(self._get_land_summary(land_id))
+    return summaries
+
 @view
 @external
-def get_lands_by_owner(_owner: address) -> DynArray[uint256, 1000]:
-    return self.owner_to_lands[_owner]
+def get_lands_by_owner(_start: uint256, _count: uint256, _owner: address) -> (DynArray[LandParcel, MAX_PAGE_SIZE], uint256):
+    # Trang thửa đất của _owner bắt đầu từ vị trí _start (đánh số từ 1)
+    # cùng với vị trí bắt đầu của trang tiếp theo (0 nếu đã hết)
+    page: DynArray[LandParcel, MAX_PAGE_SIZE] = []
+    count: uint256 = min(_count, MAX_PAGE_SIZE)
+    position: uint256 = max(_start, 1)
+    last_position: uint256 = self.lands_count[_owner]
+
+    for i: uint256 in range(MAX_PAGE_SIZE):
+        if position > last_position or i >= count:
+            break
+        page.append(self.land_parcels[self.owner_land_ids[_owner][position]])
+        position += 1
+
+    if position > last_position:
+        return page, 0
+    return page, position
+
+@view
+@external
+def get_lands_by_cccd(_start: uint256, _count: uint256, _cccd: bytes32) -> (DynArray[LandParcel, MAX_PAGE_SIZE], uint256):
+    # Trang thửa đất đã đăng ký bằng _cccd, phân trang như get_lands_by_owner
+    page: DynArray[LandParcel, MAX_PAGE_SIZE] = []
+    count: uint256 = min(_count, MAX_PAGE_SIZE)
+    position: uint256 = max(_start, 1)
+    last_position: uint256 = self.cccd_lands_count[_cccd]
+
+    for i: uint256 in range(MAX_PAGE_SIZE):
+        if position > last_position or i >= count:
+            break
+        page.append(self.land_parcels[self.cccd_land_ids[_cccd][position]])
+        position += 1
+
+    if position > last_position:
+        return page, 0
+    return page, position
 
 @view
 @external
@@ -244,6 +396,11 @@ def get_lands_count_by_owner(_owner: address) -> uint256:
 def get_land_owner(_land_id: uint256) -> address:
     return self.land_to_owner[_land_id]
 
+@view
+@external
+def get_land_owner_cccd(_land_id: uint256) -> bytes32:
+    return self.land_parcels[_land_id].owner_cccd
+
 @view
 @external
 def get_land_status(_land_id: uint256) -> uint8:
@@ -262,4 +419,46 @@ def is_land_pending(_land_id: uint256) -> bool:
 @view
 @external
 def is_land_rejected(_land_id: uint256) -> bool:
-    return self.land_parcels[_land_id].status == 2
\ No newline at end of file
+    return self.land_parcels[_land_id].status == 2
+
+@view
+@external
+def get_lands(_start: uint256, _count: uint256, _status: uint8) -> (DynArray[LandParcel, MAX_PAGE_SIZE], uint256):
+    # Trả về tối đa _count thửa đất có id >= _start và status == _status (STATUS_ANY = mọi trạng thái)
+    # cùng với id bắt đầu của trang tiếp theo (0 nếu đã hết)
+    page: DynArray[LandParcel, MAX_PAGE_SIZE] = []
+    count: uint256 = min(_count, MAX_PAGE_SIZE)
+    land_id: uint256 = max(_start, 1)
+    end_id: uint256 = self.next_land_id
+
+    for i: uint256 in range(MAX_PAGE_SCAN):
+        if land_id >= end_id or len(page) >= count:
+            break
+        # Chỉ đọc slot status trước, đọc cả struct khi khớp
+        if _status == STATUS_ANY or self.land_parcels[land_id].status == _status:
+            page.append(self.land_parcels[land_id])
+        land_id += 1
+
+    if land_id >= end_id:
+        return page, 0
+    return page, land_id
+
+@view
+@external
+def get_pending(_start: uint256, _count: uint256) -> (DynArray[LandParcel, MAX_PAGE_SIZE], uint256):
+    # Trang hồ sơ chờ duyệt bắt đầu từ vị trí _start (đánh số từ 1) trong hàng đợi
+    # cùng với vị trí bắt đầu của trang tiếp theo (0 nếu đã hết)
+    page: DynArray[LandParcel, MAX_PAGE_SIZE] = []
+    count: uint256 = min(_count, MAX_PAGE_SIZE)
+    position: uint256 = max(_start, 1)
+    last_position: uint256 = self.pending_count
+
+    for i: uint256 in range(MAX_PAGE_SIZE):
+        if position > last_position or i >= count:
+            break
+        page.append(self.land_parcels[self.pending_land_ids[position]])
+        position += 1
+
+    if position > last_position:
+        return page, 0
+    return page, position
@@ -2,36 +2,67 @@
 # SPDX-License-Identifier: MIT
 # @title Marketplace
 
-# Bo sung cac ham kiem tra uy quyen theo chuan ERC-721
+# Kiem tra uy quyen chuyen NFT gom trong get_transfer_eligibility (mot staticcall)
 interface ILandNFT:
     def ownerOf(_token_id: uint256) -> address: view
-    def isApprovedForAll(_owner: address, _operator: address) -> bool: view
-    def getApproved(_token_id: uint256) -> address: view
+    def get_transfer_eligibility(_token_id: uint256, _operator: address) -> (address, bool, address): view
+    def permit(_spender: address, _token_id: uint256, _deadline: uint256, _sig: Bytes[65]): nonpayable
     def transferFrom(_from: address, _to: address, _token_id: uint256): nonpayable
-    def transferWithCCCD(_from: address, _to: address, _token_id: uint256, _new_cccd: String[512]): nonpayable
+    def transferWithCCCD(_from: address, _to: address, _token_id: uint256, _new_cccd: bytes32): nonpayable
 
+# Event mang du du lieu de chi muc ngoai chuoi dung lai listing/giao dich chi tu log;
+# CCCD nguoi ban/nguoi mua chi phat mot lan (luc tao), cac event sau chi mang id
 event ListingCreated:
     listing_id: indexed(uint256)
-    token_id: uint256
-    seller_cccd: String[512]
+    token_id: indexed(uint256)
+    seller: indexed(address)
+    seller_cccd: bytes32
     price: uint256
+    created_at: uint256
+
+event ListingCancelled:
+    listing_id: indexed(uint256)
+    token_id: indexed(uint256)
 
 event TransactionInitiated:
     tx_id: indexed(uint256)
-    listing_id: uint256
-    buyer_cccd: String[512]
+    listing_id: indexed(uint256)
+    buyer: indexed(address)
+    buyer_cccd: bytes32
     amount: uint256
+    created_at: uint256
 
 event TransactionApproved:
     tx_id: indexed(uint256)
-    buyer_cccd: String[512]
-    seller_cccd: String[512]
+    listing_id: indexed(uint256)
+    token_id: indexed(uint256)
     amount: uint256
 
 event TransactionRejected:
     tx_id: indexed(uint256)
+    listing_id: indexed(uint256)
     reason: String[64]
 
+event TransactionCancelled:
+    tx_id: indexed(uint256)
+    listing_id: indexed(uint256)
+    refund: uint256
+    penalty: uint256
+
+MAX_PAGE_SIZE: constant(uint256) = 50
+MAX_PAGE_SCAN: constant(uint256) = 1000  # So id toi da duyet trong mot lan goi view
+STATUS_ANY: constant(uint8) = 255
+MAX_BATCH_SIZE: constant(uint256) = 100  # So giao dich toi da duyet/tu choi trong mot lan goi
+
+# Bo cuc slot "meta" nen: [0..159] dia chi, [160..167] status, [168..231] created_at (uint64)
+STATUS_SHIFT: constant(uint256) = 160
+CREATED_AT_SHIFT: constant(uint256) = 168
+ADDRESS_MASK: constant(uint256) = 2**160 - 1
+STATUS_CLEAR_MASK: constant(uint256) = max_value(uint256) ^ (255 << 160)
+# Slot "listing_amount" cua giao dich: [0..127] amount, [128..255] listing_id
+LISTING_ID_SHIFT: constant(uint256) = 128
+AMOUNT_MASK: constant(uint256) = 2**128 - 1
+
 land_nft: public(address)
 admin: public(address)
 
@@ -44,26 +75,61 @@ next_tx_id: public(uint256)
 struct Listing:
     listing_id: uint256
     token_id: uint256
-    seller_cccd: String[512]
+    seller_cccd: bytes32  # blind index HMAC-SHA256 cua CCCD, ban ma luu ngoai chuoi
     seller: address
     price: uint256
-    status: uint8  # 0: Active, 1: InTransaction, 2: Completed
+    status: uint8  # 0: Active, 1: InTransaction, 2: Completed, 3: Cancelled
     created_at: uint256
 
 struct Transaction:
     tx_id: uint256
     listing_id: uint256
-    buyer_cccd: String[512]
+    buyer_cccd: bytes32  # blind index HMAC-SHA256 cua CCCD, ban ma luu ngoai chuoi
     buyer_address: address
     amount: uint256
     status: uint8  # 0: Pending, 1: Approved, 2: Rejected, 3: Cancelled
     created_at: uint256
 
-listings: public(HashMap[uint256, Listing])
-transactions: public(HashMap[uint256, Transaction])
+# Ban tom tat cho bang/luoi cua GUI: chi doc 3 slot, khong tra ve CCCD va created_at
+struct ListingSummary:
+    token_id: uint256
+    seller: address  # Dia chi 0 = listing chua tao
+    price: uint256
+    status: uint8
+
+# Vyper cap moi thanh vien struct mot slot rieng nen luu tru duoi dang nen;
+# listings()/transactions()/get_listing()/get_transaction() van tra ve Listing/Transaction nhu cu
+struct PackedListing:
+    token_id: uint256
+    seller_cccd: bytes32
+    meta: uint256   # seller | status | created_at
+    price: uint256  # <= max_value(uint128) (kiem tra trong create_listing)
+
+struct PackedTransaction:
+    buyer_cccd: bytes32
+    meta: uint256            # buyer_address | status | created_at
+    listing_amount: uint256  # listing_id | amount
+
+packed_listings: HashMap[uint256, PackedListing]
+packed_transactions: HashMap[uint256, PackedTransaction]
 escrow_balances: public(HashMap[address, uint256]) 
 collected_fees: public(uint256) 
 
+# Tap cac listing dang mo ban hoac dang giao dich (status 0/1), vi tri danh so tu 1
+active_listing_ids: public(HashMap[uint256, uint256])     # vi tri -> listing_id
+active_listing_position: HashMap[uint256, uint256]         # listing_id -> vi tri (0 = khong co trong tap)
+active_listings_count: public(uint256)
+token_to_listing: public(HashMap[uint256, uint256])        # token_id -> listing_id dang hoat dong (0 = khong ban)
+
+# Chi muc theo dia chi / listing de tra cuu lich su ma khong phai duyet toan bo.
+# Vi tri danh so tu 1, chi them khong xoa, khong gioi han so phan tu (doc qua view phan trang)
+buyer_tx_ids: public(HashMap[address, HashMap[uint256, uint256]])        # buyer -> vi tri -> tx_id
+buyer_txs_count: public(HashMap[address, uint256])
+seller_listing_ids: public(HashMap[address, HashMap[uint256, uint256]])  # seller -> vi tri -> listing_id
+seller_listings_count: public(HashMap[address, uint256])
+listing_tx_ids: public(HashMap[uint256, HashMap[uint256, uint256]])      # listing_id -> vi tri -> tx_id
+listing_txs_count: public(HashMap[uint256, uint256])
+
 @deploy
 def __init__(_land_nft: address, _listing_fee: uint256, _cancel_penalty: uint256):
     self.land_nft = _land_nft
@@ -73,91 +139,243 @@ def __init__(_land_nft: address, _listing_fee: uint256, _cancel_penalty: uint256
     self.next_listing_id = 1
     self.next_tx_id = 1
 
+@pure
+@internal
+def _pack_meta(_account: address, _status: uint8, _created_at: uint256) -> uint256:
+    return convert(_account, uint256) | (convert(_status, uint256) << STATUS_SHIFT) | (convert(convert(_created_at, uint64), uint256) << CREATED_AT_SHIFT)
+
+@pure
+@internal
+def _meta_account(_meta: uint256) -> address:
+    return convert(convert(_meta & ADDRESS_MASK, uint160), address)
+
+@pure
+@internal
+def _meta_status(_meta: uint256) -> uint8:
+    return convert((_meta >> STATUS_SHIFT) & 255, uint8)
+
+@pure
+@internal
+def _meta_created_at(_meta: uint256) -> uint256:
+    return _meta >> CREATED_AT_SHIFT
+
+@pure
+@internal
+def _with_status(_meta: uint256, _status: uint8) -> uint256:
+    return (_meta & STATUS_CLEAR_MASK) | (convert(_status, uint256) << STATUS_SHIFT)
+
+@view
+@internal
+def _listing_status(_listing_id: uint256) -> uint8:
+    return self._meta_status(self.packed_listings[_listing_id].meta)
+
+@internal
+def _set_listing_status(_listing_id: uint256, _status: uint8):
+    # Chi doc/ghi mot slot
+    self.packed_listings[_listing_id].meta = self._with_status(self.packed_listings[_listing_id].meta, _status)
+
+@internal
+def _set_transaction_status(_tx_id: uint256, _status: uint8):
+    self.packed_transactions[_tx_id].meta = self._with_status(self.packed_transactions[_tx_id].meta, _status)
+
+@view
+@internal
+def _get_listing(_listing_id: uint256) -> Listing:
+    packed: PackedListing = self.packed_listings[_listing_id]
+    if packed.meta == 0:  # Chua tao (seller khong bao gio la dia chi 0)
+        return empty(Listing)
+    return Listing(
+        listing_id=_listing_id,
+        token_id=packed.token_id,
+        seller_cccd=packed.seller_cccd,
+        seller=self._meta_account(packed.meta),
+        price=packed.price,
+        status=self._meta_status(packed.meta),
+        created_at=self._meta_created_at(packed.meta)
+    )
+
+@view
+@internal
+def _get_transaction(_tx_id: uint256) -> Transaction:
+    packed: PackedTransaction = self.packed_transactions[_tx_id]
+    if packed.meta == 0:
+        return empty(Transaction)
+    return Transaction(
+        tx_id=_tx_id,
+        listing_id=packed.listing_amount >> LISTING_ID_SHIFT,
+        buyer_cccd=packed.buyer_cccd,
+        buyer_address=self._meta_account(packed.meta),
+        amount=packed.listing_amount & AMOUNT_MASK,
+        status=self._meta_status(packed.meta),
+        created_at=self._meta_created_at(packed.meta)
+    )
+
+@view
+@internal
+def _get_listing_summary(_listing_id: uint256) -> ListingSummary:
+    # Doc tung truong de bo qua slot seller_cccd
+    meta: uint256 = self.packed_listings[_listing_id].meta
+    return ListingSummary(
+        token_id=self.packed_listings[_listing_id].token_id,
+        seller=self._meta_account(meta),
+        price=self.packed_listings[_listing_id].price,
+        status=self._meta_status(meta)
+    )
+
+@internal
+def _add_active_listing(_listing_id: uint256, _token_id: uint256):
+    position: uint256 = self.active_listings_count + 1
+    self.active_listing_ids[position] = _listing_id
+    self.active_listing_position[_listing_id] = position
+    self.active_listings_count = position
+    self.token_to_listing[_token_id] = _listing_id
+
+@internal
+def _remove_active_listing(_listing_id: uint256, _token_id: uint256):
+    # Swap-and-pop: dua phan tu cuoi vao vi tri bi xoa
+    position: uint256 = self.active_listing_position[_listing_id]
+    last_position: uint256 = self.active_listings_count
+    if position != last_position:
+        last_listing_id: uint256 = self.active_listing_ids[last_position]
+        self.active_listing_ids[position] = last_listing_id
+        self.active_listing_position[last_listing_id] = position
+
+    self.active_listing_ids[last_position] = 0
+    self.active_listing_position[_listing_id] = 0
+    self.active_listings_count = last_position - 1
+    self.token_to_listing[_token_id] = 0
+
+@internal
+def _cancel_listing(_listing_id: uint256, _token_id: uint256):
+    self._set_listing_status(_listing_id, 3)  # Cancelled
+    self._remove_active_listing(_listing_id, _token_id)
+    log ListingCancelled(listing_id=_listing_id, token_id=_token_id)
+
 @payable
-@external
-def create_listing(_token_id: uint256, _seller_cccd: String[512], _price: uint256):
+@internal
+def _create_listing(_token_id: uint256, _seller_cccd: bytes32, _price: uint256, _deadline: uint256, _permit_sig: Bytes[65]):
     assert msg.value >= self.listing_fee, "Listing fee required"
+    assert _price <= convert(max_value(uint128), uint256), "Price too large"
     
     # Hoan lai phan tien thua
     if msg.value > self.listing_fee:
         send(msg.sender, msg.value - self.listing_fee)
 
-    nft_owner: address = staticcall ILandNFT(self.land_nft).ownerOf(_token_id)
+    # Chu so huu + uy quyen toan bo (setApprovalForAll) + uy quyen cu the (approve) trong mot staticcall
+    nft_owner: address = empty(address)
+    is_approved_all: bool = False
+    approved_address: address = empty(address)
+    nft_owner, is_approved_all, approved_address = staticcall ILandNFT(self.land_nft).get_transfer_eligibility(_token_id, self)
     assert nft_owner != empty(address), "Token does not exist"
     assert nft_owner == msg.sender, "Not NFT owner"
-    # BO SUNG QUAN TRONG: Kiem tra uy quyen (Approval)
-    # Kiem tra uy quyen toan bo (setApprovalForAll)
-    is_approved_all: bool = staticcall ILandNFT(self.land_nft).isApprovedForAll(msg.sender, self)
-    # Kiem tra uy quyen cu the (approve)
-    approved_address: address = staticcall ILandNFT(self.land_nft).getApproved(_token_id)
+
+    # Co chu ky permit va chua duoc uy quyen: tu approve cho Marketplace trong cung giao dich.
+    # Da co uy quyen (vi du permit da bi nguoi khac gui truoc) thi bo qua chu ky
+    if len(_permit_sig) > 0 and not (is_approved_all or approved_address == self):
+        extcall ILandNFT(self.land_nft).permit(self, _token_id, _deadline, _permit_sig)
+        approved_address = self
 
     assert is_approved_all or approved_address == self, "Marketplace not approved to transfer NFT"
+    existing_listing: uint256 = self.token_to_listing[_token_id]
+    if existing_listing != 0:
+        # Listing cu cua chu truoc (token da chuyen ngoai san) van dang mo ban: tu huy de chu moi dang ban
+        existing_meta: uint256 = self.packed_listings[existing_listing].meta
+        assert self._meta_account(existing_meta) != msg.sender and self._meta_status(existing_meta) == 0, "Token already listed"
+        self._cancel_listing(existing_listing, _token_id)
 
     # Tiep tuc tao Listing
     listing_id: uint256 = self.next_listing_id
     self.next_listing_id += 1
 
-    self.listings[listing_id] = Listing(
-        listing_id=listing_id,
+    self.packed_listings[listing_id] = PackedListing(
         token_id=_token_id,
         seller_cccd=_seller_cccd,
-        seller=msg.sender,
-        price=_price,
-        status=0,  # Active
-        created_at=block.timestamp
+        meta=self._pack_meta(msg.sender, 0, block.timestamp),  # Active
+        price=_price
     )
+    self._add_active_listing(listing_id, _token_id)
+    seller_position: uint256 = self.seller_listings_count[msg.sender] + 1
+    self.seller_listing_ids[msg.sender][seller_position] = listing_id
+    self.seller_listings_count[msg.sender] = seller_position
 
     self.collected_fees += self.listing_fee
 
     log ListingCreated(
         listing_id=listing_id,
         token_id=_token_id,
+        seller=msg.sender,
         seller_cccd=_seller_cccd,
-        price=_price
+        price=_price,
+        created_at=block.timestamp
     )
 
 @payable
 @external
-def initiate_transaction(_listing_id: uint256, _buyer_cccd: String[512]):
-    listing: Listing = self.listings[_listing_id]
-    assert listing.status == 0, "Listing not active"
-    assert msg.value == listing.price, "Incorrect deposit amount"
+def create_listing(_token_id: uint256, _seller_cccd: bytes32, _price: uint256):
+    self._create_listing(_token_id, _seller_cccd, _price, 0, b"")
+
+@payable
+@external
+def create_listing_with_permit(_token_id: uint256, _seller_cccd: bytes32, _price: uint256, _deadline: uint256, _permit_sig: Bytes[65]):
+    # Chu ky EIP-4494 cua nguoi ban cho spender = Marketplace: uy quyen va dang ban trong mot giao dich
+    assert len(_permit_sig) > 0, "Permit signature required"
+    self._create_listing(_token_id, _seller_cccd, _price, _deadline, _permit_sig)
+
+@external
+def cancel_listing(_listing_id: uint256):
+    # Chi huy duoc listing dang mo ban (khong co giao dich dang cho, tranh ket tien ky quy)
+    meta: uint256 = self.packed_listings[_listing_id].meta
+    assert meta != 0 and self._meta_status(meta) == 0, "Listing not active"
+    assert msg.sender == self._meta_account(meta) or msg.sender == self.admin, "Not seller or admin"
+    self._cancel_listing(_listing_id, self.packed_listings[_listing_id].token_id)
+
+@payable
+@external
+def initiate_transaction(_listing_id: uint256, _buyer_cccd: bytes32):
+    listing_meta: uint256 = self.packed_listings[_listing_id].meta
+    assert listing_meta != 0 and self._meta_status(listing_meta) == 0, "Listing not active"
+    assert msg.value == self.packed_listings[_listing_id].price, "Incorrect deposit amount"
 
     tx_id: uint256 = self.next_tx_id
     self.next_tx_id += 1
 
-    self.transactions[tx_id] = Transaction(
-        tx_id=tx_id,
-        listing_id=_listing_id,
+    # msg.value == price <= max_value(uint128) nen vua 128 bit thap
+    self.packed_transactions[tx_id] = PackedTransaction(
         buyer_cccd=_buyer_cccd,
-        buyer_address=msg.sender,
-        amount=msg.value,
-        status=0,  # Pending
-        created_at=block.timestamp
+        meta=self._pack_meta(msg.sender, 0, block.timestamp),  # Pending
+        listing_amount=(_listing_id << LISTING_ID_SHIFT) | msg.value
     )
 
+    buyer_position: uint256 = self.buyer_txs_count[msg.sender] + 1
+    self.buyer_tx_ids[msg.sender][buyer_position] = tx_id
+    self.buyer_txs_count[msg.sender] = buyer_position
+    listing_position: uint256 = self.listing_txs_count[_listing_id] + 1
+    self.listing_tx_ids[_listing_id][listing_position] = tx_id
+    self.listing_txs_count[_listing_id] = listing_position
+
     # Luu tien ky quy vao Escrow
     self.escrow_balances[msg.sender] += msg.value
-    self.listings[_listing_id].status = 1  # InTransaction
+    self.packed_listings[_listing_id].meta = self._with_status(listing_meta, 1)  # InTransaction
 
     log TransactionInitiated(
         tx_id=tx_id,
         listing_id=_listing_id,
+        buyer=msg.sender,
         buyer_cccd=_buyer_cccd,
-        amount=msg.value
+        amount=msg.value,
+        created_at=block.timestamp
     )
 
-@external
-def approve_transaction(_tx_id: uint256):
-    assert msg.sender == self.admin, "Only admin"
+@internal
+def _approve_transaction(_tx_id: uint256):
+    tx_data: Transaction = self._get_transaction(_tx_id)
+    assert tx_data.status == 0 and tx_data.tx_id != 0, "Transaction not pending"
 
-    tx_data: Transaction = self.transactions[_tx_id]
-    assert tx_data.status == 0, "Transaction not pending"
+    # Chi doc hai slot can dung cua listing
+    assert self._listing_status(tx_data.listing_id) == 1, "Listing not in transaction"
+    token_id: uint256 = self.packed_listings[tx_data.listing_id].token_id
 
-    listing: Listing = self.listings[tx_data.listing_id]
-    assert listing.status == 1, "Listing not in transaction"
-
-    seller: address = staticcall ILandNFT(self.land_nft).ownerOf(listing.token_id)
+    seller: address = staticcall ILandNFT(self.land_nft).ownerOf(token_id)
     assert seller != empty(address), "NFT does not exist"
 
     # 1. Chuyen NFT va cap nhat CCCD
@@ -165,7 +383,7 @@ def approve_transaction(_tx_id: uint256):
     extcall ILandNFT(self.land_nft).transferWithCCCD(
         seller,
         tx_data.buyer_address,
-        listing.token_id,
+        token_id,
         tx_data.buyer_cccd
     )
 
@@ -173,39 +391,64 @@ def approve_transaction(_tx_id: uint256):
     send(seller, tx_data.amount)
 
     # 3. Cap nhat statuses va tru tien ky quy khoi buyer balance
-    self.transactions[_tx_id].status = 1  # Approved
-    self.listings[tx_data.listing_id].status = 2  # Completed
+    self._set_transaction_status(_tx_id, 1)  # Approved
+    self._set_listing_status(tx_data.listing_id, 2)  # Completed
+    self._remove_active_listing(tx_data.listing_id, token_id)
     self.escrow_balances[tx_data.buyer_address] -= tx_data.amount # Cap nhat ke toan
 
     log TransactionApproved(
         tx_id=_tx_id,
-        buyer_cccd=tx_data.buyer_cccd,
-        seller_cccd=listing.seller_cccd,
+        listing_id=tx_data.listing_id,
+        token_id=token_id,
         amount=tx_data.amount
     )
 
 
-@external
-def reject_transaction(_tx_id: uint256, _reason: String[64]):
-    assert msg.sender == self.admin, "Only admin"
-
-    tx_data: Transaction = self.transactions[_tx_id]
-    assert tx_data.status == 0, "Transaction not pending"
+@internal
+def _reject_transaction(_tx_id: uint256, _reason: String[64]):
+    tx_data: Transaction = self._get_transaction(_tx_id)
+    assert tx_data.status == 0 and tx_data.tx_id != 0, "Transaction not pending"
 
     # 1. Hoan tien buyer
     send(tx_data.buyer_address, tx_data.amount)
     
     # 2. Cap nhat statuses
     self.escrow_balances[tx_data.buyer_address] -= tx_data.amount # Cap nhat ke toan
-    self.transactions[_tx_id].status = 2  # Rejected
-    self.listings[tx_data.listing_id].status = 0  # Active
+    self._set_transaction_status(_tx_id, 2)  # Rejected
+    self._set_listing_status(tx_data.listing_id, 0)  # Active
+
+    log TransactionRejected(tx_id=_tx_id, listing_id=tx_data.listing_id, reason=_reason)
+
+@external
+def approve_transaction(_tx_id: uint256):
+    assert msg.sender == self.admin, "Only admin"
+    self._approve_transaction(_tx_id)
 
-    log TransactionRejected(tx_id=_tx_id, reason=_reason)
+@external
+def reject_transaction(_tx_id: uint256, _reason: String[64]):
+    assert msg.sender == self.admin, "Only admin"
+    self._reject_transaction(_tx_id, _reason)
+
+@external
+def approve_transactions(_tx_ids: DynArray[uint256, MAX_BATCH_SIZE]):
+    # Duyet ca lo; mot giao dich khong hop le thi ca lo bi revert
+    assert msg.sender == self.admin, "Only admin"
+
+    for tx_id: uint256 in _tx_ids:
+        self._approve_transaction(tx_id)
+
+@external
+def reject_transactions(_tx_ids: DynArray[uint256, MAX_BATCH_SIZE], _reasons: DynArray[String[64], MAX_BATCH_SIZE]):
+    assert msg.sender == self.admin, "Only admin"
+    assert len(_tx_ids) == len(_reasons), "Length mismatch"
+
+    for i: uint256 in range(len(_tx_ids), bound=MAX_BATCH_SIZE):
+        self._reject_transaction(_tx_ids[i], _reasons[i])
 
 @external
 def buyer_cancel(_tx_id: uint256):
-    tx_data: Transaction = self.transactions[_tx_id]
-    assert tx_data.status == 0, "Transaction not pending"
+    tx_data: Transaction = self._get_transaction(_tx_id)
+    assert tx_data.status == 0 and tx_data.tx_id != 0, "Transaction not pending"
     assert msg.sender == tx_data.buyer_address, "Only buyer can cancel"
 
     penalty: uint256 = self.cancel_penalty
@@ -217,8 +460,10 @@ def buyer_cancel(_tx_id: uint256):
     
     # 2. Cap nhat statuses
     self.escrow_balances[tx_data.buyer_address] -= tx_data.amount # Tru toan bo so tien da gui
-    self.transactions[_tx_id].status = 3  # Cancelled
-    self.listings[tx_data.listing_id].status = 0  # Active
+    self._set_transaction_status(_tx_id, 3)  # Cancelled
+    self._set_listing_status(tx_data.listing_id, 0)  # Active
+
+    log TransactionCancelled(tx_id=_tx_id, listing_id=tx_data.listing_id, refund=refund, penalty=penalty)
 
 @external
 def set_land_nft(_land_nft_address: address):
@@ -244,17 +489,146 @@ def withdraw_fees():
     # Withdraw
     send(self.admin, amount)
 
+@view
+@external
+def listings(_listing_id: uint256) -> Listing:
+    return self._get_listing(_listing_id)
+
+@view
+@external
+def transactions(_tx_id: uint256) -> Transaction:
+    return self._get_transaction(_tx_id)
+
 @view
 @external
 def get_listing(_listing_id: uint256) -> Listing:
-    return self.listings[_listing_id]
+    return self._get_listing(_listing_id)
 
 @view
 @external
 def get_transaction(_tx_id: uint256) -> Transaction:
-    return self.transactions[_tx_id]
+    return self._get_transaction(_tx_id)
+
+@view
+@external
+def get_listing_summary(_listing_id: uint256) -> ListingSummary:
+    return self._get_listing_summary(_listing_id)
+
+@view
+@external
+def get_listing_summaries(_listing_ids: DynArray[uint256, MAX_BATCH_SIZE]) -> DynArray[ListingSummary, MAX_BATCH_SIZE]:
+    # Tom tat cua nhieu listing trong mot lan goi, cung thu tu voi _listing_ids
+    summaries: DynArray[ListingSummary, MAX_BATCH_SIZE] = []
+    for listing_id: uint256 in _listing_ids:
+        summaries.append(self._get_listing_summary(listing_id))
+    return summaries
 
 @view
 @external
 def get_escrow_balance(_user: address) -> uint256:
-    return self.escrow_balances[_user]
\ No newline at end of file
+    return self.escrow_balances[_user]
+
+@view
+@external
+def get_listings(_start: uint256, _count: uint256, _status: uint8) -> (DynArray[Listing, MAX_PAGE_SIZE], uint256):
+    # Tra ve toi da _count listing co id >= _start va status == _status (STATUS_ANY = moi trang thai)
+    # cung voi id bat dau cua trang tiep theo (0 neu da het)
+    page: DynArray[Listing, MAX_PAGE_SIZE] = []
+    count: uint256 = min(_count, MAX_PAGE_SIZE)
+    listing_id: uint256 = max(_start, 1)
+    end_id: uint256 = self.next_listing_id
+
+    for i: uint256 in range(MAX_PAGE_SCAN):
+        if listing_id >= end_id or len(page) >= count:
+            break
+        # Chi doc slot status truoc, doc ca struct khi khop
+        if _status == STATUS_ANY or self._listing_status(listing_id) == _status:
+            page.append(self._get_listing(listing_id))
+        listing_id += 1
+
+    if listing_id >= end_id:
+        return page, 0
+    return page, listing_id
+
+@view
+@external
+def get_active_listings(_start: uint256, _count: uint256) -> (DynArray[Listing, MAX_PAGE_SIZE], uint256):
+    # Trang cac listing dang mo ban/dang giao dich, bat dau tu vi tri _start (danh so tu 1)
+    # cung voi vi tri bat dau cua trang tiep theo (0 neu da het)
+    page: DynArray[Listing, MAX_PAGE_SIZE] = []
+    count: uint256 = min(_count, MAX_PAGE_SIZE)
+    position: uint256 = max(_start, 1)
+    last_position: uint256 = self.active_listings_count
+
+    for i: uint256 in range(MAX_PAGE_SIZE):
+        if position > last_position or i >= count:
+            break
+        page.append(self._get_listing(self.active_listing_ids[position]))
+        position += 1
+
+    if position > last_position:
+        return page, 0
+    return page, position
+
+@view
+@external
+def get_txs_by_buyer(_start: uint256, _count: uint256, _buyer: address) -> (DynArray[uint256, MAX_PAGE_SIZE], uint256):
+    # Trang tx_id cua _buyer bat dau tu vi tri _start (danh so tu 1)
+    # cung voi vi tri bat dau cua trang tiep theo (0 neu da het)
+    page: DynArray[uint256, MAX_PAGE_SIZE] = []
+    count: uint256 = min(_count, MAX_PAGE_SIZE)
+    position: uint256 = max(_start, 1)
+    last_position: uint256 = self.buyer_txs_count[_buyer]
+
+    for i: uint256 in range(MAX_PAGE_SIZE):
+        if position > last_position or i >= count:
+            break
+        page.append(self.buyer_tx_ids[_buyer][position])
+        position += 1
+
+    if position > last_position:
+        return page, 0
+    return page, position
+
+@view
+@external
+def get_listings_by_seller(_start: uint256, _count: uint256, _seller: address) -> (DynArray[uint256, MAX_PAGE_SIZE], uint256):
+    # Trang listing_id cua _seller, phan trang nhu get_txs_by_buyer
+    page: DynArray[uint256, MAX_PAGE_SIZE] = []
+    count: uint256 = min(_count, MAX_PAGE_SIZE)
+    position: uint256 = max(_start, 1)
+    last_position: uint256 = self.seller_listings_count[_seller]
+
+    for i: uint256 in range(MAX_PAGE_SIZE):
+        if position > last_position or i >= count:
+            break
+        page.append(self.seller_listing_ids[_seller][position])
+        position += 1
+
+    if position > last_position:
+        return page, 0
+    return page, position
+
+@view
+@external
+def get_txs_by_listing(_start: uint256, _count: uint256, _listing_id: uint256) -> (DynArray[uint256, MAX_PAGE_SIZE], uint256):
+    # Trang tx_id cua _listing_id, phan trang nhu get_txs_by_buyer
+    page: DynArray[uint256, MAX_PAGE_SIZE] = []
+    count: uint256 = min(_count, MAX_PAGE_SIZE)
+    position: uint256 = max(_start, 1)
+    last_position: uint256 = self.listing_txs_count[_listing_id]
+
+    for i: uint256 in range(MAX_PAGE_SIZE):
+        if position > last_position or i >= count:
+            break
+        page.append(self.listing_tx_ids[_listing_id][position])
+        position += 1
+
+    if position > last_position:
+        return page, 0
+    return page, position
+
+@view
+@external
+def is_token_listed(_token_id: uint256) -> bool:
+    return self.token_to_listing[_token_id] != 0
\ No newline at end of file
@@ -1,22 +1,34 @@
 import requests
 import sys
 import datetime
+import bisect
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QTabWidget, QVBoxLayout, QPushButton,
     QLineEdit, QLabel, QFormLayout, QTableWidget, QTableWidgetItem, QScrollArea,
     QHeaderView, QMessageBox, QDialog, QDialogButtonBox, QHBoxLayout, QFileDialog,
     QFrame, QListWidget, QListWidgetItem, QGridLayout, QGroupBox, QInputDialog, QStackedWidget
 )
-from PySide6.QtCore import QObject, QThread, Qt, Signal, QRegularExpression, QUrl, Slot
+from PySide6.QtCore import QObject, QThread, QThreadPool, QRunnable, Qt, Signal, QRegularExpression, QUrl, Slot
 from PySide6.QtGui import QFont, QRegularExpressionValidator, QDesktopServices, QPixmap
 from ape import accounts, project, networks
 from app_modules.ipfs_utils import upload_file_to_ipfs, upload_json_to_ipfs, FLASK_BACKEND_URL, IPFS_URL_VIEWER
-from app_modules.crypto_utils import encrypt_data, decrypt_data, save_land_info, get_real_cccd
+from app_modules.crypto_utils import commit_cccd, decrypt_cccd, normalize_commitment, save_land_info, get_real_cccd
+from app_modules.chain_indexer import ChainIndexer, ChangeTracker
+from app_modules.batch_reader import BatchReader
+from app_modules.contract_cache import ContractCache, CachedContract
+from app_modules.rpc_metrics import InstrumentedContract, RPC_METRICS
+from app_modules.permit_utils import sign_nft_permit, permit_deadline
 
 from dataclasses import dataclass
 
 USE_MOCK_DATA = False
+USE_CHAIN_INDEXER = True  # Đọc dữ liệu danh sách từ chỉ mục SQLite cục bộ thay vì quét toàn bộ contract
+USE_CONTRACT_CACHE = True  # Ghi nhớ kết quả hàm view theo block, xoá khi có block mới hoặc sau khi gửi giao dịch
 NODE_URL = "http://192.168.0.140:8545"
+PAGE_SIZE = 50      # Khớp MAX_PAGE_SIZE của các view phân trang trong contract
+LOAD_CHUNK_SIZE = 25  # Số dòng mỗi lần job tải nền gửi về giao diện
+USE_PERMIT_LISTING = True  # Đăng bán bằng chữ ký permit (một giao dịch) thay vì approve rồi create_listing
+ADMIN_BATCH_SIZE = 100  # Khớp MAX_BATCH_SIZE của approve_lands / approve_transactions / get_*_summaries trong contract
 
 LAND_NFT_ADDRESS = "0x437AAc235f0Ed378AB9CbD5b7C20B1c3B28b573a"       # Ví dụ: 0x5FbDB2315678...
 LAND_REGISTRY_ADDRESS = "0x9FfDa9D1FeDdF35a26D2F68a50Fd600e68696469"  # Ví dụ: 0xe7f1725E7734...
@@ -68,18 +80,22 @@ def parse_land_parcel_tuple(data_obj) -> LandParcelData:
     if len(data_tuple) != 7:
         print(f"Warning: Invalid LandParcel data length: {data_tuple}")
         return LandParcelData(id=0, land_address="", area=0, owner_cccd="", status=99, pdf_uri="", image_uri="")
-    return LandParcelData(*data_tuple)
+    parcel = LandParcelData(*data_tuple)
+    parcel.owner_cccd = normalize_commitment(parcel.owner_cccd)
+    return parcel
 
 def parse_listing_tuple(data_obj) -> ListingData:
     if not data_obj:
-        return ListingData(listing_id=0, token_id=0, seller_cccd="", price=0, status=99, created_at=0)
+        return ListingData(listing_id=0, token_id=0, seller_cccd="", seller_address="", price=0, status=99, created_at=0)
 
     data_tuple = tuple(data_obj) 
 
     if len(data_tuple) != 7:
         print(f"Warning: Invalid Listing data length: {data_tuple}")
         return ListingData(listing_id=0, token_id=0, seller_cccd="", seller_address="", price=0, status=99, created_at=0)
-    return ListingData(*data_tuple)
+    listing = ListingData(*data_tuple)
+    listing.seller_cccd = normalize_commitment(listing.seller_cccd)
+    return listing
 
 def parse_transaction_tuple(data_obj) -> TransactionData:
     if not data_obj: return None
@@ -88,7 +104,134 @@ def parse_transaction_tuple(data_obj) -> TransactionData:
     
     if len(data_tuple) != 7:
         return None
-    return TransactionData(*data_tuple)
+    tx = TransactionData(*data_tuple)
+    tx.buyer_cccd = normalize_commitment(tx.buyer_cccd)
+    return tx
+
+def parse_listing_summary(listing_id, data_obj) -> ListingData:
+    """ListingData từ ListingSummary (token_id, seller, price, status); CCCD và ngày tạo để trống."""
+    token_id, seller_address, price, status = tuple(data_obj)
+    return ListingData(
+        listing_id=listing_id, token_id=token_id, seller_cccd="", seller_address=seller_address,
+        price=price, status=status, created_at=0
+    )
+
+def masked_commitment(commitment):
+    """Commitment CCCD rút gọn cho bảng danh sách; chỉ giải mã khi xem chi tiết (mỗi lần giải mã là một lời gọi mạng)."""
+    return f"{commitment[:10]}...***" if commitment else "-"
+
+def fetch_summaries(summaries_view, ids, parser):
+    """
+    Đọc view tóm tắt dạng mảng (get_listing_summaries / get_land_summaries) cho danh sách ids,
+    mỗi lô ADMIN_BATCH_SIZE id là một eth_call, mọi lô đi chung một JSON-RPC batch.
+    Trả về {id: parser(id, summary)}.
+    """
+    ids = list(ids)
+    chunks = [ids[start:start + ADMIN_BATCH_SIZE] for start in range(0, len(ids), ADMIN_BATCH_SIZE)]
+    results = {}
+    for chunk, summaries in zip(chunks, BatchReader().map(summaries_view, [(chunk,) for chunk in chunks])):
+        for item_id, summary in zip(chunk, summaries or []):
+            results[item_id] = parser(item_id, summary)
+    return results
+
+def iter_pages(paged_view, parser, *filters):
+    """
+    Đọc lần lượt từng trang của view phân trang (start, count, *filters) -> (page, next_start),
+    ví dụ get_listings/get_lands(start, count, status), get_lands_by_owner(start, count, owner)
+    hay get_active_listings(start, count).
+    Mỗi trang là một eth_call duy nhất; trang kế tiếp chỉ được đọc khi vòng lặp lấy tiếp.
+    """
+    cursor = 1
+    while True:
+        page, cursor = paged_view(cursor, PAGE_SIZE, *filters)
+        yield [parser(item) for item in page]
+        if cursor == 0:
+            return
+
+def iter_batches(items, size=PAGE_SIZE):
+    """Cắt danh sách id thành các lô `size` phần tử để job tải nền gửi kết quả về theo từng lô."""
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def fetch_all_pages_each(paged_view, parser, filter_values):
+    """
+    Đọc hết mọi trang cho nhiều giá trị lọc (ví dụ get_txs_by_listing của từng listing):
+    mỗi vòng gửi trang kế tiếp của mọi giá trị còn dở trong một JSON-RPC batch.
+    Trả về danh sách kết quả theo thứ tự filter_values.
+    """
+    results = [[] for _ in filter_values]
+    pending = [(index, 1) for index in range(len(filter_values))]
+    reader = BatchReader()
+    while pending:
+        pages = reader.map(paged_view, [(cursor, PAGE_SIZE, filter_values[index]) for index, cursor in pending])
+        next_pending = []
+        for (index, _), (page, cursor) in zip(pending, pages):
+            results[index].extend(parser(item) for item in page)
+            if cursor != 0:
+                next_pending.append((index, cursor))
+        pending = next_pending
+    return results
+
+def send_in_batches(contract_method, ids, *per_item_args, **kwargs):
+    """
+    Gửi hàm batch của contract (approve_lands, reject_transactions...) theo từng lô
+    ADMIN_BATCH_SIZE phần tử. Các danh sách tham số đi kèm được cắt song song với ids.
+    Trả về danh sách receipt.
+    """
+    receipts = []
+    for start in range(0, len(ids), ADMIN_BATCH_SIZE):
+        end = start + ADMIN_BATCH_SIZE
+        receipts.append(contract_method(ids[start:end], *(column[start:end] for column in per_item_args), **kwargs))
+    return receipts
+
+def build_land_metadata(land_id, land_data):
+    """JSON metadata của NFT cho một thửa đất được duyệt."""
+    return {
+        "name": f"Bất động sản #{land_id}",
+        "description": f"Đại diện quyền sở hữu kỹ thuật số cho bất động sản tại địa chỉ {land_data.land_address}.",
+        "image": land_data.image_uri,
+        "attributes": [
+            {"trait_type": "Địa chỉ", "value": land_data.land_address},
+            {"trait_type": "Diện tích (m2)", "value": land_data.area},
+            {"trait_type": "Tài liệu pháp lý", "value": land_data.pdf_uri}
+        ]
+    }
+
+class RowKeys:
+    """
+    Thứ tự id của các dòng đang hiển thị trong bảng/danh sách. Khi làm mới từng phần
+    dùng để biết phải chèn hay gỡ đúng dòng nào thay vì vẽ lại toàn bộ.
+    """
+
+    def __init__(self, descending=True):
+        self.descending = descending
+        self.keys = []
+
+    def reset(self):
+        self.keys = []
+
+    def _sort_key(self, key):
+        return -key if self.descending else key
+
+    def remove(self, key):
+        """Bỏ id khỏi danh sách, trả về vị trí dòng cũ (None nếu không có)."""
+        index = bisect.bisect_left(self.keys, self._sort_key(key), key=self._sort_key)
+        if index < len(self.keys) and self.keys[index] == key:
+            del self.keys[index]
+            return index
+        return None
+
+    def selected(self, table):
+        """Id của các dòng đang được chọn trong bảng, theo thứ tự hiển thị."""
+        rows = sorted({index.row() for index in table.selectionModel().selectedRows()})
+        return [self.keys[row] for row in rows]
+
+    def insert(self, key):
+        """Thêm id vào đúng thứ tự, trả về vị trí dòng cần chèn."""
+        index = bisect.bisect_left(self.keys, self._sort_key(key), key=self._sort_key)
+        self.keys.insert(index, key)
+        return index
 
 # =============================================================================
 # WORKERS
@@ -117,6 +260,145 @@ class ImageDownloader(QObject):
         except Exception as e:
             self.error.emit(f"Error downloading image: {e}")
 
+class LoadJobSignals(QObject):
+    reset = Signal(int)         # job_id: view phải xoá dữ liệu cũ trước khi nhận dòng
+    chunk = Signal(int, list)   # job_id, các dòng
+    error = Signal(int, str)
+    finished = Signal(int)
+
+class LoadJob(QRunnable):
+    """
+    Job đọc dữ liệu blockchain chạy trên QThreadPool, gửi dòng về main thread theo từng đợt.
+
+    Có change_tracker thì chỉ lấy dòng thay đổi (fetch_changes), nếu không hoặc cần vẽ lại
+    thì lấy toàn bộ (fetch_all). Hai hàm này trả về iterable các LÔ dòng (mỗi trang / mỗi lô
+    RPC một lô, nên là generator): lô nào đọc xong được gửi ngay, và job dừng trước khi đọc lô
+    kế tiếp nếu đã bị huỷ. Lô rỗng chỉ để tạo điểm huỷ giữa các bước đọc chưa sinh ra dòng.
+    Mỗi dòng là dữ liệu thuần Python, widget chỉ được tạo ở main thread.
+    """
+
+    def __init__(self, job_id, fetch_all, fetch_changes=None, change_tracker=None):
+        super().__init__()
+        self.job_id = job_id
+        self.fetch_all = fetch_all
+        self.fetch_changes = fetch_changes
+        self.change_tracker = change_tracker
+        self.signals = LoadJobSignals()
+        self.mark = None
+        self.failed = False
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        try:
+            changes = None
+            if self.change_tracker is not None:
+                changes, self.mark = self.change_tracker.poll()
+
+            if changes is None:
+                batches = self.fetch_all()
+                self.signals.reset.emit(self.job_id)
+            else:
+                batches = self.fetch_changes(changes)
+
+            batches = iter(batches)
+            while not self.cancelled:
+                batch = next(batches, None)
+                if batch is None:
+                    return
+                for start in range(0, len(batch), LOAD_CHUNK_SIZE):
+                    self.signals.chunk.emit(self.job_id, list(batch[start:start + LOAD_CHUNK_SIZE]))
+        except Exception as e:
+            self.failed = True
+            if not self.cancelled:
+                self.signals.error.emit(self.job_id, str(e))
+        finally:
+            self.signals.finished.emit(self.job_id)
+
+class TabLoader(QObject):
+    """
+    Điều phối việc tải dữ liệu của một tab: mỗi lần start() huỷ job đang chạy và bỏ qua
+    mọi kết quả còn gửi về của job cũ. Các tab khác nhau tải song song trên thread pool chung.
+    """
+    progress = Signal(int)  # Số dòng đã nhận của lần tải hiện tại
+
+    def __init__(self, fetch_all, on_reset, on_rows, on_error, on_done=None,
+                 fetch_changes=None, change_tracker=None, parent=None):
+        super().__init__(parent)
+        self.fetch_all = fetch_all
+        self.fetch_changes = fetch_changes
+        self.change_tracker = change_tracker
+        self.on_reset = on_reset
+        self.on_rows = on_rows
+        self.on_done = on_done
+        self.on_error = on_error
+        self._job = None
+        self._jobs = {}  # Giữ tham chiếu tới job (kể cả job đã huỷ) cho tới khi chạy xong
+        self._next_job_id = 0
+        self.loaded = 0
+        self._button = None
+        self._button_text = ""
+
+    def attach_button(self, button):
+        """Hiển thị tiến độ trên nút làm mới; nút vẫn bấm được để huỷ và tải lại."""
+        self._button = button
+        self._button_text = button.text()
+
+    def is_loading(self):
+        return self._job is not None
+
+    def start(self):
+        if self._job is not None:
+            self._job.cancel()
+
+        self._next_job_id += 1
+        job = LoadJob(self._next_job_id, self.fetch_all, self.fetch_changes, self.change_tracker)
+        job.signals.reset.connect(self._handle_reset)
+        job.signals.chunk.connect(self._handle_chunk)
+        job.signals.error.connect(self._handle_error)
+        job.signals.finished.connect(self._handle_finished)
+
+        self._job = job
+        self._jobs[job.job_id] = job
+        self.loaded = 0
+        if self._button is not None:
+            self._button.setText("Đang tải...")
+        QThreadPool.globalInstance().start(job)
+
+    def _is_current(self, job_id):
+        return self._job is not None and self._job.job_id == job_id
+
+    def _handle_reset(self, job_id):
+        if self._is_current(job_id):
+            self.on_reset()
+
+    def _handle_chunk(self, job_id, rows):
+        if self._is_current(job_id):
+            self.on_rows(rows)
+            self.loaded += len(rows)
+            if self._button is not None:
+                self._button.setText(f"Đang tải... ({self.loaded})")
+            self.progress.emit(self.loaded)
+
+    def _handle_error(self, job_id, message):
+        if self._is_current(job_id):
+            self.on_error(message)
+
+    def _handle_finished(self, job_id):
+        job = self._jobs.pop(job_id, None)
+        if not self._is_current(job_id):
+            return
+        self._job = None
+        # Chỉ ghi nhận block đã hiển thị khi mọi dòng của lần tải đã được áp dụng
+        if job is not None and not job.failed and job.mark is not None:
+            self.change_tracker.commit(job.mark)
+        if self._button is not None:
+            self._button.setText(self._button_text)
+        if self.on_done is not None:
+            self.on_done()
+
 # =============================================================================
 # REUSABLE WIDGETS
 # =============================================================================
@@ -336,10 +618,10 @@ class ListingDetailDialog(QDialog):
 
         try:
             print("Đang mã hóa thông tin người mua...")
-            buyer_cccd_encrypted = encrypt_data(buyer_cccd)
+            buyer_cccd_index = commit_cccd(buyer_cccd)
             receipt = self.marketplace_contract.initiate_transaction(
                 self.listing_data.listing_id,
-                buyer_cccd_encrypted,
+                buyer_cccd_index,
                 sender=self.user_account,
                 value=price_wei
             )
@@ -396,7 +678,7 @@ class LandDetailDialog(QDialog):
         layout = QVBoxLayout(self)
         form_layout = QFormLayout()
 
-        cccd = decrypt_data(self.land_data.owner_cccd)
+        cccd = decrypt_cccd(self.land_data.owner_cccd)
 
         form_layout.addRow("ID Hồ sơ:", QLabel(str(land_id)))
         form_layout.addRow("Địa chỉ Ví Đăng ký:", QLabel(land_owner))
@@ -426,16 +708,7 @@ class LandDetailDialog(QDialog):
 
     def handle_approve(self):
         print(" -> Bước 1: Tạo đối tượng JSON metadata...")
-        metadata_json = {
-            "name": f"Bất động sản #{self.land_id}",
-            "description": f"Đại diện quyền sở hữu kỹ thuật số cho bất động sản tại địa chỉ {self.land_data.land_address}.",
-            "image": self.land_data.image_uri,
-            "attributes": [
-                {"trait_type": "Địa chỉ", "value": self.land_data.land_address},
-                {"trait_type": "Diện tích (m2)", "value": self.land_data.area},
-                {"trait_type": "Tài liệu pháp lý", "value": self.land_data.pdf_uri}
-            ]
-        }
+        metadata_json = build_land_metadata(self.land_id, self.land_data)
         
         try:
             print(f" -> Bước 2: Đang tải metadata lên IPFS...")
@@ -475,12 +748,15 @@ class LandDetailDialog(QDialog):
 # =============================================================================
 
 class MarketplaceTab(QWidget):
-    def __init__(self, user_account, marketplace_contract, land_registry_contract, land_nft_contract):
+    def __init__(self, user_account, marketplace_contract, land_registry_contract, land_nft_contract, chain_indexer=None):
         super().__init__()
         self.user_account = user_account
         self.marketplace_contract = marketplace_contract
         self.land_registry_contract = land_registry_contract
         self.land_nft_contract = land_nft_contract
+        self.chain_indexer = chain_indexer
+        self.change_tracker = ChangeTracker(chain_indexer) if chain_indexer is not None else None
+        self.cards = {}  # listing_id -> ListingCardWidget
 
         main_layout = QVBoxLayout(self)
 
@@ -510,60 +786,103 @@ class MarketplaceTab(QWidget):
         scroll_area.setWidget(grid_container)
         main_layout.addWidget(scroll_area)
 
+        # Lần đầu/sau reorg vẽ lại toàn bộ, các lần sau chỉ dựng lại thẻ của listing thay đổi
+        self.loader = TabLoader(
+            self._fetch_active_listings, self._clear_cards, self._apply_listing_rows, self._show_load_error,
+            fetch_changes=self._fetch_listing_changes, change_tracker=self.change_tracker, parent=self
+        )
+        self.loader.attach_button(self.refresh_button)
+
         self.load_listings()
 
     def load_listings(self):
-        self.refresh_button.setEnabled(False)
-        self.refresh_button.setText("Đang tải...")
-        QApplication.processEvents()
+        self.loader.start()
+
+    def _clear_cards(self):
+        for card in self.cards.values():
+            card.setParent(None)
+        self.cards = {}
+
+    def _apply_listing_rows(self, rows):
+        for listing_id, listing_data, land_data in rows:
+            self._upsert_card(listing_id, listing_data, land_data)
+        self._layout_cards()
+
+    def _show_load_error(self, message):
+        QMessageBox.critical(self, "Lỗi", f"Không thể tải danh sách niêm yết: {message}")
+
+    def _upsert_card(self, listing_id, listing_data, land_data):
+        """Thay thẻ của listing; land_data rỗng nghĩa là listing không còn hiển thị."""
+        old_card = self.cards.pop(listing_id, None)
+        if old_card is not None:
+            old_card.setParent(None)
+
+        if land_data and land_data.id != 0:
+            card = ListingCardWidget(listing_data, land_data, listing_data.seller_address)
+            card.view_details_requested.connect(self.handle_view_details)
+            self.cards[listing_id] = card
+
+    def _layout_cards(self):
+        max_columns = 3
+        for card in self.cards.values():
+            self.grid_layout.removeWidget(card)
+        for index, listing_id in enumerate(sorted(self.cards)):
+            self.grid_layout.addWidget(self.cards[listing_id], index // max_columns, index % max_columns)
+
+    def _fetch_listing_changes(self, changes):
+        """(Chạy trên thread pool) Dòng của các listing thay đổi; land_data None nghĩa là gỡ thẻ."""
+        my_address = self.user_account.address.lower()
+        rows = []
+        for listing_id in changes["listings"]:
+            listing_data = parse_listing_tuple(self.chain_indexer.get_listing(listing_id))
+            land_data = None
+            if listing_data.status == 0 and listing_data.seller_address.lower() != my_address:
+                land_data = parse_land_parcel_tuple(self.chain_indexer.get_land(listing_data.token_id))
+            rows.append((listing_id, listing_data, land_data))
+        yield rows
+
+    def _fetch_active_listings(self):
+        """
+        (Chạy trên thread pool) Các lô [(listing_id, ListingData, LandParcelData)] của tin đang mở bán,
+        trừ tin của chính mình; đọc từ RPC thì mỗi trang get_active_listings là một lô.
+        """
+        if self.chain_indexer is not None:
+            yield [
+                (listing_tuple[0], parse_listing_tuple(listing_tuple), parse_land_parcel_tuple(land_tuple))
+                for listing_tuple, land_tuple in self.chain_indexer.get_active_listings(exclude_seller=self.user_account.address)
+            ]
+            return
 
-        for i in reversed(range(self.grid_layout.count())): 
-            widget = self.grid_layout.itemAt(i).widget()
-            if widget: widget.setParent(None)
+        for page in iter_pages(self.marketplace_contract.get_active_listings, parse_listing_tuple):
+            # Tập listing đang hoạt động gồm cả tin đang giao dịch, chỉ giữ tin đang mở bán
+            active_listings = [listing_data for listing_data in page if listing_data.status == 0]
 
-        try:
-            next_id = self.marketplace_contract.next_listing_id()
-            
-            row, col = 0, 0
-            max_columns = 3 
+            # Chủ sở hữu NFT và thông tin thửa đất của mọi listing trong trang được gửi chung một batch
+            reader = BatchReader()
+            for listing_data in active_listings:
+                reader.add(self.land_nft_contract.ownerOf, listing_data.token_id)
+                reader.add(self.land_registry_contract.land_parcels, listing_data.token_id, parser=parse_land_parcel_tuple)
+            details = reader.execute()
 
-            for i in range(1, next_id):
-                listing_tuple = self.marketplace_contract.listings(i)
-                listing_data = parse_listing_tuple(listing_tuple)
-                
-                if listing_data and listing_data.listing_id != 0 and listing_data.status == 0:
-                    token_id = listing_data.token_id
-                    seller_address = self.land_nft_contract.ownerOf(token_id)
-                    
-                    if seller_address.lower() == self.user_account.address.lower():
-                        continue 
+            rows = []
+            for listing_data, seller_address, land_data in zip(active_listings, details[0::2], details[1::2]):
+                if not seller_address or seller_address.lower() == self.user_account.address.lower():
+                    continue
 
-                    land_tuple = self.land_registry_contract.land_parcels(token_id)
-                    land_data = parse_land_parcel_tuple(land_tuple)
-                    
-                    if land_data and land_data.id != 0:
-                        card = ListingCardWidget(listing_data, land_data, seller_address)
-                        card.view_details_requested.connect(self.handle_view_details)
-                        self.grid_layout.addWidget(card, row, col)
-                    
-                    col += 1
-                    if col >= max_columns:
-                        col = 0
-                        row += 1
-        except Exception as e:
-            QMessageBox.critical(self, "Lỗi", f"Không thể tải danh sách niêm yết: {e}")
-        
-        self.refresh_button.setEnabled(True)
-        self.refresh_button.setText("Làm mới")
+                listing_data.seller_address = seller_address
+                rows.append((listing_data.listing_id, listing_data, land_data))
+            yield rows
 
     @Slot(int, str)
     def handle_view_details(self, listing_id, seller_address):
         try:
-            listing_tuple = self.marketplace_contract.listings(listing_id)
-            listing_data = parse_listing_tuple(listing_tuple)
-
-            land_tuple = self.land_registry_contract.land_parcels(listing_data.token_id)
-            land_data = parse_land_parcel_tuple(land_tuple)
+            # Thẻ vừa được dựng từ chỉ mục nên đọc lại từ đó, không cần gọi RPC
+            if self.chain_indexer is not None:
+                listing_data = parse_listing_tuple(self.chain_indexer.get_listing(listing_id))
+                land_data = parse_land_parcel_tuple(self.chain_indexer.get_land(listing_data.token_id))
+            else:
+                listing_data = parse_listing_tuple(self.marketplace_contract.listings(listing_id))
+                land_data = parse_land_parcel_tuple(self.land_registry_contract.land_parcels(listing_data.token_id))
             
             if listing_data and land_data:
                 dialog = ListingDetailDialog(
@@ -576,12 +895,15 @@ class MarketplaceTab(QWidget):
             QMessageBox.critical(self, "Lỗi", f"Không thể hiển thị chi tiết: {e}")
 
 class MyTransactionsTab(QWidget):
-    def __init__(self, user_account, marketplace_contract, land_registry_contract, land_nft_contract):
+    def __init__(self, user_account, marketplace_contract, land_registry_contract, land_nft_contract, chain_indexer=None):
         super().__init__()
         self.user_account = user_account
         self.marketplace_contract = marketplace_contract
         self.land_registry_contract = land_registry_contract
         self.land_nft_contract = land_nft_contract
+        self.chain_indexer = chain_indexer
+        self.change_tracker = ChangeTracker(chain_indexer) if chain_indexer is not None else None
+        self.row_keys = RowKeys()
 
         layout = QVBoxLayout(self)
 
@@ -611,59 +933,118 @@ class MyTransactionsTab(QWidget):
         self.table.setEditTriggers(QTableWidget.NoEditTriggers)
         layout.addWidget(self.table)
 
+        # Chỉ cập nhật dòng của giao dịch thay đổi từ lần hiển thị trước
+        self.loader = TabLoader(
+            self._fetch_rows, self._clear_rows, self._apply_rows, self._show_load_error,
+            fetch_changes=self._fetch_changed_rows, change_tracker=self.change_tracker, parent=self
+        )
+        self.loader.attach_button(self.refresh_button)
+
         self.populate_transactions()
 
     def populate_transactions(self):
-        self.table.setRowCount(0)
-        try:
-            # Nhớ thêm () cho contract thật
-            next_tx_id = self.marketplace_contract.next_tx_id()
-            
-            # Duyệt ngược để thấy mới nhất trước
-            for i in range(next_tx_id - 1, 0, -1):
-                tx_tuple = self.marketplace_contract.transactions(i)
-                tx_data = parse_transaction_tuple(tx_tuple)
-                
-                if not tx_data: continue
-
-                listing_tuple = self.marketplace_contract.listings(tx_data.listing_id)
-                listing_data = parse_listing_tuple(listing_tuple)
-                
-                my_address = self.user_account.address.lower()
-                buyer_address = tx_data.buyer_address.lower()
-                seller_address = listing_data.seller_address.lower()
+        self.loader.start()
 
-                is_my_transaction = False
-                role = ""
-
-                if buyer_address == my_address:
-                    is_my_transaction = True
-                    role = "Người Mua"
-                
-                elif seller_address == my_address:
-                    is_my_transaction = True
-                    role = "Người Bán"
+    def _clear_rows(self):
+        self.table.setRowCount(0)
+        self.row_keys.reset()
+
+    def _apply_rows(self, rows):
+        for row in rows:
+            self._upsert_transaction(*row)
+
+    def _show_load_error(self, message):
+        print(f"Lỗi tải giao dịch: {message}")
+
+    def _fetch_rows(self):
+        """(Chạy trên thread pool) Các lô dòng hiển thị của mọi giao dịch liên quan tới người dùng."""
+        for batch in self._fetch_transactions():
+            yield [self._describe_transaction(tx_data, listing_data) for tx_data, listing_data in batch]
+
+    def _fetch_changed_rows(self, changes):
+        rows = []
+        for tx_id in changes["transactions"]:
+            tx_tuple, listing_tuple = self.chain_indexer.get_transaction(tx_id)
+            rows.append(self._describe_transaction(parse_transaction_tuple(tx_tuple), parse_listing_tuple(listing_tuple)))
+        yield rows
+
+    def _describe_transaction(self, tx_data: TransactionData, listing_data: ListingData):
+        """(Chạy trên thread pool) Xác định vai trò và địa chỉ đất; vai trò rỗng nghĩa là không phải giao dịch của mình."""
+        my_address = self.user_account.address.lower()
+        buyer_address = tx_data.buyer_address.lower()
+        seller_address = listing_data.seller_address.lower()
+
+        role = ""
+        if buyer_address == my_address:
+            role = "Người Mua"
+        elif seller_address == my_address:
+            role = "Người Bán"
 
-                if is_my_transaction:
-                    self.add_transaction_row(tx_data, listing_data, role)
-                    
-        except Exception as e:
-            print(f"Lỗi tải giao dịch: {e}")
+        land_address_display = f"Listing #{tx_data.listing_id}"
+        if role:
+            try:
+                if self.chain_indexer is not None:
+                    land_tuple = self.chain_indexer.get_land(listing_data.token_id)
+                else:
+                    land_tuple = self.land_registry_contract.land_parcels(listing_data.token_id)
+                land_data = parse_land_parcel_tuple(land_tuple)
+                if land_data.id != 0:
+                    land_address_display = f"#{listing_data.token_id} - {land_data.land_address}"
+            except:
+                pass
+
+        return tx_data.tx_id, tx_data, listing_data, role, land_address_display
+
+    def _upsert_transaction(self, tx_id, tx_data: TransactionData, listing_data: ListingData, role: str, land_address_display: str):
+        old_row = self.row_keys.remove(tx_id)
+        if old_row is not None:
+            self.table.removeRow(old_row)
+
+        if role:
+            self.add_transaction_row(tx_data, listing_data, role, land_address_display, self.row_keys.insert(tx_id))
+
+    def _fetch_transactions(self):
+        """(Chạy trên thread pool) Các lô [(TransactionData, ListingData)], giao dịch mới nhất trước."""
+        if self.chain_indexer is not None:
+            yield [
+                (parse_transaction_tuple(tx_tuple), parse_listing_tuple(listing_tuple))
+                for tx_tuple, listing_tuple in self.chain_indexer.get_transactions(address=self.user_account.address)
+            ]
+            return
 
-    def add_transaction_row(self, tx_data: TransactionData, listing_data: ListingData, role: str):
-        row = self.table.rowCount()
+        user_address = self.user_account.address
+
+        # Chỉ đọc giao dịch của chính người dùng: giao dịch đã mua + giao dịch trên các tin đã đăng.
+        # Danh sách id phải đủ mới sắp xếp được; lô rỗng sau mỗi trang để job huỷ được giữa chừng
+        tx_ids = set()
+        for page in iter_pages(self.marketplace_contract.get_txs_by_buyer, int, user_address):
+            tx_ids.update(page)
+            yield []
+        seller_listing_ids = []
+        for page in iter_pages(self.marketplace_contract.get_listings_by_seller, int, user_address):
+            seller_listing_ids.extend(page)
+            yield []
+        for listing_tx_ids in fetch_all_pages_each(self.marketplace_contract.get_txs_by_listing, int, seller_listing_ids):
+            tx_ids.update(listing_tx_ids)
+        yield []
+
+        # Mới nhất trước, mỗi lô PAGE_SIZE giao dịch
+        reader = BatchReader()
+        listings = {}
+        for tx_id_batch in iter_batches(sorted(tx_ids, reverse=True)):
+            user_txs = reader.map(self.marketplace_contract.transactions, tx_id_batch, parser=parse_transaction_tuple)
+            user_txs = [tx_data for tx_data in user_txs if tx_data]
+
+            # Bảng chỉ cần token và người bán của listing: đọc bản tóm tắt thay vì cả struct
+            listing_ids = sorted({tx_data.listing_id for tx_data in user_txs} - listings.keys())
+            listings.update(fetch_summaries(self.marketplace_contract.get_listing_summaries, listing_ids, parse_listing_summary))
+            yield [(tx_data, listings[tx_data.listing_id]) for tx_data in user_txs]
+
+    def add_transaction_row(self, tx_data: TransactionData, listing_data: ListingData, role: str, land_address_display: str, row=None):
+        if row is None:
+            row = self.table.rowCount()
         self.table.insertRow(row)
 
-        # 1. Lấy địa chỉ đất hiển thị
-        land_address_display = f"Listing #{tx_data.listing_id}"
-        try:
-            land_tuple = self.land_registry_contract.land_parcels(listing_data.token_id)
-            land_data = parse_land_parcel_tuple(land_tuple)
-            if land_data.id != 0:
-                land_address_display = f"#{listing_data.token_id} - {land_data.land_address}"
-        except:
-            pass
-
         status_map = {
             0: ("Đang chờ duyệt", Qt.blue),
             1: ("Thành công", Qt.green),
@@ -723,12 +1104,15 @@ class MyTransactionsTab(QWidget):
                 QMessageBox.critical(self, "Lỗi", f"Không thể hủy giao dịch: {e}")
 
 class MyLandTab(QWidget):
-    def __init__(self, user_account, land_registry_contract, land_nft_contract, marketplace_contract):
+    def __init__(self, user_account, land_registry_contract, land_nft_contract, marketplace_contract, chain_indexer=None):
         super().__init__()
         self.user_account = user_account
         self.land_registry_contract = land_registry_contract
         self.land_nft_contract = land_nft_contract 
         self.marketplace_contract = marketplace_contract
+        self.chain_indexer = chain_indexer
+        self.change_tracker = ChangeTracker(chain_indexer) if chain_indexer is not None else None
+        self.row_keys = RowKeys(descending=False)
         layout = QVBoxLayout(self)
 
         title = QLabel("Tài sản Bất động sản của bạn")
@@ -743,36 +1127,83 @@ class MyLandTab(QWidget):
         self.land_list_widget.setStyleSheet("QListWidget::item { border: 1px solid #ccc; border-radius: 5px; margin-bottom: 5px; }")
         layout.addWidget(self.land_list_widget)
 
+        # Chỉ cập nhật thửa đất thay đổi (đăng ký, duyệt, chuyển nhượng, đăng bán) từ lần hiển thị trước
+        self.loader = TabLoader(
+            self._fetch_rows, self._clear_rows, self._apply_rows, self._show_load_error,
+            fetch_changes=self._fetch_changed_rows, change_tracker=self.change_tracker, parent=self
+        )
+        self.loader.attach_button(self.refresh_button)
+
         self.populate_my_lands()
 
     def populate_my_lands(self):
+        self.loader.start()
+
+    def _clear_rows(self):
         self.land_list_widget.clear()
-        try:
-            owned_land_ids = self.land_registry_contract.get_lands_by_owner(self.user_account.address)
+        self.row_keys.reset()
+
+    def _apply_rows(self, rows):
+        for land_id, land_data, is_selling in rows:
+            self._upsert_land(land_id, land_data, is_selling)
+
+    def _show_load_error(self, message):
+        QMessageBox.critical(self, "Lỗi", f"Lỗi tải tài sản: {message}")
+
+    def _fetch_rows(self):
+        """(Chạy trên thread pool) Các lô [(land_id, LandParcelData, đang bán?)] của thửa đất người dùng sở hữu."""
+        for owned_lands, active_listing_tokens in self._fetch_my_lands():
+            yield [
+                (land_data.id, land_data, land_data.id in active_listing_tokens)
+                for land_data in owned_lands if land_data
+            ]
+
+    def _fetch_changed_rows(self, changes):
+        my_address = self.user_account.address.lower()
+        rows = []
+        for land_id in changes["lands"]:
+            land_data = None
+            if self.chain_indexer.get_land_owner(land_id).lower() == my_address:
+                land_data = parse_land_parcel_tuple(self.chain_indexer.get_land(land_id))
+            rows.append((land_id, land_data, self.chain_indexer.is_token_listed(land_id)))
+        yield rows
+
+    def _upsert_land(self, land_id, land_data, is_selling):
+        """Thay dòng của thửa đất; land_data rỗng (đã chuyển nhượng) hoặc bị từ chối thì gỡ dòng."""
+        old_row = self.row_keys.remove(land_id)
+        if old_row is not None:
+            self.land_list_widget.takeItem(old_row)
+
+        if land_data and (land_data.status == 1 or land_data.status == 0):
+            item_widget = LandListItemWidget(land_data, is_selling)
+            item_widget.sell_requested.connect(self.handle_sell_request)
             
-            active_listing_tokens = set()
-            next_listing_id = self.marketplace_contract.next_listing_id()
-            for i in range(1, next_listing_id):
-                l_tuple = self.marketplace_contract.listings(i)
-                l_data = parse_listing_tuple(l_tuple)
-                if l_data and (l_data.status == 1 or l_data.status == 0): 
-                    active_listing_tokens.add(l_data.token_id)
-
-            for land_id in owned_land_ids:
-                land_tuple = self.land_registry_contract.land_parcels(land_id)
-                land_data = parse_land_parcel_tuple(land_tuple)
-                
-                if land_data and (land_data.status == 1 or land_data.status == 0):
-                    is_selling = land_id in active_listing_tokens
-                    item_widget = LandListItemWidget(land_data, is_selling)
-                    item_widget.sell_requested.connect(self.handle_sell_request)
-                    
-                    list_item = QListWidgetItem(self.land_list_widget)
-                    list_item.setSizeHint(item_widget.sizeHint())
-                    self.land_list_widget.addItem(list_item)
-                    self.land_list_widget.setItemWidget(list_item, item_widget)
-        except Exception as e:
-            QMessageBox.critical(self, "Lỗi", f"Lỗi tải tài sản: {e}")
+            list_item = QListWidgetItem()
+            list_item.setSizeHint(item_widget.sizeHint())
+            self.land_list_widget.insertItem(self.row_keys.insert(land_id), list_item)
+            self.land_list_widget.setItemWidget(list_item, item_widget)
+
+    def _fetch_my_lands(self):
+        """Các lô (danh sách LandParcelData của người dùng, tập token đang được đăng bán), mỗi trang một lô."""
+        if self.chain_indexer is not None:
+            owned_lands = [
+                parse_land_parcel_tuple(land_tuple)
+                for land_tuple, _ in reversed(self.chain_indexer.get_lands(owner=self.user_account.address))
+            ]
+            yield owned_lands, self.chain_indexer.get_listed_token_ids()
+            return
+
+        for owned_lands in iter_pages(
+            self.land_registry_contract.get_lands_by_owner, parse_land_parcel_tuple, self.user_account.address
+        ):
+            owned_land_ids = [land.id for land in owned_lands]
+
+            # token_to_listing khác 0 nghĩa là token đang được đăng bán/đang giao dịch
+            listing_ids = BatchReader().map(self.marketplace_contract.token_to_listing, owned_land_ids)
+            active_listing_tokens = {
+                token_id for token_id, listing_id in zip(owned_land_ids, listing_ids) if listing_id
+            }
+            yield owned_lands, active_listing_tokens
             
     def handle_sell_request(self, token_id):
         print(f"Bắt đầu quy trình bán cho token #{token_id}")
@@ -786,10 +1217,12 @@ class MyLandTab(QWidget):
                     QMessageBox.warning(self, "Thông tin không hợp lệ", "Vui lòng nhập giá bán hợp lệ.")
                     return
                 
-                approved_addr = self.land_nft_contract.getApproved(token_id)
                 marketplace_addr = self.marketplace_contract.address
+                _, is_approved_all, approved_addr = self.land_nft_contract.get_transfer_eligibility(token_id, marketplace_addr)
+                needs_approval = not (is_approved_all or approved_addr.lower() == marketplace_addr.lower())
+                permit_sig = None
 
-                if approved_addr.lower() != marketplace_addr.lower():
+                if needs_approval:
                     reply = QMessageBox.question(
                         self, "Xác nhận Bán và Ủy quyền",
                         f"Bạn đang đăng bán Bất động sản #{token_id} với giá {price} Wei ({price_in_eth} ETH). \n\n"
@@ -798,16 +1231,24 @@ class MyLandTab(QWidget):
                     )
                     if reply == QMessageBox.No:
                         return
-                    
-                    print(f" -> Gửi giao dịch approve cho token #{token_id}...")
+
                     self.setCursor(Qt.WaitCursor)
-                    approve_receipt = self.land_nft_contract.approve(
-                        marketplace_addr,
-                        token_id,
-                        sender=self.user_account
-                    )
+                    if USE_PERMIT_LISTING:
+                        # Chỉ ký (không gửi giao dịch); ủy quyền và đăng bán đi chung một giao dịch bên dưới
+                        print(f" -> Ký permit ủy quyền cho token #{token_id}...")
+                        permit_deadline_ts = permit_deadline()
+                        permit_sig = sign_nft_permit(
+                            self.user_account, self.land_nft_contract, marketplace_addr, token_id, permit_deadline_ts
+                        )
+                    else:
+                        print(f" -> Gửi giao dịch approve cho token #{token_id}...")
+                        self.land_nft_contract.approve(
+                            marketplace_addr,
+                            token_id,
+                            sender=self.user_account
+                        )
+                        print(" -> Approve thành công.")
                     self.unsetCursor()
-                    print(" -> Approve thành công.")
 
                 self.setCursor(Qt.WaitCursor)
                 land_tuple = self.land_registry_contract.land_parcels(token_id)
@@ -828,13 +1269,24 @@ class MyLandTab(QWidget):
                 print(f" -> Bước 3: Gửi giao dịch create_listing với CCCD tự động: {seller_cccd}")
                 listing_fee = self.marketplace_contract.listing_fee()
                 
-                receipt = self.marketplace_contract.create_listing(
-                    token_id,
-                    seller_cccd,
-                    price,
-                    sender=self.user_account,
-                    value=listing_fee
-                )
+                if permit_sig is not None:
+                    receipt = self.marketplace_contract.create_listing_with_permit(
+                        token_id,
+                        seller_cccd,
+                        price,
+                        permit_deadline_ts,
+                        permit_sig,
+                        sender=self.user_account,
+                        value=listing_fee
+                    )
+                else:
+                    receipt = self.marketplace_contract.create_listing(
+                        token_id,
+                        seller_cccd,
+                        price,
+                        sender=self.user_account,
+                        value=listing_fee
+                    )
                 self.unsetCursor()
 
                 QMessageBox.information(self, "Thành công", f"Đã đăng bán bất động sản #{token_id} thành công!\nTx: {getattr(receipt, 'txn_hash', 'N/A')}")
@@ -919,6 +1371,11 @@ class RegisterLandTab(QWidget):
         history_layout.addWidget(self.history_table)
         layout.addWidget(history_group)
 
+        self.loader = TabLoader(
+            self._fetch_history, self._clear_history, self._apply_history_rows, self._show_load_error, parent=self
+        )
+        self.loader.attach_button(self.refresh_btn)
+
         self.populate_history()
         layout.addStretch(1) 
 
@@ -966,9 +1423,9 @@ class RegisterLandTab(QWidget):
             return
 
         try:
-            cccd_encrypted = encrypt_data(cccd_raw)
+            cccd_index = commit_cccd(cccd_raw)
             receipt = self.land_registry_contract.register_land(
-                land_address, area, cccd_encrypted, pdf_uri, image_uri,
+                land_address, area, cccd_index, pdf_uri, image_uri,
                 sender=self.user_account
             )
             QMessageBox.information(self, "Thành công", f"Đã gửi hồ sơ đăng ký thành công!\nTx: {getattr(receipt, 'txn_hash', 'N/A')}")
@@ -979,65 +1436,61 @@ class RegisterLandTab(QWidget):
             QMessageBox.critical(self, "Lỗi", f"Gửi hồ sơ thất bại: {e}")
     
     def populate_history(self):
-        if hasattr(self, 'refresh_btn'):
-            self.refresh_btn.setText("Đang tải...")
-            self.refresh_btn.setEnabled(False)
-            QApplication.processEvents()
+        self.loader.start()
 
+    def _clear_history(self):
         self.history_table.setRowCount(0)
-        try:
-            my_land_ids = self.land_registry_contract.get_lands_by_owner(self.user_account.address)
-            
-            if isinstance(my_land_ids, (list, tuple)):
-                my_land_ids = list(my_land_ids)
-                my_land_ids.reverse()
 
-            self.history_table.setRowCount(len(my_land_ids))
-            
-            for row, land_id in enumerate(my_land_ids):
-                land_tuple = self.land_registry_contract.land_parcels(land_id)
-                land_data = parse_land_parcel_tuple(land_tuple)
-                
-                if land_data:
-                    self.history_table.setItem(row, 0, QTableWidgetItem(str(land_data.id)))
-                    self.history_table.setItem(row, 1, QTableWidgetItem(land_data.land_address))
-
-                    area_item = QTableWidgetItem(str(land_data.area))
-                    area_item.setTextAlignment(Qt.AlignCenter)
-                    self.history_table.setItem(row, 2, area_item)
-
-                    status_text = "Chờ duyệt"
-                    color = Qt.blue
-                    if land_data.status == 1: 
-                        status_text = "Đã duyệt"
-                        color = Qt.green
-                    elif land_data.status == 2: 
-                        status_text = "Bị từ chối"
-                        color = Qt.red
-                    
-                    status_item = QTableWidgetItem(status_text)
-                    status_item.setForeground(color)
-                    status_item.setFont(QFont("Arial", 9, QFont.Bold))
-                    self.history_table.setItem(row, 3, status_item)
+    def _show_load_error(self, message):
+        print(f"Lỗi tải lịch sử: {message}")
 
-        except Exception as e:
-            print(f"Lỗi tải lịch sử: {e}")
-        
-        # Reset lại nút bấm
-        if hasattr(self, 'refresh_btn'):
-            self.refresh_btn.setText("Làm mới")
-            self.refresh_btn.setEnabled(True)
+    def _fetch_history(self):
+        """(Chạy trên thread pool) Hồ sơ đã đăng ký của người dùng, mỗi trang (cũ trước) một lô."""
+        return iter_pages(
+            self.land_registry_contract.get_lands_by_owner, parse_land_parcel_tuple, self.user_account.address
+        )
+
+    def _apply_history_rows(self, my_lands):
+        for land_data in my_lands:
+            if land_data:
+                # Trang đến theo thứ tự cũ trước: chèn lên đầu để hồ sơ mới nhất nằm trên cùng
+                row = 0
+                self.history_table.insertRow(row)
+                self.history_table.setItem(row, 0, QTableWidgetItem(str(land_data.id)))
+                self.history_table.setItem(row, 1, QTableWidgetItem(land_data.land_address))
+
+                area_item = QTableWidgetItem(str(land_data.area))
+                area_item.setTextAlignment(Qt.AlignCenter)
+                self.history_table.setItem(row, 2, area_item)
+
+                status_text = "Chờ duyệt"
+                color = Qt.blue
+                if land_data.status == 1: 
+                    status_text = "Đã duyệt"
+                    color = Qt.green
+                elif land_data.status == 2: 
+                    status_text = "Bị từ chối"
+                    color = Qt.red
+                
+                status_item = QTableWidgetItem(status_text)
+                status_item.setForeground(color)
+                status_item.setFont(QFont("Arial", 9, QFont.Bold))
+                self.history_table.setItem(row, 3, status_item)
 
 # =============================================================================
 # ADMIN TABS
 # =============================================================================
 
 class LandRegistryTab(QWidget):
-    def __init__(self, admin_account, land_registry_contract):
+    def __init__(self, admin_account, land_registry_contract, chain_indexer=None):
         super().__init__()
         
         self.admin_account = admin_account
         self.land_registry_contract = land_registry_contract
+        self.chain_indexer = chain_indexer
+        self.change_tracker = ChangeTracker(chain_indexer) if chain_indexer is not None else None
+        self.row_keys = RowKeys()
+        self.lands = {}  # land_id -> LandParcelData của các dòng đang hiển thị
 
         layout = QVBoxLayout(self)
 
@@ -1045,9 +1498,20 @@ class LandRegistryTab(QWidget):
         title.setStyleSheet("font-size: 18px; font-weight: bold; margin-bottom: 10px;")
         layout.addWidget(title)
         
+        toolbar = QHBoxLayout()
+        self.approve_selected_button = QPushButton("Duyệt mục đã chọn")
+        self.approve_selected_button.setStyleSheet("background-color: #4CAF50; color: white; font-weight: bold;")
+        self.approve_selected_button.clicked.connect(self.handle_approve_selected)
+        self.reject_selected_button = QPushButton("Từ chối mục đã chọn")
+        self.reject_selected_button.setStyleSheet("background-color: #f44336; color: white; font-weight: bold;")
+        self.reject_selected_button.clicked.connect(self.handle_reject_selected)
         self.refresh_button = QPushButton("Làm mới Danh sách")
         self.refresh_button.clicked.connect(self.populate_pending_lands)
-        layout.addWidget(self.refresh_button, alignment=Qt.AlignRight)
+        toolbar.addWidget(self.approve_selected_button)
+        toolbar.addWidget(self.reject_selected_button)
+        toolbar.addStretch()
+        toolbar.addWidget(self.refresh_button)
+        layout.addLayout(toolbar)
 
         self.pending_lands_table = QTableWidget()
         self.pending_lands_table.verticalHeader().setVisible(False)
@@ -1056,56 +1520,105 @@ class LandRegistryTab(QWidget):
         self.pending_lands_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.pending_lands_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeToContents)
         self.pending_lands_table.setEditTriggers(QTableWidget.NoEditTriggers) 
+        self.pending_lands_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.pending_lands_table.setSelectionMode(QTableWidget.ExtendedSelection)
         layout.addWidget(self.pending_lands_table)
+
+        # Chỉ cập nhật hồ sơ thay đổi từ lần hiển thị trước (mới đăng ký thì thêm, đã xử lý thì gỡ)
+        self.loader = TabLoader(
+            self._fetch_rows, self._clear_rows, self._apply_rows, self._show_load_error,
+            fetch_changes=self._fetch_changed_rows, change_tracker=self.change_tracker, parent=self
+        )
+        self.loader.attach_button(self.refresh_button)
         
         self.populate_pending_lands()
 
     def populate_pending_lands(self):
-        try:
-            self.pending_lands_table.setRowCount(0)
-            
-            next_id = self.land_registry_contract.next_land_id()
+        self.loader.start()
+
+    def _clear_rows(self):
+        self.pending_lands_table.setRowCount(0)
+        self.row_keys.reset()
+        self.lands = {}
+
+    def _apply_rows(self, rows):
+        for row in rows:
+            self._upsert_land_row(*row)
+
+    def _show_load_error(self, message):
+        QMessageBox.critical(self, "Lỗi Blockchain", f"Không thể tải dữ liệu từ contract: {message}")
+
+    def _fetch_rows(self):
+        """(Chạy trên thread pool) Bảng chỉ hiện commitment CCCD, giải mã trong hộp thoại chi tiết."""
+        for batch in self._fetch_lands():
+            yield [(land_data.id, land_data, land_owner) for land_data, land_owner in batch]
+
+    def _fetch_changed_rows(self, changes):
+        rows = []
+        for land_id in changes["lands"]:
+            land_data = parse_land_parcel_tuple(self.chain_indexer.get_land(land_id))
+            if land_data.status != 0:
+                rows.append((land_id, None, None))
+            else:
+                rows.append((land_id, land_data, self.chain_indexer.get_land_owner(land_id)))
+        yield rows
+
+    def _upsert_land_row(self, land_id, land_data, land_owner):
+        old_row = self.row_keys.remove(land_id)
+        if old_row is not None:
+            self.pending_lands_table.removeRow(old_row)
+        self.lands.pop(land_id, None)
+
+        if land_data:
+            self.lands[land_id] = land_data
+            row = self.row_keys.insert(land_id)
+            self.pending_lands_table.insertRow(row)
+
+            self.pending_lands_table.setItem(row, 0, QTableWidgetItem(str(land_id)))
+            self.pending_lands_table.setItem(row, 1, QTableWidgetItem(land_owner))
+            self.pending_lands_table.setItem(row, 2, QTableWidgetItem(masked_commitment(land_data.owner_cccd)))
+            self.pending_lands_table.setItem(row, 3, QTableWidgetItem(land_data.land_address))
             
-            all_lands = []
-            for i in range(next_id - 1, 0, -1):
-                all_lands.append(i)
-
-            self.pending_lands_table.setRowCount(len(all_lands))
-
-            for row, land_id in enumerate(all_lands):
-                land_tuple = self.land_registry_contract.land_parcels(land_id)
-                land_data = parse_land_parcel_tuple(land_tuple)
-                land_owner = self.land_registry_contract.get_land_owner(land_id)
-                cccd = decrypt_data(land_data.owner_cccd)
-
-                if land_data:
-                    self.pending_lands_table.setItem(row, 0, QTableWidgetItem(str(land_id)))
-                    self.pending_lands_table.setItem(row, 1, QTableWidgetItem(land_owner))
-                    self.pending_lands_table.setItem(row, 2, QTableWidgetItem(cccd))
-                    self.pending_lands_table.setItem(row, 3, QTableWidgetItem(land_data.land_address))
-                    
-                    status_text = "Chờ duyệt"
-                    color = Qt.blue
-                    if land_data.status == 1:
-                        status_text = "Đã duyệt"
-                        color = Qt.green
-                    elif land_data.status == 2:
-                        status_text = "Đã từ chối"
-                        color = Qt.red
-                    if land_data.status == 0:
-                        process_button = QPushButton("Xem & Xử lý")
-                        process_button.setStyleSheet("background-color: #2196F3; color: white; font-weight: bold;")
-                        process_button.clicked.connect(lambda checked, lid=land_id: self.show_detail_dialog(lid))
-                        self.pending_lands_table.setCellWidget(row, 5, process_button)
-                    else:
-                        self.pending_lands_table.setItem(row, 5, QTableWidgetItem("-"))
-                    status_item = QTableWidgetItem(status_text)
-                    status_item.setForeground(color)
-                    status_item.setFont(QFont("Arial", 9, QFont.Bold))
-                    self.pending_lands_table.setItem(row, 4, status_item)
+            status_text = "Chờ duyệt"
+            color = Qt.blue
+            if land_data.status == 1:
+                status_text = "Đã duyệt"
+                color = Qt.green
+            elif land_data.status == 2:
+                status_text = "Đã từ chối"
+                color = Qt.red
+            if land_data.status == 0:
+                process_button = QPushButton("Xem & Xử lý")
+                process_button.setStyleSheet("background-color: #2196F3; color: white; font-weight: bold;")
+                process_button.clicked.connect(lambda checked, lid=land_id: self.show_detail_dialog(lid))
+                self.pending_lands_table.setCellWidget(row, 5, process_button)
+            else:
+                self.pending_lands_table.setItem(row, 5, QTableWidgetItem("-"))
+            status_item = QTableWidgetItem(status_text)
+            status_item.setForeground(color)
+            status_item.setFont(QFont("Arial", 9, QFont.Bold))
+            self.pending_lands_table.setItem(row, 4, status_item)
+
+    def _fetch_lands(self):
+        """
+        (Chạy trên thread pool) Các lô [(LandParcelData, địa chỉ ví đăng ký)] của hồ sơ chờ duyệt,
+        mỗi trang hàng đợi một lô (bảng tự sắp mới nhất trước).
+        """
+        if self.chain_indexer is not None:
+            yield [
+                (parse_land_parcel_tuple(land_tuple), land_owner)
+                for land_tuple, land_owner in self.chain_indexer.get_lands(status=0)
+            ]
+            return
 
-        except Exception as e:
-            QMessageBox.critical(self, "Lỗi Blockchain", f"Không thể tải dữ liệu từ contract: {e}")
+        # Chỉ đọc hàng đợi chờ duyệt trên contract, không duyệt toàn bộ sổ đăng ký
+        for lands in iter_pages(self.land_registry_contract.get_pending, parse_land_parcel_tuple):
+            # Ví đăng ký lấy từ bản tóm tắt: mỗi lô ADMIN_BATCH_SIZE thửa một eth_call thay vì mỗi thửa một lời gọi
+            land_owners = fetch_summaries(
+                self.land_registry_contract.get_land_summaries, [land.id for land in lands],
+                lambda land_id, summary: tuple(summary)[2]
+            )
+            yield [(land, land_owners[land.id]) for land in lands]
 
     def show_detail_dialog(self, land_id):
         try:
@@ -1121,22 +1634,81 @@ class LandRegistryTab(QWidget):
         except Exception as e:
             QMessageBox.critical(self, "Lỗi", f"Không thể lấy chi tiết hồ sơ: {e}")
 
+    def _selected_pending_ids(self):
+        land_ids = [land_id for land_id in self.row_keys.selected(self.pending_lands_table) if self.lands[land_id].status == 0]
+        if not land_ids:
+            QMessageBox.information(self, "Chưa chọn hồ sơ", "Vui lòng chọn ít nhất một hồ sơ đang chờ duyệt.")
+        return land_ids
+
+    def handle_approve_selected(self):
+        land_ids = self._selected_pending_ids()
+        if not land_ids:
+            return
+        reply = QMessageBox.question(self, "Xác nhận Duyệt", f"Duyệt và mint NFT cho {len(land_ids)} hồ sơ đã chọn?")
+        if reply != QMessageBox.Yes:
+            return
+
+        try:
+            self.setCursor(Qt.WaitCursor)
+            # Mỗi NFT có metadata riêng -> vẫn tải từng file lên IPFS, nhưng chỉ ký ít giao dịch
+            metadata_uris = [upload_json_to_ipfs(build_land_metadata(land_id, self.lands[land_id])) for land_id in land_ids]
+            receipts = send_in_batches(
+                self.land_registry_contract.approve_lands, land_ids, metadata_uris, sender=self.admin_account
+            )
+            self.unsetCursor()
+            QMessageBox.information(self, "Thành công", f"Đã duyệt {len(land_ids)} hồ sơ trong {len(receipts)} giao dịch.")
+        except Exception as e:
+            self.unsetCursor()
+            QMessageBox.critical(self, "Lỗi", f"Duyệt hàng loạt thất bại: {e}")
+        self.populate_pending_lands()
+
+    def handle_reject_selected(self):
+        land_ids = self._selected_pending_ids()
+        if not land_ids:
+            return
+        reply = QMessageBox.question(self, "Xác nhận Từ chối", f"Từ chối {len(land_ids)} hồ sơ đã chọn?")
+        if reply != QMessageBox.Yes:
+            return
+
+        try:
+            receipts = send_in_batches(self.land_registry_contract.reject_lands, land_ids, sender=self.admin_account)
+            QMessageBox.information(self, "Thành công", f"Đã từ chối {len(land_ids)} hồ sơ trong {len(receipts)} giao dịch.")
+        except Exception as e:
+            QMessageBox.critical(self, "Lỗi", f"Từ chối hàng loạt thất bại: {e}")
+        self.populate_pending_lands()
+
 class AdminTransactionTab(QWidget):
-    def __init__(self, admin_account, marketplace_contract, land_nft_contract, land_registry_contract):
+    def __init__(self, admin_account, marketplace_contract, land_nft_contract, land_registry_contract, chain_indexer=None):
         super().__init__()
         self.admin_account = admin_account
         self.marketplace_contract = marketplace_contract
         self.land_nft_contract = land_nft_contract
         self.land_registry_contract = land_registry_contract
+        self.chain_indexer = chain_indexer
+        self.change_tracker = ChangeTracker(chain_indexer) if chain_indexer is not None else None
+        self.row_keys = RowKeys()
+        self.tx_statuses = {}  # tx_id -> trạng thái của các dòng đang hiển thị
+        self.buyer_cccds = {}  # tx_id -> commitment CCCD người mua, giải mã khi nhấp đúp
 
         layout = QVBoxLayout(self)
         title = QLabel("Quản lý Giao dịch Mua bán")
         title.setStyleSheet("font-size: 18px; font-weight: bold; margin-bottom: 10px;")
         layout.addWidget(title)
         
+        toolbar = QHBoxLayout()
+        self.approve_selected_button = QPushButton("Duyệt mục đã chọn")
+        self.approve_selected_button.setStyleSheet("background-color: #4CAF50; color: white; font-weight: bold;")
+        self.approve_selected_button.clicked.connect(self.handle_approve_selected)
+        self.reject_selected_button = QPushButton("Từ chối mục đã chọn")
+        self.reject_selected_button.setStyleSheet("background-color: #f44336; color: white; font-weight: bold;")
+        self.reject_selected_button.clicked.connect(self.handle_reject_selected)
         self.refresh_button = QPushButton("Làm mới Danh sách")
         self.refresh_button.clicked.connect(self.populate_pending_transactions)
-        layout.addWidget(self.refresh_button, alignment=Qt.AlignRight)
+        toolbar.addWidget(self.approve_selected_button)
+        toolbar.addWidget(self.reject_selected_button)
+        toolbar.addStretch()
+        toolbar.addWidget(self.refresh_button)
+        layout.addLayout(toolbar)
 
         self.transactions_table = QTableWidget()
         self.transactions_table.verticalHeader().setVisible(False)
@@ -1150,74 +1722,130 @@ class AdminTransactionTab(QWidget):
         self.transactions_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeToContents)
 
         self.transactions_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.transactions_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.transactions_table.setSelectionMode(QTableWidget.ExtendedSelection)
+        self.transactions_table.cellDoubleClicked.connect(self.show_buyer_cccd)
         layout.addWidget(self.transactions_table)
+
+        # Chỉ cập nhật dòng của giao dịch thay đổi từ lần hiển thị trước
+        self.loader = TabLoader(
+            self._fetch_rows, self._clear_rows, self._apply_rows, self._show_load_error,
+            fetch_changes=self._fetch_changed_rows, change_tracker=self.change_tracker, parent=self
+        )
+        self.loader.attach_button(self.refresh_button)
         
         self.populate_pending_transactions()
 
     def populate_pending_transactions(self):
+        self.loader.start()
+
+    def _clear_rows(self):
         self.transactions_table.setRowCount(0)
-        try:
-            next_tx_id = self.marketplace_contract.next_tx_id()
-            all_txs = []
-            for i in range(next_tx_id - 1, 0, -1):
-                tx_tuple = self.marketplace_contract.transactions(i)
-                tx_data = parse_transaction_tuple(tx_tuple)
-                if tx_data:
-                    all_txs.append(tx_data)
+        self.row_keys.reset()
+        self.tx_statuses = {}
+        self.buyer_cccds = {}
+
+    def _apply_rows(self, rows):
+        for row in rows:
+            self._upsert_transaction_row(*row)
+
+    def _show_load_error(self, message):
+        QMessageBox.critical(self, "Lỗi", f"Không thể tải danh sách giao dịch: {message}")
+
+    def _fetch_rows(self):
+        """(Chạy trên thread pool) Bảng chỉ hiện commitment CCCD người mua, giải mã khi nhấp đúp vào ô."""
+        return self._fetch_transactions()
+
+    def _fetch_changed_rows(self, changes):
+        rows = []
+        for tx_id in changes["transactions"]:
+            tx_tuple, listing_tuple = self.chain_indexer.get_transaction(tx_id)
+            rows.append((parse_transaction_tuple(tx_tuple), parse_listing_tuple(listing_tuple)))
+        yield rows
+
+    def _upsert_transaction_row(self, tx_data: TransactionData, listing_data: ListingData):
+        old_row = self.row_keys.remove(tx_data.tx_id)
+        if old_row is not None:
+            self.transactions_table.removeRow(old_row)
+
+        row = self.row_keys.insert(tx_data.tx_id)
+        self.transactions_table.insertRow(row)
+        self.tx_statuses[tx_data.tx_id] = tx_data.status
+        self.buyer_cccds[tx_data.tx_id] = tx_data.buyer_cccd
+
+        date_str = datetime.datetime.fromtimestamp(tx_data.created_at).strftime('%Y-%m-%d %H:%M')
+        
+        token_id = listing_data.token_id
+        seller_address = listing_data.seller_address 
+        
+        self.transactions_table.setItem(row, 0, QTableWidgetItem(str(tx_data.tx_id)))
+        self.transactions_table.setItem(row, 1, QTableWidgetItem(str(token_id)))
+        self.transactions_table.setItem(row, 2, QTableWidgetItem(seller_address))
+        self.transactions_table.setItem(row, 3, QTableWidgetItem(tx_data.buyer_address))
+        cccd_item = QTableWidgetItem(masked_commitment(tx_data.buyer_cccd))
+        cccd_item.setToolTip("Nhấp đúp để giải mã CCCD")
+        self.transactions_table.setItem(row, 4, cccd_item)
+        self.transactions_table.setItem(row, 5, QTableWidgetItem(f"{tx_data.amount / 10**18:.4f}"))
+        self.transactions_table.setItem(row, 6, QTableWidgetItem(date_str))
+
+        status_map = {
+            0: ("Chờ duyệt", Qt.blue),
+            1: ("Thành công", Qt.green),
+            2: ("Đã từ chối", Qt.red),
+            3: ("Người mua hủy", Qt.darkRed)
+        }
+        status_text, color = status_map.get(tx_data.status, ("Không rõ", Qt.black))
+        
+        status_item = QTableWidgetItem(status_text)
+        status_item.setForeground(color)
+        status_item.setFont(QFont("Arial", 9, QFont.Bold))
+        self.transactions_table.setItem(row, 7, status_item)
+
+        if tx_data.status == 0:
+            approve_button = QPushButton("Duyệt")
+            reject_button = QPushButton("Từ chối")
+            approve_button.setStyleSheet("background-color: #4CAF50; color: white; font-weight: bold;")
+            reject_button.setStyleSheet("background-color: #f44336; color: white; font-weight: bold;")
             
-            self.transactions_table.setRowCount(len(all_txs))
+            approve_button.clicked.connect(lambda checked, tid=tx_data.tx_id: self.handle_approve(tid))
+            reject_button.clicked.connect(lambda checked, tid=tx_data.tx_id: self.handle_reject(tid))
+
+            action_widget = QWidget()
+            action_layout = QHBoxLayout(action_widget)
+            action_layout.addWidget(approve_button)
+            action_layout.addWidget(reject_button)
+            action_layout.setContentsMargins(2, 2, 2, 2)
+            self.transactions_table.setCellWidget(row, 8, action_widget)
+        else:
+            self.transactions_table.setItem(row, 8, QTableWidgetItem("-"))
+
+    def _fetch_transactions(self):
+        """(Chạy trên thread pool) Các lô [(TransactionData, ListingData)] của toàn bộ giao dịch, mới nhất trước."""
+        if self.chain_indexer is not None:
+            yield [
+                (parse_transaction_tuple(tx_tuple), parse_listing_tuple(listing_tuple))
+                for tx_tuple, listing_tuple in self.chain_indexer.get_transactions()
+            ]
+            return
 
-            for row, tx_data in enumerate(all_txs):
-                listing_tuple = self.marketplace_contract.listings(tx_data.listing_id)
-                listing_data = parse_listing_tuple(listing_tuple)
-                buyer_cccd_encrypted = tx_data.buyer_cccd
-                date_str = datetime.datetime.fromtimestamp(tx_tuple.created_at).strftime('%Y-%m-%d %H:%M')
-                
-                buyer_cccd = decrypt_data(buyer_cccd_encrypted)
-                token_id = listing_data.token_id
-                seller_address = listing_data.seller_address 
-                
-                self.transactions_table.setItem(row, 0, QTableWidgetItem(str(tx_data.tx_id)))
-                self.transactions_table.setItem(row, 1, QTableWidgetItem(str(token_id)))
-                self.transactions_table.setItem(row, 2, QTableWidgetItem(seller_address))
-                self.transactions_table.setItem(row, 3, QTableWidgetItem(tx_data.buyer_address))
-                self.transactions_table.setItem(row, 4, QTableWidgetItem(buyer_cccd))
-                self.transactions_table.setItem(row, 5, QTableWidgetItem(f"{tx_data.amount / 10**18:.4f}"))
-                self.transactions_table.setItem(row, 6, QTableWidgetItem(date_str))
-
-                status_map = {
-                    0: ("Chờ duyệt", Qt.blue),
-                    1: ("Thành công", Qt.green),
-                    2: ("Đã từ chối", Qt.red),
-                    3: ("Người mua hủy", Qt.darkRed)
-                }
-                status_text, color = status_map.get(tx_data.status, ("Không rõ", Qt.black))
-                
-                status_item = QTableWidgetItem(status_text)
-                status_item.setForeground(color)
-                status_item.setFont(QFont("Arial", 9, QFont.Bold))
-                self.transactions_table.setItem(row, 7, status_item)
+        reader = BatchReader()
+        listings = {}
+        next_tx_id = self.marketplace_contract.next_tx_id()
+        for tx_id_batch in iter_batches(range(next_tx_id - 1, 0, -1)):
+            txs = reader.map(self.marketplace_contract.transactions, tx_id_batch, parser=parse_transaction_tuple)
+            txs = [tx_data for tx_data in txs if tx_data]
 
-                if tx_data.status == 0:
-                    approve_button = QPushButton("Duyệt")
-                    reject_button = QPushButton("Từ chối")
-                    approve_button.setStyleSheet("background-color: #4CAF50; color: white; font-weight: bold;")
-                    reject_button.setStyleSheet("background-color: #f44336; color: white; font-weight: bold;")
-                    
-                    approve_button.clicked.connect(lambda checked, tid=tx_data.tx_id: self.handle_approve(tid))
-                    reject_button.clicked.connect(lambda checked, tid=tx_data.tx_id: self.handle_reject(tid))
-
-                    action_widget = QWidget()
-                    action_layout = QHBoxLayout(action_widget)
-                    action_layout.addWidget(approve_button)
-                    action_layout.addWidget(reject_button)
-                    action_layout.setContentsMargins(2, 2, 2, 2)
-                    self.transactions_table.setCellWidget(row, 8, action_widget)
-                else:
-                    self.transactions_table.setItem(row, 8, QTableWidgetItem("-"))
+            listing_ids = sorted({tx_data.listing_id for tx_data in txs} - listings.keys())
+            listings.update(fetch_summaries(self.marketplace_contract.get_listing_summaries, listing_ids, parse_listing_summary))
+            yield [(tx_data, listings[tx_data.listing_id]) for tx_data in txs]
 
-        except Exception as e:
-            QMessageBox.critical(self, "Lỗi", f"Không thể tải danh sách giao dịch: {e}")
+    def show_buyer_cccd(self, row, column):
+        if column != 4:
+            return
+        tx_id = int(self.transactions_table.item(row, 0).text())
+        commitment = self.buyer_cccds.get(tx_id)
+        if commitment:
+            self.transactions_table.item(row, 4).setText(decrypt_cccd(commitment))
 
     def handle_approve(self, tx_id):
         reply = QMessageBox.question(self, "Xác nhận Duyệt", f"Bạn có chắc chắn muốn duyệt giao dịch #{tx_id} không?")
@@ -1239,6 +1867,44 @@ class AdminTransactionTab(QWidget):
             except Exception as e:
                 QMessageBox.critical(self, "Lỗi", f"Từ chối giao dịch thất bại: {e}")
 
+    def _selected_pending_ids(self):
+        tx_ids = [tx_id for tx_id in self.row_keys.selected(self.transactions_table) if self.tx_statuses[tx_id] == 0]
+        if not tx_ids:
+            QMessageBox.information(self, "Chưa chọn giao dịch", "Vui lòng chọn ít nhất một giao dịch đang chờ duyệt.")
+        return tx_ids
+
+    def handle_approve_selected(self):
+        tx_ids = self._selected_pending_ids()
+        if not tx_ids:
+            return
+        reply = QMessageBox.question(self, "Xác nhận Duyệt", f"Duyệt {len(tx_ids)} giao dịch đã chọn?")
+        if reply != QMessageBox.Yes:
+            return
+
+        try:
+            receipts = send_in_batches(self.marketplace_contract.approve_transactions, tx_ids, sender=self.admin_account)
+            QMessageBox.information(self, "Thành công", f"Đã duyệt {len(tx_ids)} giao dịch trong {len(receipts)} giao dịch blockchain.")
+        except Exception as e:
+            QMessageBox.critical(self, "Lỗi", f"Duyệt hàng loạt thất bại: {e}")
+        self.populate_pending_transactions()
+
+    def handle_reject_selected(self):
+        tx_ids = self._selected_pending_ids()
+        if not tx_ids:
+            return
+        reason, ok = QInputDialog.getText(self, "Lý do Từ chối", f"Nhập lý do từ chối chung cho {len(tx_ids)} giao dịch:")
+        if not ok:
+            return
+
+        try:
+            receipts = send_in_batches(
+                self.marketplace_contract.reject_transactions, tx_ids, [reason] * len(tx_ids), sender=self.admin_account
+            )
+            QMessageBox.information(self, "Thành công", f"Đã từ chối {len(tx_ids)} giao dịch trong {len(receipts)} giao dịch blockchain.")
+        except Exception as e:
+            QMessageBox.critical(self, "Lỗi", f"Từ chối hàng loạt thất bại: {e}")
+        self.populate_pending_transactions()
+
 class SystemConfigTab(QWidget):
     def __init__(self, admin_account, marketplace_contract, parent=None):
         super().__init__(parent)
@@ -1265,24 +1931,39 @@ class SystemConfigTab(QWidget):
         fees_layout.addRow("", self.edit_fees_button)
 
         main_layout.addWidget(fees_group)
+
+        self.loader = TabLoader(self._fetch_fees, lambda: None, self._apply_fees, self._show_load_error, parent=self)
         self.load_current_fees()
 
     def load_current_fees(self):
-        try:
-            listing_fee = self.marketplace_contract.listing_fee() / 10**18
-            cancel_penalty = self.marketplace_contract.cancel_penalty() / 10**18
-            
-            self.listing_fee_label.setText(f"{listing_fee} ETH")
-            self.cancel_penalty_label.setText(f"{cancel_penalty} ETH")
-            
-            self.listing_fee_label.setStyleSheet("font-style: normal; font-weight: bold;")
-            self.cancel_penalty_label.setStyleSheet("font-style: normal; font-weight: bold;")
+        self.loader.start()
+
+    def _fetch_fees(self):
+        """(Chạy trên thread pool) Hai giá trị phí gửi chung một batch."""
+        reader = BatchReader()
+        reader.add(self.marketplace_contract.listing_fee)
+        reader.add(self.marketplace_contract.cancel_penalty)
+        fees = reader.execute()
+        if None in fees:
+            raise Exception("Không đọc được phí từ contract")
+        return [[tuple(fees)]]
+
+    def _apply_fees(self, rows):
+        listing_fee, cancel_penalty = rows[0]
+        listing_fee = listing_fee / 10**18
+        cancel_penalty = cancel_penalty / 10**18
+        
+        self.listing_fee_label.setText(f"{listing_fee} ETH")
+        self.cancel_penalty_label.setText(f"{cancel_penalty} ETH")
+        
+        self.listing_fee_label.setStyleSheet("font-style: normal; font-weight: bold;")
+        self.cancel_penalty_label.setStyleSheet("font-style: normal; font-weight: bold;")
 
-        except Exception as e:
-            error_message = f"Lỗi: {e}"
-            self.listing_fee_label.setText(error_message)
-            self.cancel_penalty_label.setText(error_message)
-            QMessageBox.critical(self, "Lỗi Blockchain", f"Không thể tải dữ liệu phí: {e}")
+    def _show_load_error(self, message):
+        error_message = f"Lỗi: {message}"
+        self.listing_fee_label.setText(error_message)
+        self.cancel_penalty_label.setText(error_message)
+        QMessageBox.critical(self, "Lỗi Blockchain", f"Không thể tải dữ liệu phí: {message}")
 
     def edit_fees(self):
         try:
@@ -1330,6 +2011,87 @@ class SystemConfigTab(QWidget):
                 except Exception as e:
                     QMessageBox.critical(self, "Lỗi Giao dịch", f"Cập nhật phí thất bại: {e}")   
 
+class DiagnosticsTab(QWidget):
+    COLUMNS = ["Contract", "Hàm", "Tab", "Hành động", "Số lần gọi", "Lỗi",
+               "TB (ms)", "p95 (ms)", "Max (ms)", "Gửi (B)", "Nhận (B)"]
+
+    def __init__(self, metrics, contract_cache=None, parent=None):
+        super().__init__(parent)
+        self.metrics = metrics
+        self.contract_cache = contract_cache
+
+        layout = QVBoxLayout(self)
+        title = QLabel("Thống kê lời gọi Contract (RPC)")
+        title.setFont(QFont("Arial", 16, QFont.Bold))
+        layout.addWidget(title)
+
+        self.summary_label = QLabel()
+        layout.addWidget(self.summary_label)
+
+        buttons = QHBoxLayout()
+        self.refresh_button = QPushButton("Làm mới")
+        self.refresh_button.clicked.connect(self.refresh)
+        self.export_button = QPushButton("Xuất JSON")
+        self.export_button.clicked.connect(self.export_json)
+        self.reset_button = QPushButton("Đặt lại")
+        self.reset_button.clicked.connect(self.reset_metrics)
+        buttons.addWidget(self.refresh_button)
+        buttons.addWidget(self.export_button)
+        buttons.addWidget(self.reset_button)
+        buttons.addStretch()
+        layout.addLayout(buttons)
+
+        self.table = QTableWidget()
+        self.table.setColumnCount(len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        layout.addWidget(self.table)
+
+        self.refresh()
+
+    def refresh(self):
+        entries = self.metrics.snapshot()
+        self.table.setRowCount(0)
+        for entry in entries:
+            row = self.table.rowCount()
+            self.table.insertRow(row)
+            method = entry["method"]
+            if entry["batched_calls"]:
+                method = f"{method} ({entry['batched_calls']} lệnh)"
+            values = [
+                entry["contract"], method, entry["tab"], entry["action"],
+                str(entry["calls"]), str(entry["errors"]),
+                f"{entry['avg_ms']:.1f}", f"{entry['p95_ms']:.0f}", f"{entry['max_ms']:.1f}",
+                str(entry["request_bytes"]), str(entry["response_bytes"]),
+            ]
+            for column, value in enumerate(values):
+                self.table.setItem(row, column, QTableWidgetItem(value))
+
+        total_calls = sum(entry["calls"] for entry in entries)
+        total_ms = sum(entry["total_ms"] for entry in entries)
+        summary = f"Tổng: {total_calls} lời gọi, {total_ms:.0f} ms"
+        if self.contract_cache is not None:
+            summary += f" | Cache: {self.contract_cache.hits} trúng / {self.contract_cache.misses} trượt"
+        self.summary_label.setText(summary)
+
+    def export_json(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Xuất thống kê RPC", "rpc_metrics.json", "JSON (*.json)")
+        if not path:
+            return
+        try:
+            self.metrics.dump_json(path)
+            QMessageBox.information(self, "Thành công", f"Đã lưu thống kê vào:\n{path}")
+        except Exception as e:
+            QMessageBox.critical(self, "Lỗi", f"Không thể lưu file: {e}")
+
+    def reset_metrics(self):
+        self.metrics.reset()
+        if self.contract_cache is not None:
+            self.contract_cache.hits = 0
+            self.contract_cache.misses = 0
+        self.refresh()
+
 # =============================================================================
 # SHARED TABS
 # =============================================================================
@@ -1497,6 +2259,9 @@ class MainWindow(QMainWindow):
             self.land_registry_contract = self.mock_registry
             self.land_nft_contract = self.mock_nft
             self.marketplace_contract = self.mock_marketplace
+            self.chain_indexer = None
+            self.contract_cache = None
+            self.instrument_contracts()
         else:
             print(f"Đang kết nối tới Geth tại {NODE_URL}...")
             try:
@@ -1515,6 +2280,22 @@ class MainWindow(QMainWindow):
                 self.marketplace_contract = project.Marketplace.at(MARKETPLACE_ADDRESS)
                 
                 print("Đã tải xong 3 Contracts.")
+                self.instrument_contracts()
+
+                self.chain_indexer = None
+                if USE_CHAIN_INDEXER:
+                    self.chain_indexer = ChainIndexer(
+                        self.land_registry_contract, self.land_nft_contract, self.marketplace_contract
+                    )
+                    print(f"Chỉ mục cục bộ đã đồng bộ tới block {self.chain_indexer.sync()}.")
+
+                # Các tab dùng proxy có cache; chỉ mục giữ contract gốc (chỉ bọc đo đạc)
+                self.contract_cache = None
+                if USE_CONTRACT_CACHE:
+                    self.contract_cache = ContractCache()
+                    self.land_nft_contract = CachedContract(self.land_nft_contract, self.contract_cache)
+                    self.land_registry_contract = CachedContract(self.land_registry_contract, self.contract_cache)
+                    self.marketplace_contract = CachedContract(self.marketplace_contract, self.contract_cache)
 
             except Exception as e:
                 error_msg = f"Lỗi kết nối Blockchain:\n{e}\n\nHãy đảm bảo Geth đang chạy và bạn đang ở đúng thư mục dự án Ape."
@@ -1523,6 +2304,12 @@ class MainWindow(QMainWindow):
                 # Fallback về Mock hoặc đóng app tùy logic
                 sys.exit(1)
 
+    def instrument_contracts(self):
+        """Bọc 3 contract để đếm lời gọi / đo độ trễ (cache bọc bên ngoài nên lần trúng cache không bị tính)."""
+        self.land_nft_contract = InstrumentedContract(self.land_nft_contract, "LandNFT")
+        self.land_registry_contract = InstrumentedContract(self.land_registry_contract, "LandRegistry")
+        self.marketplace_contract = InstrumentedContract(self.marketplace_contract, "Marketplace")
+
     def show_login_ui(self):
         self.central_widget.setCurrentWidget(self.login_page)
 
@@ -1533,14 +2320,16 @@ class MainWindow(QMainWindow):
             
         tabs = QTabWidget()
         
-        self.land_registry_tab = LandRegistryTab(admin_account, self.land_registry_contract)
-        self.admin_transaction_tab = AdminTransactionTab(admin_account, self.marketplace_contract, self.land_nft_contract, self.land_registry_contract)
+        self.land_registry_tab = LandRegistryTab(admin_account, self.land_registry_contract, self.chain_indexer)
+        self.admin_transaction_tab = AdminTransactionTab(admin_account, self.marketplace_contract, self.land_nft_contract, self.land_registry_contract, self.chain_indexer)
         self.config_tab = SystemConfigTab(admin_account, self.marketplace_contract)
+        self.diagnostics_tab = DiagnosticsTab(RPC_METRICS, self.contract_cache)
         self.settings_tab = SettingsTab(admin_account, self) 
         
         tabs.addTab(self.land_registry_tab, "Land Registry")
         tabs.addTab(self.admin_transaction_tab, "Transactions")
         tabs.addTab(self.config_tab, "Config")
+        tabs.addTab(self.diagnostics_tab, "Diagnostics")
         tabs.addTab(self.settings_tab, "Settings")
         
         layout = QVBoxLayout(container)
@@ -1555,9 +2344,9 @@ class MainWindow(QMainWindow):
         tabs = QTabWidget()
         
         self.register_tab = RegisterLandTab(user_account, self.land_registry_contract)
-        self.marketplace_tab = MarketplaceTab(user_account, self.marketplace_contract, self.land_registry_contract, self.land_nft_contract)
-        self.my_account_tab = MyLandTab(user_account, self.land_registry_contract, self.land_nft_contract, self.marketplace_contract)
-        self.transaction_history_tab = MyTransactionsTab(user_account, self.marketplace_contract, self.land_registry_contract, self.land_nft_contract)
+        self.marketplace_tab = MarketplaceTab(user_account, self.marketplace_contract, self.land_registry_contract, self.land_nft_contract, self.chain_indexer)
+        self.my_account_tab = MyLandTab(user_account, self.land_registry_contract, self.land_nft_contract, self.marketplace_contract, self.chain_indexer)
+        self.transaction_history_tab = MyTransactionsTab(user_account, self.marketplace_contract, self.land_registry_contract, self.land_nft_contract, self.chain_indexer)
         self.settings_tab = SettingsTab(user_account, self)
         
         tabs.addTab(self.register_tab, "Register Land")
@@ -1576,6 +2365,8 @@ class MainWindow(QMainWindow):
 
     def closeEvent(self, event):
         """Ngắt kết nối an toàn khi đóng App"""
+        # Chờ các job tải nền đang dở (đã huỷ hoặc chưa) trước khi đóng provider
+        QThreadPool.globalInstance().waitForDone(5000)
         if hasattr(self, 'provider_context') and not USE_MOCK_DATA:
             print("Đang ngắt kết nối mạng...")
             self.provider_context.__exit__(None, None, None)
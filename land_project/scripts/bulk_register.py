@@ -0,0 +1,148 @@
+# file: bulk_register.py
+"""
+Đăng ký hàng loạt hồ sơ đất từ sổ địa chính cũ qua LandRegistry.register_lands.
+
+Cách dùng (chạy trong thư mục land_project):
+    ape run bulk_register parcels.csv --account voter1
+    ape run bulk_register parcels.jsonl --account voter1 --chunk-size 25 --workers 16
+
+File đầu vào (CSV có dòng tiêu đề, hoặc JSONL mỗi dòng một object) gồm các cột:
+    land_address, area, cccd, pdf, image
+`pdf` / `image` là URI "ipfs://..." có sẵn hoặc đường dẫn file cục bộ (sẽ được tải lên IPFS).
+
+Tiến độ được lưu vào file checkpoint sau mỗi lô đã xác nhận; chạy lại cùng lệnh sẽ tiếp tục
+từ lô chưa gửi. Lưu ý: nếu script dừng khi một lô đã gửi nhưng chưa kịp ghi checkpoint,
+lô đó sẽ bị đăng ký lại ở lần chạy sau - kiểm tra tx cuối trong log trước khi chạy lại.
+"""
+import csv
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+import click
+from ape import accounts, networks, project
+
+from app_modules.crypto_utils import encrypt_cccd, remember_ciphertexts
+from app_modules.ipfs_utils import upload_file_to_ipfs
+
+NODE_URL = "http://192.168.0.140:8545"
+LAND_REGISTRY_ADDRESS = "0x9FfDa9D1FeDdF35a26D2F68a50Fd600e68696469"
+CHUNK_SIZE = 50   # Khớp MAX_REGISTER_BATCH của LandRegistry.register_lands
+WORKERS = 8       # Số luồng tải tài liệu lên IPFS / mã hóa CCCD song song
+
+
+def read_parcels(path):
+    """Đọc lần lượt từng hồ sơ (dict) từ file CSV hoặc JSONL, không nạp cả file vào bộ nhớ."""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.lower().endswith((".jsonl", ".ndjson")):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+def chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def resolve_document(value):
+    """Giữ nguyên URI ipfs:// có sẵn, còn đường dẫn file cục bộ thì tải lên IPFS."""
+    value = value.strip()
+    if value.startswith("ipfs://"):
+        return value
+    return f"ipfs://{upload_file_to_ipfs(value)}"
+
+
+def prepare_parcel(parcel):
+    """
+    (Chạy trên thread pool) Chuẩn bị đủ tham số on-chain cho một hồ sơ.
+    Trả về (tham số, (blind index, bản mã)); bản mã được ghi vào kho cục bộ một lần cho cả lô.
+    """
+    blind_index, ciphertext = encrypt_cccd(str(parcel["cccd"]).strip())
+    params = (
+        parcel["land_address"].strip(),
+        int(parcel["area"]),
+        blind_index,
+        resolve_document(parcel["pdf"]),
+        resolve_document(parcel["image"]),
+    )
+    return params, (blind_index, ciphertext)
+
+
+def load_checkpoint(path, input_path):
+    if not os.path.exists(path):
+        return 0
+    with open(path, "r", encoding="utf-8") as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("input") != os.path.abspath(input_path):
+        raise click.ClickException(f"Checkpoint {path} thuộc file khác: {checkpoint.get('input')}")
+    return checkpoint["next_row"]
+
+
+def save_checkpoint(path, input_path, next_row, last_tx):
+    # Ghi ra file tạm rồi đổi tên để không bao giờ để lại checkpoint hỏng
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"input": os.path.abspath(input_path), "next_row": next_row, "last_tx": last_tx}, f, indent=4)
+    os.replace(tmp_path, path)
+
+
+@click.command()
+@click.argument("input_path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--account", "account_alias", required=True, help="Alias tài khoản ape dùng để ký giao dịch.")
+@click.option("--passphrase", envvar="BULK_REGISTER_PASSPHRASE", prompt=True, hide_input=True)
+@click.option("--registry", default=LAND_REGISTRY_ADDRESS, show_default=True)
+@click.option("--node-url", default=NODE_URL, show_default=True)
+@click.option("--chunk-size", default=CHUNK_SIZE, show_default=True, type=click.IntRange(1, CHUNK_SIZE))
+@click.option("--workers", default=WORKERS, show_default=True, type=click.IntRange(1))
+@click.option("--checkpoint", "checkpoint_path", default=None, help="Mặc định: <input>.checkpoint.json")
+def cli(input_path, account_alias, passphrase, registry, node_url, chunk_size, workers, checkpoint_path):
+    checkpoint_path = checkpoint_path or f"{input_path}.checkpoint.json"
+    start_row = load_checkpoint(checkpoint_path, input_path)
+    if start_row:
+        print(f"Tiếp tục từ hồ sơ thứ {start_row} (checkpoint {checkpoint_path}).")
+
+    with networks.ethereum.local.use_provider(node_url):
+        account = accounts.load(account_alias)
+        account.set_autosign(True, passphrase=passphrase)
+        land_registry = project.LandRegistry.at(registry)
+
+        parcels = islice(read_parcels(input_path), start_row, None)
+        registered = 0
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            next_row = start_row
+            batches = chunks(parcels, chunk_size)
+            # Chuẩn bị lô kế tiếp (IPFS + mã hóa) trong lúc lô hiện tại chờ xác nhận trên chuỗi
+            pending = [executor.submit(prepare_parcel, parcel) for parcel in next(batches, [])]
+            while pending:
+                chunk_started = time.perf_counter()
+                prepared, ciphertexts = zip(*(future.result() for future in pending))
+                pending = [executor.submit(prepare_parcel, parcel) for parcel in next(batches, [])]
+                remember_ciphertexts(ciphertexts)
+
+                receipt = land_registry.register_lands(*(list(column) for column in zip(*prepared)), sender=account)
+
+                next_row += len(prepared)
+                registered += len(prepared)
+                save_checkpoint(checkpoint_path, input_path, next_row, str(receipt.txn_hash))
+
+                elapsed = time.perf_counter() - started
+                print(
+                    f"Đã đăng ký {registered} hồ sơ (tới dòng {next_row}) | "
+                    f"lô {len(prepared)} hồ sơ / {time.perf_counter() - chunk_started:.1f}s | "
+                    f"{registered / elapsed:.1f} hồ sơ/giây | tx {receipt.txn_hash}"
+                )
+
+        elapsed = time.perf_counter() - started
+        rate = registered / elapsed if elapsed else 0.0
+        print(f"Hoàn tất: {registered} hồ sơ trong {elapsed:.1f}s ({rate:.1f} hồ sơ/giây).")
@@ -97,6 +97,14 @@ def main():
             else:
                 print(f"   ❌ FAIL: NFT đang thuộc về {owner}.")
 
+            # Danh mục NFT của Buyer đọc thẳng từ LandNFT (ERC-721 Enumerable), không qua Registry
+            buyer_tokens, _ = land_nft.tokens_of_owner(buyer.address, 0, 100)
+            print(f"   + Tổng số NFT: {land_nft.totalSupply()} | Buyer đang giữ: {list(buyer_tokens)}")
+            if land_id in buyer_tokens:
+                print("   ✅ PASS: Token nằm trong danh mục của Buyer.")
+            else:
+                print("   ❌ FAIL: Danh mục của Buyer không chứa token.")
+
             # Kiểm tra dữ liệu lưu trong NFT struct (nếu có)
             nft_data = land_nft.get_land_data(land_id)
             nft_cccd = nft_data.owner_cccd
@@ -1,5 +1,12 @@
+import os
+import sys
+
 import pytest
 import ape
+from eth_account.messages import encode_typed_data
+
+# `ape run` chạy script từ thư mục project nên import được app_modules; `ape test` thì không
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 @pytest.fixture
 def owner(accounts):
@@ -34,6 +41,36 @@ def marketplace(project, land_nft, owner):
 
 @pytest.fixture
 def minted_token_id(land_registry, land_nft, owner, seller):
-    land_registry.register_land("Addr", 100, "CCCD_SELLER", "pdf", "img", sender=seller)
+    land_registry.register_land("Addr", 100, b"CCCD_SELLER", "pdf", "img", sender=seller)
     land_registry.approve_land(1, "meta_uri", sender=owner)
-    return 1
\ No newline at end of file
+    return 1
+
+@pytest.fixture
+def sign_permit(land_nft, chain):
+    """Ký permit EIP-4494 của LandNFT: sign(signer, spender, token_id, deadline=None, nonce=None) -> 65 byte."""
+    def sign(signer, spender, token_id, deadline=None, nonce=None):
+        if deadline is None:
+            deadline = chain.pending_timestamp + 3600
+        if nonce is None:
+            nonce = land_nft.nonces(token_id)
+        message = encode_typed_data(full_message={
+            "types": {
+                "EIP712Domain": [
+                    {"name": "name", "type": "string"},
+                    {"name": "version", "type": "string"},
+                    {"name": "chainId", "type": "uint256"},
+                    {"name": "verifyingContract", "type": "address"},
+                ],
+                "Permit": [
+                    {"name": "spender", "type": "address"},
+                    {"name": "tokenId", "type": "uint256"},
+                    {"name": "nonce", "type": "uint256"},
+                    {"name": "deadline", "type": "uint256"},
+                ],
+            },
+            "primaryType": "Permit",
+            "domain": {"name": "LandNFT", "version": "1", "chainId": chain.chain_id, "verifyingContract": land_nft.address},
+            "message": {"spender": str(spender), "tokenId": token_id, "nonce": nonce, "deadline": deadline},
+        })
+        return signer.sign_message(message).encode_rsv()
+    return sign
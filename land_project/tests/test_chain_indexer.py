@@ -0,0 +1,92 @@
+import pytest
+
+from app_modules.chain_indexer import ChainIndexer, ChangeTracker
+
+LISTING_FEE = 1000
+PRICE = 5000
+
+
+@pytest.fixture
+def indexer(tmp_path, land_registry, land_nft, marketplace):
+    return ChainIndexer(land_registry, land_nft, marketplace, db_path=str(tmp_path / "index.db"))
+
+
+def _cccd(value):
+    return "0x" + value.ljust(32, b"\0").hex()
+
+
+def test_projects_events(indexer, land_registry, land_nft, marketplace, owner, seller, buyer, minted_token_id):
+    land_registry.register_land("Addr 2", 200, b"CCCD_SELLER", "pdf2", "img2", sender=seller)
+    land_nft.approve(marketplace.address, minted_token_id, sender=seller)
+    marketplace.create_listing(minted_token_id, b"CCCD_S", PRICE, sender=seller, value=LISTING_FEE)
+    marketplace.initiate_transaction(1, b"CCCD_B", sender=buyer, value=PRICE)
+    marketplace.buyer_cancel(1, sender=buyer)
+    marketplace.initiate_transaction(1, b"CCCD_B2", sender=buyer, value=PRICE)
+    marketplace.approve_transaction(2, sender=owner)
+
+    indexer.sync()
+
+    assert indexer.get_land(1) == (1, "Addr", 100, _cccd(b"CCCD_B2"), 1, "pdf", "img")
+    assert indexer.get_land_owner(1) == buyer.address
+    assert [(land[0], land[4], land_owner) for land, land_owner in indexer.get_lands(status=0)] == [(2, 0, seller.address)]
+
+    tx, listing = indexer.get_transaction(2)
+    assert tx[:6] == (2, 1, _cccd(b"CCCD_B2"), buyer.address, PRICE, 1)
+    assert listing[:6] == (1, minted_token_id, _cccd(b"CCCD_S"), seller.address, PRICE, 2)
+    assert indexer.get_transaction(1)[0][5] == 3  # Người mua hủy
+    assert [tx[0] for tx, _ in indexer.get_transactions(address=seller.address)] == [2, 1]
+    assert not indexer.is_token_listed(minted_token_id)
+
+
+def test_change_tracker(indexer, land_nft, marketplace, seller, buyer, minted_token_id):
+    tracker = ChangeTracker(indexer)
+
+    def poll():
+        changes, mark = tracker.poll()
+        tracker.commit(mark)
+        return changes
+
+    assert poll() is None  # Lần đầu vẽ lại toàn bộ
+    land_nft.approve(marketplace.address, minted_token_id, sender=seller)
+    marketplace.create_listing(minted_token_id, b"CCCD_S", PRICE, sender=seller, value=LISTING_FEE)
+    assert poll() == {"lands": {1}, "listings": {1}, "transactions": set()}
+
+    marketplace.initiate_transaction(1, b"CCCD_B", sender=buyer, value=PRICE)
+    assert poll() == {"lands": {1}, "listings": {1}, "transactions": {1}}
+    assert indexer.get_listing(1)[5] == 1
+
+
+def test_rewind_on_reorg(chain, indexer, land_nft, marketplace, seller, buyer, minted_token_id):
+    land_nft.approve(marketplace.address, minted_token_id, sender=seller)
+    marketplace.create_listing(minted_token_id, b"CCCD_S", PRICE, sender=seller, value=LISTING_FEE)
+    indexer.sync()
+    snapshot = chain.snapshot()
+
+    marketplace.initiate_transaction(1, b"CCCD_B", sender=buyer, value=PRICE)
+    indexer.sync()
+    assert indexer.get_transaction(1) is not None
+
+    # Nhánh khác thay thế block chứa giao dịch -> chỉ mục tua lại về block chung
+    chain.restore(snapshot)
+    chain.mine(3)
+    generation = indexer.generation
+    indexer.sync()
+
+    assert indexer.generation == generation + 1
+    assert indexer.get_transaction(1) is None
+    assert indexer.get_listing(1)[5] == 0
+    assert indexer.is_token_listed(minted_token_id)
+
+
+def test_rewind_when_node_is_behind(chain, indexer, land_nft, marketplace, seller, minted_token_id):
+    snapshot = chain.snapshot()
+    land_nft.approve(marketplace.address, minted_token_id, sender=seller)
+    marketplace.create_listing(minted_token_id, b"CCCD_S", PRICE, sender=seller, value=LISTING_FEE)
+    indexer.sync()
+
+    # Node khởi động lại, head thấp hơn block đã đồng bộ: không được đọc block chưa tồn tại
+    chain.restore(snapshot)
+    assert indexer.last_synced_block > chain.blocks.height
+    assert indexer.sync() == chain.blocks.height
+    assert indexer.get_listing(1) is None
+    assert indexer.get_land(1)[4] == 1
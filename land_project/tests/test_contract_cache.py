@@ -0,0 +1,162 @@
+from types import SimpleNamespace
+
+import ape
+import pytest
+
+from app_modules import contract_cache
+from app_modules.contract_cache import CachedCall, CachedContract, CachedTransaction, ContractCache
+
+
+class FakeHandler:
+    """Hàm contract giả: đếm số lần gọi RPC, trả về giá trị hiện tại của `value`."""
+
+    def __init__(self, name="get_value", mutability="view", address="0xC0"):
+        self.abis = [SimpleNamespace(name=name, stateMutability=mutability)]
+        self.contract = SimpleNamespace(address=address)
+        self.calls = 0
+        self.value = 0
+        self.error = None
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return (self.value, args)
+
+
+class FakeContract:
+    address = "0xC0"
+
+    def __init__(self):
+        self.get_value = FakeHandler("get_value", "view")
+        self.version = FakeHandler("version", "pure")
+        self.set_value = FakeHandler("set_value", "nonpayable")
+        self.name = "not a contract method"
+
+
+@pytest.fixture
+def fake_chain(monkeypatch):
+    fake = SimpleNamespace(blocks=SimpleNamespace(height=10))
+    monkeypatch.setattr(contract_cache, "chain", fake)
+    return fake
+
+
+@pytest.fixture
+def cache(fake_chain):
+    # Hỏi số block ở mọi lần truy cập để kiểm tra ngay việc xoá cache theo block
+    return ContractCache(block_poll_interval=0)
+
+
+def test_view_cached_per_block(fake_chain, cache):
+    handler = FakeHandler()
+    call = CachedCall(handler, cache)
+
+    assert call(1) == (0, (1,))
+    handler.value = 5
+    assert call(1) == (0, (1,))  # Cùng block: lấy từ cache
+    assert call(2) == (5, (2,))  # Tham số khác: khoá khác
+    assert handler.calls == 2
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    fake_chain.blocks.height = 11
+    assert call(1) == (5, (1,))  # Block mới: cache bị xoá
+    assert handler.calls == 3
+
+
+def test_unhashable_args_bypass_cache(cache):
+    handler = FakeHandler()
+    call = CachedCall(handler, cache)
+    call([1, 2])
+    call([1, 2])
+    assert handler.calls == 2
+    assert call.lookup(([1, 2],)) == (False, None)
+
+
+def test_block_poll_interval(fake_chain):
+    cache = ContractCache(block_poll_interval=3600)
+    call = CachedCall(FakeHandler(), cache)
+    call(1)
+    fake_chain.blocks.height = 11
+    call(1)
+    # Chưa tới lần hỏi node kế tiếp: vẫn dùng block cũ
+    assert cache.current_block() == 10 and call._handler.calls == 1
+
+
+def test_store_drops_results_of_previous_block(fake_chain, cache):
+    call = CachedCall(FakeHandler(), cache)
+    key = call.cache_key((1,))
+
+    # Block mới đến trong lúc đang đọc: kết quả tính theo block cũ không được lưu
+    fake_chain.blocks.height = 11
+    cache.current_block()
+    cache.store(key, "stale")
+    assert cache.lookup(key) == (False, None)
+    assert call.lookup((1,)) == (False, None)
+
+    call.store((1,), "fresh")
+    assert call.lookup((1,)) == (True, "fresh")
+
+
+def test_lru_eviction(fake_chain):
+    cache = ContractCache(max_entries=2, block_poll_interval=0)
+    handler = FakeHandler()
+    call = CachedCall(handler, cache)
+    call(1)
+    call(2)
+    call(1)  # 1 vừa được dùng -> 2 bị loại khi thêm 3
+    call(3)
+    assert call.lookup((1,))[0] and call.lookup((3,))[0]
+    assert not call.lookup((2,))[0]
+
+
+def test_transaction_invalidates_cache(cache):
+    view = CachedCall(FakeHandler(), cache)
+    tx_handler = FakeHandler("set_value", "nonpayable")
+    tx = CachedTransaction(tx_handler, cache)
+
+    view(1)
+    tx(7)
+    view(1)
+    assert view._handler.calls == 2
+
+    # Giao dịch lỗi vẫn có thể đã đổi state (đã gửi nhưng revert, timeout...) -> vẫn xoá cache
+    tx_handler.error = RuntimeError("revert")
+    with pytest.raises(RuntimeError):
+        tx(8)
+    view(1)
+    assert view._handler.calls == 3
+
+
+def test_cached_contract_splits_by_state_mutability(cache):
+    contract = FakeContract()
+    cached = CachedContract(contract, cache)
+
+    assert isinstance(cached.get_value, CachedCall)
+    assert isinstance(cached.version, CachedCall)
+    assert isinstance(cached.set_value, CachedTransaction)
+    assert cached.name == "not a contract method"
+    assert cached.get_value is cached.get_value  # Bọc một lần
+    assert cached.address == contract.address
+
+    cached.get_value(1)
+    cached.get_value(1)
+    cached.set_value(2)
+    cached.get_value(1)
+    assert contract.get_value.calls == 2
+
+
+def test_cached_contract_on_chain(marketplace, owner, stranger):
+    cache = ContractCache()
+    cached = CachedContract(marketplace, cache)
+    assert cached.listing_fee() == 1000
+    assert cached.listing_fee() == 1000
+    assert cache.hits == 1
+
+    # Giao dịch gửi qua proxy xoá cache, lần đọc sau thấy giá trị mới
+    cached.set_fees(2000, 100, sender=owner)
+    assert cached.listing_fee() == 2000
+
+    with ape.reverts("Only admin"):
+        cached.set_fees(3000, 100, sender=stranger)
+    misses = cache.misses
+    assert cached.listing_fee() == 2000 and cache.misses == misses + 1
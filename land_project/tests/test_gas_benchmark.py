@@ -0,0 +1,105 @@
+"""
+Benchmark gas cho các hàm quyết định chi phí vận hành, đo ở nhiều kích thước state
+(số thửa người bán đang sở hữu trước khi gọi).
+
+- Kết quả ghi ra GAS_REPORT_FILE (JSON) sau khi chạy xong module.
+- Test fail nếu một hàm tốn hơn baseline (tests/gas_baseline.json) quá `tolerance`.
+- Cập nhật baseline sau khi cố ý thay đổi contract:
+      GAS_BASELINE_UPDATE=1 ape test tests/test_gas_benchmark.py
+"""
+import datetime
+import json
+import os
+
+import pytest
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "gas_baseline.json")
+GAS_REPORT_FILE = os.environ.get("GAS_REPORT_FILE", "gas_report.json")
+UPDATE_BASELINE = os.environ.get("GAS_BASELINE_UPDATE") == "1"
+DEFAULT_TOLERANCE = 0.02
+
+STATE_SIZES = (1, 100, 900)
+SEED_CHUNK = 50  # <= MAX_REGISTER_BATCH / MAX_BATCH_SIZE
+LISTING_FEE = 1000
+PRICE = 5000
+
+_results = {}
+
+
+def _load_baseline():
+    if not os.path.exists(BASELINE_FILE):
+        return {"tolerance": DEFAULT_TOLERANCE, "results": {}}
+    with open(BASELINE_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope="module")
+def gas_baseline():
+    baseline = _load_baseline()
+    yield baseline
+
+    report = {
+        "generated_at": datetime.datetime.now().isoformat(),
+        "state_sizes": list(STATE_SIZES),
+        "tolerance": baseline.get("tolerance", DEFAULT_TOLERANCE),
+        "results": _results,
+        "baseline": baseline.get("results", {}),
+    }
+    with open(GAS_REPORT_FILE, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4, sort_keys=True)
+
+    if UPDATE_BASELINE:
+        # Gộp vào baseline cũ để chạy một phần (-k) không xoá số liệu các kích thước khác
+        merged = baseline.get("results", {})
+        for name, sizes in _results.items():
+            merged.setdefault(name, {}).update(sizes)
+        with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+            json.dump({"tolerance": report["tolerance"], "results": merged}, f, indent=4, sort_keys=True)
+            f.write("\n")
+
+
+def _seed_parcels(land_registry, owner, seller, count):
+    """Tạo sẵn `count` thửa đã duyệt cho người bán bằng các hàm batch (id 1..count)."""
+    for start in range(0, count, SEED_CHUNK):
+        size = min(SEED_CHUNK, count - start)
+        land_registry.register_lands(
+            [f"L{start + i}" for i in range(size)], [100] * size, [b"CCCD_SELLER"] * size,
+            ["p"] * size, ["i"] * size, sender=seller,
+        )
+        land_registry.approve_lands(list(range(start + 1, start + size + 1)), ["m"] * size, sender=owner)
+
+
+@pytest.mark.parametrize("state_size", STATE_SIZES)
+def test_gas_benchmark(gas_baseline, land_nft, land_registry, marketplace, owner, seller, buyer, stranger, state_size):
+    _seed_parcels(land_registry, owner, seller, state_size)
+    assert land_registry.get_lands_count_by_owner(seller) == state_size
+    token_id = state_size + 1
+
+    gas = {}
+    gas["register_land"] = land_registry.register_land("Addr", 100, b"CCCD_SELLER", "pdf", "img", sender=seller).gas_used
+    gas["approve_land"] = land_registry.approve_land(token_id, "meta_uri", sender=owner).gas_used
+    # Người bán chuyển trực tiếp một thửa đã có (không qua sàn)
+    gas["transferWithCCCD"] = land_nft.transferWithCCCD(seller, stranger, 1, b"CCCD_STRANGER", sender=seller).gas_used
+
+    land_nft.approve(marketplace.address, token_id, sender=seller)
+    gas["create_listing"] = marketplace.create_listing(token_id, b"CCCD_SELLER", PRICE, sender=seller, value=LISTING_FEE).gas_used
+    gas["initiate_transaction"] = marketplace.initiate_transaction(1, b"CCCD_BUYER", sender=buyer, value=PRICE).gas_used
+    gas["approve_transaction"] = marketplace.approve_transaction(1, sender=owner).gas_used
+    assert land_nft.ownerOf(token_id) == buyer
+
+    for name, used in gas.items():
+        _results.setdefault(name, {})[str(state_size)] = used
+
+    if UPDATE_BASELINE:
+        return
+
+    tolerance = gas_baseline.get("tolerance", DEFAULT_TOLERANCE)
+    baseline = gas_baseline.get("results", {})
+    regressions = []
+    for name, used in gas.items():
+        expected = baseline.get(name, {}).get(str(state_size))
+        if expected is None:
+            regressions.append(f"{name}: chưa có baseline (chạy lại với GAS_BASELINE_UPDATE=1)")
+        elif used > expected * (1 + tolerance):
+            regressions.append(f"{name}: {used} gas > baseline {expected} (+{(used / expected - 1) * 100:.1f}%)")
+    assert not regressions, f"Gas tăng quá {tolerance:.0%} @ {state_size} thửa:\n" + "\n".join(regressions)
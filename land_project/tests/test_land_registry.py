@@ -1,18 +1,32 @@
 import ape
 import pytest
 
+def _owner_land_ids(land_registry, owner):
+    # Đọc hết các trang của get_lands_by_owner
+    ids, cursor = [], 1
+    while True:
+        page, cursor = land_registry.get_lands_by_owner(cursor, 50, owner)
+        ids.extend(parcel.id for parcel in page)
+        if cursor == 0:
+            return ids
+
 def test_register_land_validation(land_registry, seller):
     with ape.reverts("Land address cannot be empty"):
-        land_registry.register_land("", 100, "C", "p", "i", sender=seller)
+        land_registry.register_land("", 100, b"C", "p", "i", sender=seller)
         
     with ape.reverts("Area must be greater than 0"):
-        land_registry.register_land("A", 0, "C", "p", "i", sender=seller)
+        land_registry.register_land("A", 0, b"C", "p", "i", sender=seller)
+
+    with ape.reverts("Owner CCCD cannot be empty"):
+        land_registry.register_land("A", 100, b"", "p", "i", sender=seller)
 
 def test_full_approve(land_registry, land_nft, owner, seller):
     # 1. Register
-    tx = land_registry.register_land("Addr", 500, "CCCD_S", "pdf", "img", sender=seller)
+    tx = land_registry.register_land("Addr", 500, b"CCCD_S", "pdf", "img", sender=seller)
     logs = list(tx.decode_logs(land_registry.LandRegistered))
     land_id = logs[0].land_id
+    # Event mang đủ dữ liệu hồ sơ cho chỉ mục ngoài chuỗi
+    assert (logs[0].owner, logs[0].land_address, logs[0].area, logs[0].pdf_uri, logs[0].image_uri) == (seller, "Addr", 500, "pdf", "img")
     
     assert land_registry.get_land_status(land_id) == 0 # Pending
     
@@ -27,7 +41,7 @@ def test_full_approve(land_registry, land_nft, owner, seller):
         land_registry.approve_land(land_id, "meta", sender=owner)
 
 def test_reject_land(land_registry, owner, seller):
-    land_registry.register_land("Bad Land", 100, "C", "p", "i", sender=seller)
+    land_registry.register_land("Bad Land", 100, b"C", "p", "i", sender=seller)
     land_id = 1
     
     # User thường không thể reject
@@ -45,16 +59,176 @@ def test_update_ownership(land_registry, owner, seller, buyer):
     
     # Đăng ký 3 lô đất: ID 1, 2, 3
     for _ in range(3):
-        land_registry.register_land("L", 100, "C", "p", "i", sender=seller)
+        land_registry.register_land("L", 100, b"C", "p", "i", sender=seller)
         
-    land_registry.update_ownership(2, buyer, "CCCD_B", sender=owner)
+    land_registry.update_ownership(2, buyer, b"CCCD_B", sender=owner)
     
-    seller_lands = land_registry.get_lands_by_owner(seller)
+    seller_lands = _owner_land_ids(land_registry, seller)
     assert len(seller_lands) == 2
     assert 2 not in seller_lands
     assert 1 in seller_lands and 3 in seller_lands
     
-    buyer_lands = land_registry.get_lands_by_owner(buyer)
+    buyer_lands = _owner_land_ids(land_registry, buyer)
     assert buyer_lands == [2]
     
-    assert land_registry.get_land(2).owner_cccd == "CCCD_B"
\ No newline at end of file
+    assert land_registry.get_land(2).owner_cccd == b"CCCD_B".ljust(32, b"\0")
+
+def test_get_lands_pagination(land_registry, owner, seller):
+    # 5 thửa đất: duyệt 2 và 4, còn lại chờ duyệt
+    for i in range(5):
+        land_registry.register_land(f"L{i}", 100, b"C", "p", "i", sender=seller)
+    land_registry.approve_land(2, "meta", sender=owner)
+    land_registry.approve_land(4, "meta", sender=owner)
+
+    page, cursor = land_registry.get_lands(1, 2, 0)
+    assert [p.id for p in page] == [1, 3]
+    assert cursor == 4
+
+    page, cursor = land_registry.get_lands(cursor, 2, 0)
+    assert [p.id for p in page] == [5]
+    assert cursor == 0
+
+    page, cursor = land_registry.get_lands(0, 10, 255)  # STATUS_ANY
+    assert [p.id for p in page] == [1, 2, 3, 4, 5]
+    assert cursor == 0
+
+def test_pending_queue(land_registry, owner, seller):
+    for i in range(4):
+        land_registry.register_land(f"L{i}", 100, b"C", "p", "i", sender=seller)
+    assert land_registry.pending_count() == 4
+
+    # Duyệt 1, từ chối 3 -> phần tử cuối được dời vào chỗ trống
+    land_registry.approve_land(1, "meta", sender=owner)
+    land_registry.reject_land(3, sender=owner)
+    assert land_registry.pending_count() == 2
+
+    page, cursor = land_registry.get_pending(1, 10)
+    assert sorted(p.id for p in page) == [2, 4]
+    assert all(p.status == 0 for p in page)
+    assert cursor == 0
+
+    page, cursor = land_registry.get_pending(1, 1)
+    assert len(page) == 1
+    assert cursor == 2
+
+def _transfer_gas(land_registry, owner, seller, buyer, parcels):
+    land_registry.set_land_nft(owner, sender=owner)
+    for i in range(parcels):
+        land_registry.register_land(f"L{i}", 100, f"C{i}".encode(), "p", "i", sender=seller)
+
+    # Chuyển thửa đăng ký sau cùng: trường hợp xấu nhất của cách duyệt tuyến tính cũ
+    receipt = land_registry.update_ownership(parcels, buyer, b"CCCD_B", sender=owner)
+    assert land_registry.get_lands_count_by_owner(seller) == parcels - 1
+    assert _owner_land_ids(land_registry, buyer) == [parcels]
+    return receipt.gas_used
+
+def test_update_ownership_gas_is_flat(project, land_nft, owner, seller, buyer):
+    """
+    Chi phí chuyển quyền không phụ thuộc số thửa đất người bán đang sở hữu
+    """
+    small = project.LandRegistry.deploy(land_nft.address, sender=owner)
+    large = project.LandRegistry.deploy(land_nft.address, sender=owner)
+
+    gas_1 = _transfer_gas(small, owner, seller, buyer, 1)
+    gas_900 = _transfer_gas(large, owner, seller, buyer, 900)
+
+    # Chênh lệch chỉ đến từ refund khi danh sách của người bán về rỗng (ca 1 thửa);
+    # duyệt tuyến tính như cũ sẽ tốn thêm ~2100 gas cho mỗi thửa (~1.9M gas với 900 thửa)
+    assert abs(gas_900 - gas_1) < 10_000
+
+def test_update_ownership_keeps_owner_index(land_registry, owner, seller, buyer):
+    land_registry.set_land_nft(owner, sender=owner)
+    for _ in range(4):
+        land_registry.register_land("L", 100, b"C", "p", "i", sender=seller)
+
+    # Xoá ở giữa rồi chuyển tiếp thửa vừa bị dời chỗ: vị trí phải được cập nhật đúng
+    land_registry.update_ownership(1, buyer, b"CCCD_B", sender=owner)
+    land_registry.update_ownership(4, buyer, b"CCCD_B", sender=owner)
+    land_registry.update_ownership(1, seller, b"CCCD_S", sender=owner)
+
+    assert sorted(_owner_land_ids(land_registry, seller)) == [1, 2, 3]
+    assert _owner_land_ids(land_registry, buyer) == [4]
+    assert land_registry.lands_count(buyer) == 1
+
+def test_batch_approve_reject(land_registry, land_nft, owner, seller):
+    for i in range(5):
+        land_registry.register_land(f"L{i}", 100, b"C", "p", "i", sender=seller)
+
+    with ape.reverts("Caller is not the admin"):
+        land_registry.approve_lands([1, 2], ["m1", "m2"], sender=seller)
+    with ape.reverts("Length mismatch"):
+        land_registry.approve_lands([1, 2], ["m1"], sender=owner)
+
+    land_registry.approve_lands([1, 3, 4], ["m1", "m3", "m4"], sender=owner)
+    land_registry.reject_lands([2], sender=owner)
+
+    assert [land_registry.get_land_status(i) for i in range(1, 6)] == [1, 2, 1, 1, 0]
+    assert land_nft.ownerOf(3) == seller
+    assert land_nft.token_uri(4) == "m4"
+    assert land_registry.pending_count() == 1
+
+    # Một hồ sơ đã xử lý trong lô -> cả lô bị revert, hồ sơ 5 vẫn chờ duyệt
+    with ape.reverts("Land is not in pending state"):
+        land_registry.reject_lands([5, 1], sender=owner)
+    assert land_registry.get_land_status(5) == 0
+
+def test_register_lands_batch(land_registry, seller):
+    land_registry.register_land("Single", 100, b"C0", "p", "i", sender=seller)
+
+    addresses = [f"Batch {i}" for i in range(3)]
+    tx = land_registry.register_lands(
+        addresses, [10, 20, 30], [b"C1", b"C2", b"C3"], ["p"] * 3, ["i"] * 3, sender=seller
+    )
+
+    assert [log.land_id for log in tx.decode_logs(land_registry.LandRegistered)] == [2, 3, 4]
+    assert [land_registry.get_land(i).land_address for i in (2, 3, 4)] == addresses
+    assert _owner_land_ids(land_registry, seller) == [1, 2, 3, 4]
+    assert land_registry.pending_count() == 4
+
+    with ape.reverts("Length mismatch"):
+        land_registry.register_lands(["A", "B"], [1], [b"C", b"C"], ["p", "p"], ["i", "i"], sender=seller)
+    with ape.reverts("Area must be greater than 0"):
+        land_registry.register_lands(["A", "B"], [1, 0], [b"C", b"C"], ["p", "p"], ["i", "i"], sender=seller)
+    assert land_registry.next_land_id() == 5
+
+def test_owner_and_cccd_lists_have_no_cap(land_registry, seller):
+    # Trước đây owner_to_lands tối đa 1000 thửa, land_ids tối đa 100 thửa mỗi CCCD
+    for start in range(0, 1001, 50):
+        size = min(50, 1001 - start)
+        land_registry.register_lands(["L"] * size, [100] * size, [b"CCCD_BIG"] * size, ["p"] * size, ["i"] * size, sender=seller)
+
+    assert land_registry.get_lands_count_by_owner(seller) == 1001
+    assert land_registry.cccd_lands_count(b"CCCD_BIG") == 1001
+    assert land_registry.owner_land_ids(seller, 1001) == 1001
+
+    page, cursor = land_registry.get_lands_by_owner(1000, 50, seller)
+    assert [parcel.id for parcel in page] == [1000, 1001]
+    assert cursor == 0
+
+    page, cursor = land_registry.get_lands_by_cccd(1, 100, b"CCCD_BIG")
+    assert len(page) == 50  # Bị chặn bởi MAX_PAGE_SIZE
+    assert cursor == 51
+
+def test_get_lands_by_cccd(land_registry, owner, seller, buyer):
+    land_registry.register_land("A", 100, b"CCCD_S", "p", "i", sender=seller)
+    land_registry.register_land("B", 100, b"CCCD_X", "p", "i", sender=seller)
+    land_registry.register_land("C", 100, b"CCCD_S", "p", "i", sender=buyer)
+
+    page, cursor = land_registry.get_lands_by_cccd(1, 10, b"CCCD_S")
+    assert [parcel.id for parcel in page] == [1, 3]
+    assert cursor == 0
+
+    page, cursor = land_registry.get_lands_by_cccd(1, 1, b"CCCD_S")
+    assert [parcel.id for parcel in page] == [1]
+    assert cursor == 2
+
+def test_land_summaries(land_registry, owner, seller, buyer):
+    land_registry.register_land("A", 120, b"CCCD_S", "p", "i", sender=seller)
+    land_registry.register_land("B", 80, b"CCCD_B", "p", "i", sender=buyer)
+    land_registry.approve_land(2, "m", sender=owner)
+
+    summary = land_registry.get_land_summary(1)
+    assert (summary.area, summary.status, summary.owner) == (120, 0, seller)
+
+    summaries = land_registry.get_land_summaries([2, 1])
+    assert [(item.area, item.status, item.owner) for item in summaries] == [(80, 1, buyer), (120, 0, seller)]
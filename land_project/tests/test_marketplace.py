@@ -10,24 +10,55 @@ PRICE = 5000
 def active_listing(marketplace, land_registry, land_nft, seller, minted_token_id):
     token_id = minted_token_id
     land_nft.approve(marketplace.address, token_id, sender=seller)
-    marketplace.create_listing(token_id, "CCCD_S", PRICE, sender=seller, value=LISTING_FEE)
+    marketplace.create_listing(token_id, b"CCCD_S", PRICE, sender=seller, value=LISTING_FEE)
     return token_id
 
 def test_create_listing_checks(marketplace, land_nft, stranger, seller, minted_token_id):
     # Fail nếu không đủ phí
     with ape.reverts("Listing fee required"):
-        marketplace.create_listing(minted_token_id, "C", PRICE, sender=seller, value=LISTING_FEE - 1)
+        marketplace.create_listing(minted_token_id, b"C", PRICE, sender=seller, value=LISTING_FEE - 1)
     # Fail nếu không phải owner NFT
     print(seller.address)
     print(ape.accounts[4].address)
     with ape.reverts("Not NFT owner"):
-        marketplace.create_listing(minted_token_id, "C", PRICE, sender=stranger , value=LISTING_FEE)
+        marketplace.create_listing(minted_token_id, b"C", PRICE, sender=stranger , value=LISTING_FEE)
+
+def test_create_listing_requires_approval(marketplace, land_nft, seller, minted_token_id):
+    with ape.reverts("Token does not exist"):
+        marketplace.create_listing(999, b"C", PRICE, sender=seller, value=LISTING_FEE)
+    with ape.reverts("Marketplace not approved to transfer NFT"):
+        marketplace.create_listing(minted_token_id, b"C", PRICE, sender=seller, value=LISTING_FEE)
+    # Ủy quyền toàn bộ (setApprovalForAll) cũng hợp lệ
+    land_nft.setApprovalForAll(marketplace, True, sender=seller)
+    marketplace.create_listing(minted_token_id, b"C", PRICE, sender=seller, value=LISTING_FEE)
+    assert marketplace.is_token_listed(minted_token_id)
+
+def test_create_listing_with_permit(marketplace, land_nft, chain, seller, stranger, sign_permit, minted_token_id):
+    deadline = chain.pending_timestamp + 3600
+    sig = sign_permit(seller, marketplace.address, minted_token_id, deadline)
+
+    # Một giao dịch duy nhất: permit + đăng bán
+    tx = marketplace.create_listing_with_permit(minted_token_id, b"C", PRICE, deadline, sig, sender=seller, value=LISTING_FEE)
+    assert marketplace.is_token_listed(minted_token_id)
+    assert land_nft.getApproved(minted_token_id) == marketplace
+    assert len(list(tx.decode_logs(marketplace.ListingCreated))) == 1
+
+    with ape.reverts("Permit signature required"):
+        marketplace.create_listing_with_permit(minted_token_id, b"C", PRICE, deadline, b"", sender=seller, value=LISTING_FEE)
+
+def test_create_listing_with_front_run_permit(marketplace, land_nft, chain, seller, stranger, sign_permit, minted_token_id):
+    # Permit bị người khác gửi trước: đã có ủy quyền nên Marketplace bỏ qua chữ ký và vẫn đăng bán
+    deadline = chain.pending_timestamp + 3600
+    sig = sign_permit(seller, marketplace.address, minted_token_id, deadline)
+    land_nft.permit(marketplace, minted_token_id, deadline, sig, sender=stranger)
+    marketplace.create_listing_with_permit(minted_token_id, b"C", PRICE, deadline, sig, sender=seller, value=LISTING_FEE)
+    assert marketplace.is_token_listed(minted_token_id)
 
 def test_transaction_success_flow(marketplace, land_nft, land_registry, owner, seller, buyer, active_listing):
     listing_id = 1
     
     # Buyer deposits
-    marketplace.initiate_transaction(listing_id, "CCCD_BUYER", sender=buyer, value=PRICE)
+    marketplace.initiate_transaction(listing_id, b"CCCD_BUYER", sender=buyer, value=PRICE)
     
     seller_bal_before = seller.balance
     
@@ -43,15 +74,17 @@ def test_transaction_success_flow(marketplace, land_nft, land_registry, owner, s
     
     # Check Registry Update (Integration)
     assert land_registry.get_land_owner(active_listing) == buyer
-    assert land_registry.get_land(active_listing).owner_cccd == "CCCD_BUYER"
+    assert land_registry.get_land(active_listing).owner_cccd == b"CCCD_BUYER".ljust(32, b"\0")
 
 def test_buyer_cancel_penalty(marketplace, buyer, active_listing, owner):
-    marketplace.initiate_transaction(1, "CCCD_B", sender=buyer, value=PRICE)
+    marketplace.initiate_transaction(1, b"CCCD_B", sender=buyer, value=PRICE)
     
     initial_fees = marketplace.collected_fees() # Đang có 1000 từ listing
     
     # Buyer cancel
-    marketplace.buyer_cancel(1, sender=buyer)
+    tx = marketplace.buyer_cancel(1, sender=buyer)
+    [cancelled] = list(tx.decode_logs(marketplace.TransactionCancelled))
+    assert (cancelled.tx_id, cancelled.listing_id, cancelled.refund, cancelled.penalty) == (1, 1, PRICE - CANCEL_PENALTY, CANCEL_PENALTY)
     
     # Check status
     assert marketplace.get_transaction(1).status == 3 # Cancelled
@@ -64,7 +97,7 @@ def test_buyer_cancel_penalty(marketplace, buyer, active_listing, owner):
     assert marketplace.get_escrow_balance(buyer) == 0
 
 def test_reject_transaction_refund(marketplace, owner, buyer, active_listing):
-    marketplace.initiate_transaction(1, "CCCD_B", sender=buyer, value=PRICE)
+    marketplace.initiate_transaction(1, b"CCCD_B", sender=buyer, value=PRICE)
     
     buyer_bal_before_reject = buyer.balance
     
@@ -75,3 +108,200 @@ def test_reject_transaction_refund(marketplace, owner, buyer, active_listing):
     assert buyer.balance > buyer_bal_before_reject
     assert marketplace.get_transaction(1).status == 2 # Rejected
     assert marketplace.get_listing(1).status == 0 # Active
+
+def test_get_listings_pagination(marketplace, buyer, active_listing):
+    page, cursor = marketplace.get_listings(1, 10, 0)
+    assert [l.listing_id for l in page] == [1]
+    assert cursor == 0
+
+    marketplace.initiate_transaction(1, b"CCCD_B", sender=buyer, value=PRICE)
+
+    page, cursor = marketplace.get_listings(1, 10, 0)
+    assert len(page) == 0
+    page, cursor = marketplace.get_listings(1, 10, 1) # InTransaction
+    assert [l.token_id for l in page] == [active_listing]
+
+def test_active_listing_set(marketplace, land_registry, land_nft, owner, seller, buyer, active_listing):
+    # Đăng bán thêm token thứ hai
+    land_registry.register_land("Addr 2", 200, b"CCCD_SELLER", "pdf", "img", sender=seller)
+    land_registry.approve_land(2, "meta_uri", sender=owner)
+    land_nft.approve(marketplace.address, 2, sender=seller)
+    marketplace.create_listing(2, b"CCCD_S", PRICE, sender=seller, value=LISTING_FEE)
+
+    assert marketplace.active_listings_count() == 2
+    assert marketplace.token_to_listing(2) == 2
+    assert marketplace.is_token_listed(active_listing)
+
+    # Không được đăng bán lại token đang có listing hoạt động
+    land_nft.approve(marketplace.address, active_listing, sender=seller)
+    with ape.reverts("Token already listed"):
+        marketplace.create_listing(active_listing, b"CCCD_S", PRICE, sender=seller, value=LISTING_FEE)
+
+    # Hoàn tất giao dịch listing 1 -> listing 2 được dời về vị trí 1
+    marketplace.initiate_transaction(1, b"CCCD_B", sender=buyer, value=PRICE)
+    marketplace.approve_transaction(1, sender=owner)
+
+    assert marketplace.active_listings_count() == 1
+    assert not marketplace.is_token_listed(active_listing)
+    assert marketplace.active_listing_ids(1) == 2
+
+    page, cursor = marketplace.get_active_listings(1, 10)
+    assert [l.listing_id for l in page] == [2]
+    assert cursor == 0
+
+def test_cancel_listing(marketplace, land_nft, owner, seller, buyer, stranger, active_listing):
+    with ape.reverts("Not seller or admin"):
+        marketplace.cancel_listing(1, sender=stranger)
+
+    tx = marketplace.cancel_listing(1, sender=seller)
+    assert len(list(tx.decode_logs(marketplace.ListingCancelled))) == 1
+    assert marketplace.get_listing(1).status == 3 # Cancelled
+    assert not marketplace.is_token_listed(active_listing)
+    assert marketplace.active_listings_count() == 0
+    with ape.reverts("Listing not active"):
+        marketplace.cancel_listing(1, sender=seller)
+    with ape.reverts("Listing not active"):
+        marketplace.initiate_transaction(1, b"CCCD_B", sender=buyer, value=PRICE)
+
+    # Đăng bán lại sau khi huỷ; admin cũng huỷ được, nhưng không huỷ khi đang có giao dịch
+    land_nft.approve(marketplace.address, active_listing, sender=seller)
+    marketplace.create_listing(active_listing, b"CCCD_S", PRICE, sender=seller, value=LISTING_FEE)
+    marketplace.initiate_transaction(2, b"CCCD_B", sender=buyer, value=PRICE)
+    with ape.reverts("Listing not active"):
+        marketplace.cancel_listing(2, sender=owner)
+    marketplace.buyer_cancel(1, sender=buyer)
+    marketplace.cancel_listing(2, sender=owner)
+    assert marketplace.get_listing(2).status == 3
+
+def test_relist_after_off_market_transfer(marketplace, land_nft, seller, buyer, active_listing):
+    # Token chuyển ngoài sàn: listing cũ của người bán không được chặn chủ mới đăng bán
+    land_nft.transferFrom(seller, buyer, active_listing, sender=seller)
+    land_nft.approve(marketplace.address, active_listing, sender=buyer)
+    tx = marketplace.create_listing(active_listing, b"CCCD_B", PRICE, sender=buyer, value=LISTING_FEE)
+
+    [cancelled] = list(tx.decode_logs(marketplace.ListingCancelled))
+    assert (cancelled.listing_id, cancelled.token_id) == (1, active_listing)
+    assert marketplace.get_listing(1).status == 3
+    assert marketplace.token_to_listing(active_listing) == 2
+    assert marketplace.active_listings_count() == 1
+
+def test_address_indexes(marketplace, owner, seller, buyer, stranger, active_listing):
+    assert marketplace.get_listings_by_seller(1, 50, seller) == ([1], 0)
+    assert marketplace.get_txs_by_buyer(1, 50, buyer) == ([], 0)
+
+    marketplace.initiate_transaction(1, b"CCCD_B", sender=buyer, value=PRICE)
+    marketplace.reject_transaction(1, "Sai thong tin", sender=owner)
+    marketplace.initiate_transaction(1, b"CCCD_X", sender=stranger, value=PRICE)
+
+    assert marketplace.get_txs_by_buyer(1, 50, buyer) == ([1], 0)
+    assert marketplace.get_txs_by_buyer(1, 50, stranger) == ([2], 0)
+    assert marketplace.get_txs_by_listing(1, 50, 1) == ([1, 2], 0)
+    assert marketplace.get_listings_by_seller(1, 50, buyer) == ([], 0)
+
+def test_listing_tx_index_has_no_cap(marketplace, buyer, active_listing):
+    # Trước đây listing_to_txs giới hạn 100 phần tử: người mua huỷ liên tục có thể khoá listing
+    for _ in range(105):
+        marketplace.initiate_transaction(1, b"CCCD_B", sender=buyer, value=PRICE)
+        marketplace.buyer_cancel(marketplace.next_tx_id() - 1, sender=buyer)
+
+    assert marketplace.listing_txs_count(1) == 105
+    page, cursor = marketplace.get_txs_by_listing(1, 50, 1)
+    assert list(page) == list(range(1, 51)) and cursor == 51
+    page, cursor = marketplace.get_txs_by_listing(101, 50, 1)
+    assert list(page) == list(range(101, 106)) and cursor == 0
+    page, cursor = marketplace.get_txs_by_buyer(100, 3, buyer)
+    assert list(page) == [100, 101, 102] and cursor == 103
+
+def test_batch_transactions(marketplace, land_registry, land_nft, owner, seller, buyer, stranger, active_listing):
+    for token_id in (2, 3):
+        land_registry.register_land(f"Addr {token_id}", 200, b"CCCD_SELLER", "pdf", "img", sender=seller)
+        land_registry.approve_land(token_id, "meta_uri", sender=owner)
+        land_nft.approve(marketplace.address, token_id, sender=seller)
+        marketplace.create_listing(token_id, b"CCCD_S", PRICE, sender=seller, value=LISTING_FEE)
+
+    for listing_id in (1, 2, 3):
+        marketplace.initiate_transaction(listing_id, b"CCCD_B", sender=buyer, value=PRICE)
+
+    with ape.reverts("Only admin"):
+        marketplace.approve_transactions([1, 2], sender=stranger)
+    with ape.reverts("Length mismatch"):
+        marketplace.reject_transactions([3], [], sender=owner)
+
+    marketplace.approve_transactions([1, 2], sender=owner)
+    marketplace.reject_transactions([3], ["Sai thong tin"], sender=owner)
+
+    assert [marketplace.get_transaction(i).status for i in (1, 2, 3)] == [1, 1, 2]
+    assert land_nft.ownerOf(1) == buyer and land_nft.ownerOf(2) == buyer
+    assert marketplace.get_listing(3).status == 0
+    assert marketplace.get_escrow_balance(buyer) == 0
+
+def test_packed_storage_roundtrip(marketplace, buyer, active_listing):
+    listing = marketplace.listings(1)
+    assert (listing.listing_id, listing.token_id, listing.price, listing.status) == (1, active_listing, PRICE, 0)
+    assert listing.created_at > 0
+
+    marketplace.initiate_transaction(1, b"CCCD_B", sender=buyer, value=PRICE)
+    tx_data = marketplace.transactions(1)
+    assert (tx_data.tx_id, tx_data.listing_id, tx_data.buyer_address, tx_data.amount, tx_data.status) == (1, 1, buyer, PRICE, 0)
+    assert tx_data.buyer_cccd == b"CCCD_B".ljust(32, b"\0")
+    assert marketplace.listings(1).status == 1
+    # Id chưa tạo trả về struct rỗng như getter public trước đây
+    assert marketplace.get_listing(99).listing_id == 0
+    assert marketplace.get_transaction(99).tx_id == 0
+
+def test_listing_summaries(marketplace, seller, buyer, active_listing):
+    summary = marketplace.get_listing_summary(1)
+    assert (summary.token_id, summary.seller, summary.price, summary.status) == (active_listing, seller, PRICE, 0)
+
+    marketplace.initiate_transaction(1, b"CCCD_B", sender=buyer, value=PRICE)
+    summaries = marketplace.get_listing_summaries([1, 99])
+    assert [(item.token_id, item.status) for item in summaries] == [(active_listing, 1), (0, 0)]
+    # Listing chưa tạo: seller rỗng
+    assert summaries[1].seller == ape.utils.ZERO_ADDRESS
+
+def test_price_must_fit_uint128(marketplace, land_nft, seller, minted_token_id):
+    land_nft.approve(marketplace.address, minted_token_id, sender=seller)
+    with ape.reverts("Price too large"):
+        marketplace.create_listing(minted_token_id, b"C", 2**128, sender=seller, value=LISTING_FEE)
+
+def test_buy_flow_gas(marketplace, land_nft, owner, seller, buyer, minted_token_id):
+    """
+    Listing/Transaction lưu dạng nén (địa chỉ + status + created_at chung một slot),
+    đổi status chỉ ghi một slot
+    """
+    land_nft.approve(marketplace.address, minted_token_id, sender=seller)
+    gas = {
+        "create_listing": marketplace.create_listing(minted_token_id, b"CCCD_S", PRICE, sender=seller, value=LISTING_FEE).gas_used,
+        "initiate_transaction": marketplace.initiate_transaction(1, b"CCCD_B", sender=buyer, value=PRICE).gas_used,
+        "buyer_cancel": marketplace.buyer_cancel(1, sender=buyer).gas_used,
+    }
+    marketplace.initiate_transaction(1, b"CCCD_B", sender=buyer, value=PRICE)
+    gas["reject_transaction"] = marketplace.reject_transaction(2, "Sai thong tin", sender=owner).gas_used
+    marketplace.initiate_transaction(1, b"CCCD_B", sender=buyer, value=PRICE)
+    gas["approve_transaction"] = marketplace.approve_transaction(3, sender=owner).gas_used
+
+    # Trước khi nén struct: 334,372 / 309,479 / 71,044 / 70,991 / 214,786 gas
+    assert gas["create_listing"] < 300_000
+    assert gas["initiate_transaction"] < 250_000
+    assert gas["buyer_cancel"] < 60_000
+    assert gas["reject_transaction"] < 60_000
+    assert gas["approve_transaction"] < 200_000
+
+def test_events_carry_index_fields(marketplace, land_nft, owner, seller, buyer, minted_token_id):
+    """
+    Chỉ mục ngoài chuỗi dựng lại listing/giao dịch chỉ từ log, không cần gọi view
+    """
+    land_nft.approve(marketplace.address, minted_token_id, sender=seller)
+    tx = marketplace.create_listing(minted_token_id, b"CCCD_S", PRICE, sender=seller, value=LISTING_FEE)
+    [created] = list(tx.decode_logs(marketplace.ListingCreated))
+    assert (created.listing_id, created.token_id, created.seller, created.price) == (1, minted_token_id, seller, PRICE)
+    assert created.created_at == marketplace.get_listing(1).created_at
+
+    tx = marketplace.initiate_transaction(1, b"CCCD_B", sender=buyer, value=PRICE)
+    [initiated] = list(tx.decode_logs(marketplace.TransactionInitiated))
+    assert (initiated.tx_id, initiated.listing_id, initiated.buyer, initiated.amount) == (1, 1, buyer, PRICE)
+    assert initiated.created_at == marketplace.get_transaction(1).created_at
+
+    tx = marketplace.approve_transaction(1, sender=owner)
+    [approved] = list(tx.decode_logs(marketplace.TransactionApproved))
+    assert (approved.tx_id, approved.listing_id, approved.token_id, approved.amount) == (1, 1, minted_token_id, PRICE)
@@ -1,6 +1,6 @@
 # file: mock_blockchain.py (Phiên bản "Mô phỏng chính xác" - trả về Tuples)
 import json
-from crypto_utils import encrypt_data, decrypt_data
+from crypto_utils import encrypt_data, decrypt_data, cccd_blind_index
 # =============================================================================
 # CÁC ĐỊA CHỈ VÍ MẪU (Không đổi)
 # =============================================================================
@@ -10,6 +10,9 @@ MOCK_USER_B_ADDRESS = "0x3C44CdDdB6a900fa2b585dd299e03d12FA4293BC"
 MOCK_LAND_NFT_ADDRESS = "0x_LandNFT_Contract_Address_Mock_0000000"
 MOCK_LAND_REGISTRY_ADDRESS = "0x_LandRegistry_Contract_Address_Mock_000"
 MOCK_MARKETPLACE_ADDRESS = "0x_Marketplace_Contract_Address_Mock_00"
+# Khóa blind index cố định cho chế độ mock: chạy được ngay mà không cần khóa thật do Admin phân phối.
+# KHÔNG dùng cho dữ liệu thật.
+MOCK_BLIND_INDEX_KEY = b"mock-cccd-blind-index-key-000000"
 
 # =============================================================================
 # LỚP GIẢ MẠO VÀ CÁC HÀM PARSER
@@ -49,11 +52,12 @@ class MockLandRegistry:
         self._owner_to_lands_data = {
             MOCK_USER_A_ADDRESS: [1, 2, 6], MOCK_USER_B_ADDRESS: [3, 4, 5, 7]
         }
+        # Khóa theo blind index (cố định mỗi CCCD), không theo bản mã (ngẫu nhiên mỗi lần mã hóa)
         self._lands_by_cccd_data = {
-            cccd_a: [1, 2],
-            cccd_b: [3, 4, 5],
-            cccd_c: [6],
-            cccd_d: [7],
+            cccd_blind_index('079011111111', MOCK_BLIND_INDEX_KEY): [1, 2],
+            cccd_blind_index('079022222222', MOCK_BLIND_INDEX_KEY): [3, 4, 5],
+            cccd_blind_index('079033333333', MOCK_BLIND_INDEX_KEY): [6],
+            cccd_blind_index('079044444444', MOCK_BLIND_INDEX_KEY): [7],
         }
 
     # Public HashMap Getters (TRẢ VỀ TUPLE)
@@ -66,7 +70,7 @@ class MockLandRegistry:
         print(f"[MOCK Registry] Getting owner_to_lands({owner_address})...")
         return self._owner_to_lands_data.get(owner_address, [])
 
-    def register_land(self, _land_address, _area, _owner_cccd, _pdf_uri, _image_uri, sender):
+    def register_land(self, _land_address, _area, _owner_cccd, _cccd_index, _pdf_uri, _image_uri, sender):
         """
         Mô phỏng hành động người dùng đăng ký hồ sơ đất mới.
         """
@@ -77,6 +81,7 @@ class MockLandRegistry:
         assert len(_land_address) > 0, "Mock: Land address cannot be empty"
         assert _area > 0, "Mock: Area must be greater than 0"
         assert len(_owner_cccd) > 0, "Mock: Owner CCCD cannot be empty"
+        assert len(_cccd_index) > 0, "Mock: CCCD blind index cannot be empty"
         assert len(_pdf_uri) > 0, "Mock: PDF URI cannot be empty"
         assert len(_image_uri) > 0, "Mock: Image URI cannot be empty"
 
@@ -98,9 +103,9 @@ class MockLandRegistry:
         self._land_parcels_data[land_id] = new_parcel_tuple
         self._land_to_owner_data[land_id] = sender.address
         
-        if _owner_cccd not in self._lands_by_cccd_data:
-            self._lands_by_cccd_data[_owner_cccd] = []
-        self._lands_by_cccd_data[_owner_cccd].append(land_id)
+        if _cccd_index not in self._lands_by_cccd_data:
+            self._lands_by_cccd_data[_cccd_index] = []
+        self._lands_by_cccd_data[_cccd_index].append(land_id)
         
         if sender.address not in self._owner_to_lands_data:
             self._owner_to_lands_data[sender.address] = []
@@ -219,10 +224,10 @@ class MockLandRegistry:
             return parcel[4] == 2
         return False
     
-    def lands_by_cccd(self, cccd: str):
-        """Mô phỏng hàm getter của public HashMap `lands_by_cccd`."""
-        print(f"[MOCK Registry] Getting lands_by_cccd({cccd})...")
-        return self._lands_by_cccd_data.get(cccd, [])
+    def lands_by_cccd(self, cccd_index: str):
+        """Mô phỏng hàm getter của public HashMap `lands_by_cccd` (khóa là blind index của CCCD)."""
+        print(f"[MOCK Registry] Getting lands_by_cccd({cccd_index})...")
+        return self._lands_by_cccd_data.get(cccd_index, [])
 
 class MockLandNFT:
     def __init__(self, registry_mock):